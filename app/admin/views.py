@@ -1,5 +1,11 @@
+from typing import Any, Optional
+
+from flask import flash
+from flask_admin.babel import gettext
 from flask_admin.contrib.sqla import ModelView
 
+from app.db import crud, models
+
 
 class MovieView(ModelView):
     column_hide_backrefs = True
@@ -21,6 +27,32 @@ class UserView(ModelView):
 class ReviewView(ModelView):
     can_create = False
     can_edit = True
-    can_delete = False
-
-    form_edit_rules = ['review_text']
+    can_delete = True
+
+    form_edit_rules = ['score', 'review_text']
+
+    # changed by crud like reviews of the API, so statistics of movies follow;
+    # nothing flushes a write-behind buffer here, they are written at once
+    def update_model(self, form: Any, model: models.Review) -> bool:
+        return self.change_review(
+            model,
+            {'score': form.score.data, 'review_text': form.review_text.data or None},
+        )
+
+    def delete_model(self, model: models.Review) -> bool:
+        return self.change_review(model, None)
+
+    def change_review(
+        self, model: models.Review, changes: Optional[dict[str, Any]]
+    ) -> bool:
+        try:
+            crud.change_review(self.session, model.id, None, changes, buffered=False)
+        except Exception as ex:  # pylint: disable=broad-except
+            if not self.handle_view_exception(ex):
+                flash(
+                    gettext('Failed to update record. %(error)s', error=str(ex)),
+                    'error',
+                )
+            self.session.rollback()
+            return False
+        return True
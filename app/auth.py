@@ -0,0 +1,137 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Optional
+
+from sqlalchemy import event
+
+from app.config import get_settings
+from app.db import models
+
+
+class CredentialCache:
+    """Bounded TTL cache of successfully verified credentials.
+
+    Password hashing is deliberately slow, so checking it on every request
+    dominates latency. Entries are keyed by an HMAC of login and password with a
+    per-process random key, so neither value is kept in memory in plain text.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._key = secrets.token_bytes(32)
+        # key -> (expiration time, user id, login)
+        self._entries: OrderedDict[bytes, tuple[float, int, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _make_key(self, login: str, password: str) -> bytes:
+        # the length prefix keeps ('ab', 'c') and ('a', 'bc') apart
+        message = f'{len(login)}:{login}:{password}'.encode()
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def get(self, login: str, password: str) -> Optional[models.User]:
+        key = self._make_key(login, password)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        _, user_id, user_login = entry
+        return models.User(id=user_id, login=user_login)
+
+    def add(self, user: models.User, password: str) -> None:
+        if self.maxsize <= 0:
+            return
+        key = self._make_key(user.login, password)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user.id, user.login)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if v[1] == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+@lru_cache(maxsize=None)
+def get_credential_cache() -> CredentialCache:
+    settings = get_settings()
+    return CredentialCache(
+        maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL
+    )
+
+
+@event.listens_for(models.User, 'after_update')
+@event.listens_for(models.User, 'after_delete')
+def _invalidate_changed_user(_: Any, __: Any, target: models.User) -> None:
+    # password or login has changed (or user is gone), forget verified credentials
+    get_credential_cache().invalidate(target.id)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+@lru_cache(maxsize=None)
+def _get_token_key() -> bytes:
+    # without SECRET_KEY tokens are valid only for the process that issued them
+    secret_key = get_settings().SECRET_KEY
+    return secret_key.encode() if secret_key else secrets.token_bytes(32)
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(
+        hmac.new(_get_token_key(), payload.encode(), hashlib.sha256).digest()
+    )
+
+
+def create_access_token(user: models.User) -> str:
+    """Signed token in the form of `<base64 claims>.<base64 HMAC-SHA256>`."""
+    claims = {
+        'sub': user.id,
+        'login': user.login,
+        'exp': int(time.time()) + get_settings().ACCESS_TOKEN_TTL,
+    }
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    return f'{payload}.{_sign(payload)}'
+
+
+def verify_access_token(token: str) -> Optional[models.User]:
+    payload, _, signature = token.partition('.')
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+    except (binascii.Error, ValueError):
+        return None
+    if claims['exp'] < time.time():
+        return None
+    return models.User(id=claims['sub'], login=claims['login'])
@@ -0,0 +1,145 @@
+import codecs
+import csv
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Sequence, Type, TypeVar
+
+import orjson
+from pydantic import BaseModel, ValidationError
+
+from app.db import schemas
+from app.exceptions import InvalidBulkBody, InvalidCsvHeader, UnsupportedBulkFormat
+
+T = TypeVar('T')
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+JSON = 'application/json'
+NDJSON = 'application/x-ndjson'
+CSV = 'text/csv'
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    tail = ''
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split('\n')
+        tail = lines.pop()
+        for line in lines:
+            yield line
+    tail += decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def parse_csv_line(line: str) -> Optional[list[str]]:
+    # None if the line isn't a CSV record, e.g. a stray carriage return in it
+    try:
+        return next(csv.reader([line]), None)
+    except csv.Error:
+        return None
+
+
+async def iter_csv_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    # dicts by the names of the header, None for a line that doesn't fit it
+    header = None
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        values = parse_csv_line(line)
+        if header is None:
+            if values is None:
+                raise InvalidCsvHeader
+            header = [name.strip() for name in values]
+        elif values is None or len(values) != len(header):
+            yield None
+        else:
+            yield dict(zip(header, values))
+
+
+async def iter_rows(
+    content_type: str, chunks: AsyncIterable[bytes]
+) -> AsyncIterator[Any]:
+    """Rows of an uploaded JSON array, NDJSON or CSV with a header.
+
+    NDJSON and CSV are parsed while they are received. A row that can't be
+    parsed is None, so it's reported by validation like any other bad row.
+    CSV records must not span lines.
+    """
+    media_type = content_type.split(';')[0].strip().lower()
+    if media_type == JSON:
+        try:
+            rows = orjson.loads(b''.join([chunk async for chunk in chunks]))
+        except orjson.JSONDecodeError as err:
+            raise InvalidBulkBody from err
+        if not isinstance(rows, list):
+            raise InvalidBulkBody
+        for row in rows:
+            yield row
+    elif media_type == NDJSON:
+        async for line in iter_lines(chunks):
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield None
+    elif media_type == CSV:
+        async for row in iter_csv_rows(chunks):
+            yield row
+    else:
+        raise UnsupportedBulkFormat
+
+
+async def batched(items: AsyncIterable[T], size: int) -> AsyncIterator[list[T]]:
+    batch: list[T] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def get_error_detail(err: ValidationError) -> str:
+    return '; '.join(
+        f'{".".join(map(str, error["loc"]))}: {error["msg"]}' for error in err.errors()
+    )
+
+
+def validate_rows(
+    rows: Sequence[tuple[int, Any]], schema: Type[ModelT]
+) -> tuple[list[tuple[int, ModelT]], list[schemas.BulkError]]:
+    """Rows parsed into `schema` and errors of the rest, rows are (index, data)."""
+    valid = []
+    errors = []
+    for index, data in rows:
+        try:
+            valid.append((index, schema.parse_obj(data)))
+        except ValidationError as err:
+            errors.append(schemas.BulkError(index=index, detail=get_error_detail(err)))
+    return valid, errors
+
+
+async def enumerate_rows(rows: AsyncIterable[T]) -> AsyncIterator[tuple[int, T]]:
+    index = 0
+    async for row in rows:
+        yield index, row
+        index += 1
+
+
+def get_bulk_openapi(schema: Type[BaseModel]) -> dict[str, Any]:
+    # the body is read as a stream, so it's described by hand
+    return {
+        'requestBody': {
+            'required': True,
+            'content': {
+                JSON: {
+                    'schema': {
+                        'type': 'array',
+                        'items': {'$ref': f'#/components/schemas/{schema.__name__}'},
+                    }
+                },
+                NDJSON: {'schema': {'type': 'string'}},
+                CSV: {'schema': {'type': 'string'}},
+            },
+        }
+    }
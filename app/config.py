@@ -1,5 +1,6 @@
+from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import BaseSettings
 
@@ -9,6 +10,72 @@ basedir = Path(__file__).resolve().parent.parent
 class Settings(BaseSettings):
 
     SQLALCHEMY_DATABASE_URI: str = f'sqlite:///{basedir / "data.db"}'
+    # derived from SQLALCHEMY_DATABASE_URI when not set (sqlite -> aiosqlite)
+    ASYNC_SQLALCHEMY_DATABASE_URI: Optional[str] = None
+
+    # serve the API with async routes on top of AsyncEngine instead of the
+    # sync routes that are run in the thread pool
+    ASYNC_DB: bool = False
+
+    # connection pool of the process-wide engine
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 3600  # seconds, -1 to disable
+    DB_POOL_PRE_PING: bool = False
+
+    # one of app.db.database.SQLITE_PRAGMA_PROFILES
+    SQLITE_PRAGMA_PROFILE: str = 'performance'
+
+    # cache of verified credentials, AUTH_CACHE_SIZE = 0 disables it
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL: int = 300  # seconds
+
+    # key for signing access tokens, must be shared by all workers;
+    # a random per-process key is used when it isn't set
+    SECRET_KEY: Optional[str] = None
+    ACCESS_TOKEN_TTL: int = 900  # seconds
+
+    # werkzeug hash method, the number is PBKDF2 iterations (the hash cost)
+    PASSWORD_HASH_METHOD: str = 'pbkdf2:sha256:260000'
+    # processes for hashing passwords, None means the number of CPUs
+    # and 0 hashes in the request thread
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+
+    # cache of totals of filtered movie lists, MOVIE_COUNT_CACHE_SIZE = 0 disables it
+    MOVIE_COUNT_CACHE_SIZE: int = 1000
+    MOVIE_COUNT_CACHE_TTL: int = 60  # seconds
+
+    # build movie, user and review responses as dicts right from the selected
+    # rows and encode them with orjson, bypassing validation by response models
+    FAST_SERIALIZATION: bool = False
+
+    # rows fetched from the database and encoded at once by GET /movies/export
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # rows validated and inserted at once (a transaction) by bulk endpoints
+    BULK_BATCH_SIZE: int = 1000
+
+    # weighted score of GET /movies/top: the average of a movie with less than
+    # LEADERBOARD_MIN_VOTES scores is pulled towards LEADERBOARD_PRIOR_SCORE,
+    # run rebuild_leaderboard.py after changing them
+    LEADERBOARD_MIN_VOTES: int = 10
+    LEADERBOARD_PRIOR_SCORE: float = 5.0
+
+    # trending score of GET /movies/trending: a review counts half as much
+    # every TRENDING_HALF_LIFE, see app.db.trending; move the epoch forward
+    # (then run backfill_trending.py) within a few hundred half-lives of it
+    TRENDING_HALF_LIFE: float = 7 * 24 * 3600  # seconds
+    TRENDING_EPOCH: datetime = datetime(2024, 1, 1)  # UTC
+
+    # write scores added to movies by reviews in batches from a background
+    # thread instead of by every review, see app.db.write_behind
+    STATISTIC_WRITE_BEHIND: bool = False
+    STATISTIC_FLUSH_INTERVAL: float = 1.0  # seconds
+    STATISTIC_FLUSH_SIZE: int = 1000  # pending scores that trigger a flush
+
+    # Cache-Control of the movie endpoints answering If-None-Match with 304
+    MOVIE_LIST_CACHE_CONTROL: str = 'private, no-cache'
+    MOVIE_CACHE_CONTROL: str = 'private, no-cache'
 
 
 def get_settings(**kwargs: Any) -> Settings:
@@ -0,0 +1,291 @@
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.db import counters, crud, models, schemas, trending, write_behind
+from app.hashing import async_hash_password
+
+
+# User stuff
+async def get_user(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    return result.scalars().first()
+
+
+async def get_user_row(
+    db: AsyncSession, user_id: int, fields: Sequence[str]
+) -> Optional[Row]:
+    result = await db.execute(
+        select(*crud.get_columns(models.User, fields)).where(models.User.id == user_id)
+    )
+    return result.first()
+
+
+async def get_user_by_login(db: AsyncSession, login: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.login == login))
+    return result.scalars().first()
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    db_user = models.User(
+        login=user.login, hashed_password=await async_hash_password(user.password)
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+# Movie stuff
+async def get_movie(db: AsyncSession, movie_id: int) -> Optional[models.Movie]:
+    result = await db.execute(select(models.Movie).where(models.Movie.id == movie_id))
+    return result.scalars().first()
+
+
+async def get_movie_row(
+    db: AsyncSession, movie_id: int, fields: Sequence[str]
+) -> Optional[Row]:
+    result = await db.execute(
+        select(
+            *crud.get_columns(models.Movie, crud.get_movie_row_fields(fields))
+        ).where(models.Movie.id == movie_id)
+    )
+    return result.first()
+
+
+async def get_movie_by_title(db: AsyncSession, title: str) -> Optional[models.Movie]:
+    result = await db.execute(
+        select(models.Movie).where(
+            models.normalize_title(models.Movie.title) == models.normalize_title(title)
+        )
+    )
+    return result.scalars().first()
+
+
+async def create_movie(
+    db: AsyncSession, movie: schemas.MovieCreate
+) -> Optional[models.Movie]:
+    result = await db.execute(crud.create_movie_statement(movie))
+    await db.commit()
+    if not result.rowcount:
+        return None
+    counters.get_movie_count_cache().clear()
+    return crud.new_movie(movie, result.inserted_primary_key[0])
+
+
+async def update_movie_statistics(
+    db: AsyncSession, deltas: Sequence[write_behind.Delta]
+) -> None:
+    # see crud.update_movie_statistics
+    await db.execute(crud.movie_statistic_statement(), deltas)
+    movie_ids = [delta['movie_id'] for delta in deltas]
+    await db.execute(crud.leaderboard_entries_statement(movie_ids))
+    if any(delta['new_scores'] < 0 for delta in deltas):
+        await db.execute(crud.unscored_leaderboard_entries_statement(movie_ids))
+
+
+async def update_movie_statistic(
+    db: AsyncSession, review: schemas.ReviewCreate, created_at: datetime
+) -> bool:
+    # whether the movie exists, it's found by the update itself
+    delta = crud.get_movie_statistic_deltas([review], created_at)[0]
+    result = await db.execute(crud.movie_statistic_statement(), delta)
+    if not result.rowcount:
+        return False
+    await db.execute(crud.leaderboard_entries_statement([review.movie_id]))
+    return True
+
+
+def get_filtered_movies_query(
+    movie_filters: schemas.MovieFilters, fields: Optional[Sequence[str]] = None
+) -> Select:
+    # building the statement doesn't need IO, it's executed by the paginator
+    movie_query = select(*crud.get_entities(models.Movie, fields))
+    return crud.filter_movies(movie_query, movie_filters)
+
+
+async def get_movies(
+    db: AsyncSession, movie_filters: schemas.MovieFilters, limit: int, offset: int
+) -> list[models.Movie]:
+    movie_query = get_filtered_movies_query(movie_filters)
+    result = await db.execute(movie_query.limit(limit).offset(offset))
+    return result.scalars().all()
+
+
+async def get_movie_rows(
+    db: AsyncSession,
+    movie_filters: schemas.MovieFilters,
+    limit: int,
+    offset: int,
+    fields: Sequence[str],
+) -> list[Row]:
+    movie_query = get_filtered_movies_query(
+        movie_filters, crud.get_movie_row_fields(fields)
+    )
+    result = await db.execute(movie_query.limit(limit).offset(offset))
+    return result.all()
+
+
+async def get_counter(db: AsyncSession, name: str) -> Optional[int]:
+    result = await db.execute(
+        select(models.Counter.value).where(models.Counter.name == name)
+    )
+    return result.scalar()
+
+
+async def get_catalog_version(db: AsyncSession) -> int:
+    return await get_counter(db, counters.CATALOG_VERSION) or 0
+
+
+async def count_movies(db: AsyncSession, movie_filters: schemas.MovieFilters) -> int:
+    key = counters.get_movie_count_key(movie_filters)
+    if key is None:
+        total = await get_counter(db, counters.MOVIES)
+        if total is not None:
+            return total
+
+    count_cache = counters.get_movie_count_cache()
+    total = count_cache.get(key)
+    if total is None:
+        total = (await db.execute(crud.get_movies_count_query(movie_filters))).scalar()
+        count_cache.set(key, total)
+    return total
+
+
+def get_movies_after_query(
+    movie_filters: schemas.MovieFilters,
+    after_key: Optional[Sequence[Any]],
+    fields: Optional[Sequence[str]] = None,
+) -> Select:
+    if fields:
+        fields = [*fields, *crud.get_movie_sort_fields(movie_filters)]
+    return crud.filter_movies_after(
+        get_filtered_movies_query(movie_filters, fields), movie_filters, after_key
+    )
+
+
+async def get_movies_after(
+    db: AsyncSession,
+    movie_filters: schemas.MovieFilters,
+    after_key: Optional[Sequence[Any]],
+    limit: int,
+) -> list[models.Movie]:
+    movie_query = get_movies_after_query(movie_filters, after_key)
+    result = await db.execute(movie_query.limit(limit))
+    return result.scalars().all()
+
+
+async def get_movie_rows_after(
+    db: AsyncSession,
+    movie_filters: schemas.MovieFilters,
+    after_key: Optional[Sequence[Any]],
+    limit: int,
+    fields: Sequence[str],
+) -> list[Row]:
+    movie_query = get_movies_after_query(
+        movie_filters, after_key, crud.get_movie_row_fields(fields)
+    )
+    result = await db.execute(movie_query.limit(limit))
+    return result.all()
+
+
+# Review stuff
+async def add_review(
+    db: AsyncSession, review: schemas.ReviewCreate, user_id: int
+) -> Optional[models.Review]:
+    # see crud.add_review
+    buffer = write_behind.get_statistic_buffer()
+    created_at = trending.utc_now()
+    if buffer is None and not await update_movie_statistic(db, review, created_at):
+        return None
+    try:
+        if buffer is None:
+            result = await db.execute(
+                insert(models.Review).values(
+                    **review.dict(), user_id=user_id, created_at=created_at
+                )
+            )
+        else:
+            result = await db.execute(
+                crud.review_of_movie_statement(review, user_id, created_at)
+            )
+            if not result.rowcount:
+                return None
+    except IntegrityError:
+        await db.rollback()
+        raise
+    await db.commit()
+    if buffer is not None:
+        buffer.add(crud.get_movie_statistic_deltas([review], created_at))
+    return crud.new_review(review, user_id, result.lastrowid, created_at)
+
+
+async def get_movie_reviews(
+    db: AsyncSession, movie_id: int, after_key: Optional[Sequence[Any]], limit: int
+) -> list[models.Review]:
+    review_query = crud.get_reviews_query(models.Review.movie_id, movie_id, after_key)
+    result = await db.execute(review_query.limit(limit))
+    return result.scalars().all()
+
+
+async def get_user_reviews(
+    db: AsyncSession, user_id: int, after_key: Optional[Sequence[Any]], limit: int
+) -> list[models.Review]:
+    review_query = crud.get_reviews_query(models.Review.user_id, user_id, after_key)
+    result = await db.execute(review_query.limit(limit))
+    return result.scalars().all()
+
+
+async def change_review(
+    db: AsyncSession,
+    review_id: int,
+    user_id: Optional[int],
+    changes: Optional[dict[str, Any]],
+) -> Optional[models.Review]:
+    # see crud.change_review
+    buffer = write_behind.get_statistic_buffer()
+    while True:
+        result = await db.execute(crud.select_review_statement(review_id, user_id))
+        review = result.first()
+        if review is None:
+            return None
+        if changes == {}:
+            return models.Review(**review._asdict())
+        result = await db.execute(crud.review_change_statement(review, changes))
+        if result.rowcount:
+            break
+        await db.rollback()
+    delta = crud.get_review_change_delta(review, changes)
+    if buffer is None:
+        await update_movie_statistics(db, [delta])
+    await db.commit()
+    if buffer is not None:
+        buffer.add([delta])
+    return models.Review(**{**review._asdict(), **(changes or {})})
+
+
+async def update_review(
+    db: AsyncSession,
+    review_id: int,
+    user_id: Optional[int],
+    review: schemas.ReviewUpdate,
+) -> Optional[models.Review]:
+    return await change_review(db, review_id, user_id, crud.get_review_changes(review))
+
+
+async def delete_review(
+    db: AsyncSession, review_id: int, user_id: Optional[int]
+) -> bool:
+    return await change_review(db, review_id, user_id, None) is not None
+
+
+# Recommendation stuff
+async def get_recommendations(db: AsyncSession, user_id: int, limit: int) -> list[Row]:
+    result = await db.execute(crud.recommendations_query(user_id, limit))
+    return result.all()
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable, Optional
+
+from sqlalchemy.engine import Connection
+
+from app.config import get_settings
+from app.db import fts, schemas
+
+MOVIES = 'movies'
+# bumped on every change of the movies table, used for ETags of movie endpoints
+CATALOG_VERSION = 'catalog_version'
+
+# Rows of `counters` are kept up to date by triggers, so reading one is a primary
+# key lookup instead of an aggregate over the whole table. Seeding is idempotent,
+# a counter is initialized from the existing rows when it's created.
+CREATE_COUNTERS = [
+    f"""
+    INSERT OR IGNORE INTO counters (name, value)
+    SELECT '{MOVIES}', count(*) FROM movies
+    """,
+    f"""
+    INSERT OR IGNORE INTO counters (name, value) VALUES ('{CATALOG_VERSION}', 0)
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS counters_movies_ai AFTER INSERT ON movies BEGIN
+        UPDATE counters SET value = value + 1 WHERE name = '{MOVIES}';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS counters_movies_ad AFTER DELETE ON movies BEGIN
+        UPDATE counters SET value = value - 1 WHERE name = '{MOVIES}';
+    END
+    """,
+    *(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS counters_catalog_version_{suffix}
+        AFTER {event} ON movies BEGIN
+            UPDATE counters SET value = value + 1 WHERE name = '{CATALOG_VERSION}';
+        END
+        """
+        for suffix, event in [('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE')]
+    ),
+]
+
+
+def create_counters(_: Any, connection: Connection, **__: Any) -> None:
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in CREATE_COUNTERS:
+        connection.exec_driver_sql(statement)
+
+
+class CountCache:
+    """Bounded TTL cache of row counts of filtered lists."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (expiration time, count)
+        self._entries: OrderedDict[Hashable, tuple[float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, count: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, count)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache(maxsize=None)
+def get_movie_count_cache() -> CountCache:
+    settings = get_settings()
+    return CountCache(
+        maxsize=settings.MOVIE_COUNT_CACHE_SIZE, ttl=settings.MOVIE_COUNT_CACHE_TTL
+    )
+
+
+def get_movie_count_key(movie_filters: schemas.MovieFilters) -> Optional[Hashable]:
+    """Filters that define the number of movies, None if the list isn't filtered.
+
+    Sorting doesn't change the count, and texts searching by the same words
+    (regardless of case and punctuation) give the same key.
+    """
+    text = movie_filters.filter_by_text or ''
+    text = fts.get_title_match_query(text).lower() or text
+    if not (text or movie_filters.filter_by_year):
+        return None
+    return text, movie_filters.filter_by_year
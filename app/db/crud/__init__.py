@@ -0,0 +1,130 @@
+from app.db.crud.columns import get_columns, get_entities
+from app.db.crud.movies import (
+    MovieQuery,
+    count_movies,
+    create_movie,
+    create_movie_statement,
+    create_movies,
+    filter_movies,
+    filter_movies_after,
+    get_catalog_version,
+    get_counter,
+    get_filtered_movies_query,
+    get_movie,
+    get_movie_by_title,
+    get_movie_row,
+    get_movie_row_fields,
+    get_movie_rows,
+    get_movie_rows_after,
+    get_movie_sort_fields,
+    get_movie_sort_key,
+    get_movies,
+    get_movies_after,
+    get_movies_after_query,
+    get_movies_count_query,
+    iter_movie_rows,
+    new_movie,
+)
+from app.db.crud.rankings import (
+    filter_top_movies,
+    get_top_movie_key,
+    get_top_movies,
+    get_trending_movie_key,
+    get_trending_movies,
+)
+from app.db.crud.recommendations import get_recommendations, recommendations_query
+from app.db.crud.reviews import (
+    add_review,
+    add_review_batches,
+    add_reviews,
+    change_review,
+    delete_review,
+    get_movie_reviews,
+    get_review_change_delta,
+    get_review_changes,
+    get_review_key,
+    get_reviews_query,
+    get_user_reviews,
+    new_review,
+    review_change_statement,
+    review_of_movie_statement,
+    select_review_statement,
+    update_review,
+)
+from app.db.crud.statistics import (
+    HISTOGRAM_DELTA_KEYS,
+    count_score,
+    get_movie_statistic_deltas,
+    leaderboard_entries_statement,
+    movie_statistic_statement,
+    new_movie_statistic_delta,
+    unscored_leaderboard_entries_statement,
+    update_movie_statistic,
+    update_movie_statistics,
+)
+from app.db.crud.users import create_user, get_user, get_user_by_login, get_user_row
+
+__all__ = [
+    'HISTOGRAM_DELTA_KEYS',
+    'MovieQuery',
+    'add_review',
+    'add_review_batches',
+    'add_reviews',
+    'change_review',
+    'count_movies',
+    'count_score',
+    'create_movie',
+    'create_movie_statement',
+    'create_movies',
+    'create_user',
+    'delete_review',
+    'filter_movies',
+    'filter_movies_after',
+    'filter_top_movies',
+    'get_catalog_version',
+    'get_columns',
+    'get_counter',
+    'get_entities',
+    'get_filtered_movies_query',
+    'get_movie',
+    'get_movie_by_title',
+    'get_movie_reviews',
+    'get_movie_row',
+    'get_movie_row_fields',
+    'get_movie_rows',
+    'get_movie_rows_after',
+    'get_movie_sort_fields',
+    'get_movie_sort_key',
+    'get_movie_statistic_deltas',
+    'get_movies',
+    'get_movies_after',
+    'get_movies_after_query',
+    'get_movies_count_query',
+    'get_recommendations',
+    'get_review_change_delta',
+    'get_review_changes',
+    'get_review_key',
+    'get_reviews_query',
+    'get_top_movie_key',
+    'get_top_movies',
+    'get_trending_movie_key',
+    'get_trending_movies',
+    'get_user',
+    'get_user_by_login',
+    'get_user_reviews',
+    'get_user_row',
+    'iter_movie_rows',
+    'leaderboard_entries_statement',
+    'movie_statistic_statement',
+    'new_movie',
+    'new_movie_statistic_delta',
+    'new_review',
+    'recommendations_query',
+    'review_change_statement',
+    'review_of_movie_statement',
+    'select_review_statement',
+    'unscored_leaderboard_entries_statement',
+    'update_movie_statistic',
+    'update_movie_statistics',
+    'update_review',
+]
@@ -0,0 +1,11 @@
+from typing import Any, Optional, Sequence
+
+
+def get_columns(model: Any, fields: Sequence[str]) -> list[Any]:
+    return [getattr(model, field) for field in fields]
+
+
+def get_entities(model: Any, fields: Optional[Sequence[str]]) -> list[Any]:
+    # plain rows of the columns of `fields` are selected instead of ORM objects
+    # when they are given, so neither other columns nor the ORM are involved
+    return get_columns(model, fields) if fields else [model]
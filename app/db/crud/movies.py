@@ -0,0 +1,273 @@
+from typing import Any, Iterator, Optional, Sequence, TypeVar
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import Insert, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import Select
+
+from app.db import counters, fts, models, schemas, write_behind
+from app.db.crud.columns import get_columns, get_entities
+
+MovieQuery = TypeVar('MovieQuery', Query, Select)
+
+
+def get_movie(db: Session, movie_id: int) -> Optional[models.Movie]:
+    return db.query(models.Movie).filter(models.Movie.id == movie_id).first()
+
+
+def get_movie_row_fields(fields: Sequence[str]) -> list[str]:
+    # pending scores of the write-behind mode are added to rows by their movies
+    if write_behind.get_statistic_buffer() is None:
+        return list(fields)
+    return [*fields, *write_behind.STATISTIC_FIELDS]
+
+
+def get_movie_row(db: Session, movie_id: int, fields: Sequence[str]) -> Optional[Row]:
+    return (
+        db.query(*get_columns(models.Movie, get_movie_row_fields(fields)))
+        .filter(models.Movie.id == movie_id)
+        .first()
+    )
+
+
+def get_movie_by_title(db: Session, title: str) -> Optional[models.Movie]:
+    return (
+        db.query(models.Movie)
+        .filter(
+            models.normalize_title(models.Movie.title) == models.normalize_title(title)
+        )
+        .first()
+    )
+
+
+def create_movie_statement(movie: schemas.MovieCreate) -> Insert:
+    # a movie with the same normalized title is left as it is
+    return insert(models.Movie).values(**movie.dict()).on_conflict_do_nothing()
+
+
+def new_movie(movie: schemas.MovieCreate, movie_id: int) -> models.Movie:
+    # what the database has for a just inserted movie, without selecting it back
+    return models.Movie(
+        id=movie_id,
+        **movie.dict(),
+        avg_score=0.0,
+        score_sum=0,
+        score_number=0,
+        review_number=0,
+    )
+
+
+def create_movie(db: Session, movie: schemas.MovieCreate) -> Optional[models.Movie]:
+    """Insert the movie in one statement, None if its title is already registered."""
+    result = db.execute(create_movie_statement(movie))
+    db.commit()
+    if not result.rowcount:
+        return None
+    counters.get_movie_count_cache().clear()
+    return new_movie(movie, result.inserted_primary_key[0])
+
+
+def create_movies(db: Session, movies: Sequence[schemas.MovieCreate]) -> list[bool]:
+    """Insert the movies with one executemany, whether each of them is inserted.
+
+    Movies with registered titles are found by one lookup in the index of
+    normalized titles, they and repeated titles aren't inserted.
+    """
+    titles = [models.get_normalized_title(movie.title) for movie in movies]
+    registered = set(
+        db.execute(
+            sa.select(models.normalize_title(models.Movie.title)).where(
+                models.normalize_title(models.Movie.title).in_(set(titles))
+            )
+        ).scalars()
+    )
+    created = []
+    for title in titles:
+        created.append(title not in registered)
+        registered.add(title)
+
+    new_movies = [movie.dict() for movie, new in zip(movies, created) if new]
+    if new_movies:
+        db.execute(insert(models.Movie).on_conflict_do_nothing(), new_movies)
+        db.commit()
+        counters.get_movie_count_cache().clear()
+    return created
+
+
+def filter_movies(
+    movie_query: MovieQuery, movie_filters: schemas.MovieFilters
+) -> MovieQuery:
+    # shared by the sync (Query) and async (Select) data layers
+    filters = []
+    match_query = fts.get_title_match_query(movie_filters.filter_by_text or '')
+    if match_query:
+        # full-text index lookup instead of scanning titles with LIKE '%text%'
+        movie_query = movie_query.join(
+            fts.movies_fts, fts.movies_fts.c.rowid == models.Movie.id
+        )
+        filters.append(fts.title_matches(match_query))
+    elif movie_filters.filter_by_text:
+        filters.append(models.Movie.title.contains(movie_filters.filter_by_text))
+    if movie_filters.filter_by_year:
+        filters.append(models.Movie.release_year == movie_filters.filter_by_year)
+    movie_query = movie_query.filter(*filters)
+    if movie_filters.sort_by_avg_score:
+        movie_query = movie_query.order_by(models.Movie.avg_score.desc())
+    if match_query and movie_filters.sort_by_relevance:
+        movie_query = movie_query.order_by(fts.movies_fts.c.rank)
+    if movie_filters.sort_by_avg_score:
+        # stable order of movies with equal scores, it's the tail of the index
+        movie_query = movie_query.order_by(models.Movie.id.desc())
+
+    return movie_query
+
+
+def get_filtered_movies_query(
+    db: Session,
+    movie_filters: schemas.MovieFilters,
+    fields: Optional[Sequence[str]] = None,
+) -> Query:
+    movie_query = db.query(*get_entities(models.Movie, fields))
+    return filter_movies(movie_query, movie_filters)
+
+
+def get_movies(
+    db: Session, movie_filters: schemas.MovieFilters, limit: int, offset: int
+) -> list[models.Movie]:
+    movie_query = get_filtered_movies_query(db, movie_filters)
+    return movie_query.limit(limit).offset(offset).all()
+
+
+def get_movie_rows(
+    db: Session,
+    movie_filters: schemas.MovieFilters,
+    limit: int,
+    offset: int,
+    fields: Sequence[str],
+) -> list[Row]:
+    movie_query = get_filtered_movies_query(
+        db, movie_filters, get_movie_row_fields(fields)
+    )
+    return movie_query.limit(limit).offset(offset).all()
+
+
+def iter_movie_rows(
+    db: Session,
+    movie_filters: schemas.MovieFilters,
+    fields: Sequence[str],
+    batch_size: int,
+) -> Iterator[Row]:
+    # rows are fetched from the cursor batch by batch instead of all at once
+    movie_query = get_filtered_movies_query(db, movie_filters, fields)
+    return iter(movie_query.yield_per(batch_size))
+
+
+def get_counter(db: Session, name: str) -> Optional[int]:
+    return db.query(models.Counter.value).filter(models.Counter.name == name).scalar()
+
+
+def get_catalog_version(db: Session) -> int:
+    return get_counter(db, counters.CATALOG_VERSION) or 0
+
+
+def get_movies_count_query(movie_filters: schemas.MovieFilters) -> Select:
+    count_filters = schemas.MovieFilters(
+        filter_by_text=movie_filters.filter_by_text,
+        filter_by_year=movie_filters.filter_by_year,
+    )
+    return filter_movies(
+        sa.select(sa.func.count(models.Movie.id)).select_from(models.Movie),
+        count_filters,
+    )
+
+
+def count_movies(db: Session, movie_filters: schemas.MovieFilters) -> int:
+    """Number of filtered movies without a COUNT(*) scan where possible.
+
+    The whole catalog is counted by a maintained counter, filtered lists are
+    counted once and cached until a movie is created or the entry expires.
+    """
+    key = counters.get_movie_count_key(movie_filters)
+    if key is None:
+        total = get_counter(db, counters.MOVIES)
+        if total is not None:
+            return total
+
+    count_cache = counters.get_movie_count_cache()
+    total = count_cache.get(key)
+    if total is None:
+        total = db.execute(get_movies_count_query(movie_filters)).scalar()
+        count_cache.set(key, total)
+    return total
+
+
+def get_movie_sort_fields(movie_filters: schemas.MovieFilters) -> list[str]:
+    if movie_filters.sort_by_avg_score:
+        return ['avg_score', 'id']
+    return ['id']
+
+
+def get_movie_sort_key(
+    movie: models.Movie, movie_filters: schemas.MovieFilters
+) -> list[Any]:
+    return [getattr(movie, field) for field in get_movie_sort_fields(movie_filters)]
+
+
+def filter_movies_after(
+    movie_query: MovieQuery,
+    movie_filters: schemas.MovieFilters,
+    after_key: Optional[Sequence[Any]],
+) -> MovieQuery:
+    """Keyset continuation of filter_movies, starts after the movie with `after_key`.
+
+    Instead of skipping OFFSET rows it seeks in the index, so every page costs
+    the same. Relevance order isn't supported, it has no stored key to seek by.
+    """
+    if movie_filters.sort_by_avg_score:
+        if after_key:
+            movie_query = movie_query.filter(
+                sa.tuple_(models.Movie.avg_score, models.Movie.id) < tuple(after_key)
+            )
+        return movie_query
+
+    if after_key:
+        movie_query = movie_query.filter(models.Movie.id > after_key[0])
+    return movie_query.order_by(models.Movie.id)
+
+
+def get_movies_after_query(
+    db: Session,
+    movie_filters: schemas.MovieFilters,
+    after_key: Optional[Sequence[Any]],
+    fields: Optional[Sequence[str]] = None,
+) -> Query:
+    if fields:
+        # the cursor of the page is made of the sort key of its last movie
+        fields = [*fields, *get_movie_sort_fields(movie_filters)]
+    return filter_movies_after(
+        get_filtered_movies_query(db, movie_filters, fields), movie_filters, after_key
+    )
+
+
+def get_movies_after(
+    db: Session,
+    movie_filters: schemas.MovieFilters,
+    after_key: Optional[Sequence[Any]],
+    limit: int,
+) -> list[models.Movie]:
+    movie_query = get_movies_after_query(db, movie_filters, after_key)
+    return movie_query.limit(limit).all()
+
+
+def get_movie_rows_after(
+    db: Session,
+    movie_filters: schemas.MovieFilters,
+    after_key: Optional[Sequence[Any]],
+    limit: int,
+    fields: Sequence[str],
+) -> list[Row]:
+    movie_query = get_movies_after_query(
+        db, movie_filters, after_key, get_movie_row_fields(fields)
+    )
+    return movie_query.limit(limit).all()
@@ -0,0 +1,59 @@
+from typing import Any, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, contains_eager
+
+from app.db import models
+from app.db.crud.movies import MovieQuery
+
+
+def filter_top_movies(
+    movie_query: MovieQuery,
+    release_year: Optional[int],
+    after_key: Optional[Sequence[Any]],
+) -> MovieQuery:
+    # an index range scan of the leaderboard, no sorting whatever the catalog size
+    entry = models.LeaderboardEntry
+    movie_query = movie_query.join(entry.movie).options(contains_eager(entry.movie))
+    if release_year is not None:
+        movie_query = movie_query.filter(entry.release_year == release_year)
+    if after_key:
+        movie_query = movie_query.filter(
+            sa.tuple_(entry.weighted_score, entry.movie_id) < tuple(after_key)
+        )
+    return movie_query.order_by(entry.weighted_score.desc(), entry.movie_id.desc())
+
+
+def get_top_movies(
+    db: Session,
+    release_year: Optional[int],
+    after_key: Optional[Sequence[Any]],
+    limit: int,
+) -> list[models.LeaderboardEntry]:
+    movie_query = filter_top_movies(
+        db.query(models.LeaderboardEntry), release_year, after_key
+    )
+    return movie_query.limit(limit).all()
+
+
+def get_top_movie_key(entry: models.LeaderboardEntry) -> list[Any]:
+    return [entry.weighted_score, entry.movie_id]
+
+
+def get_trending_movies(
+    db: Session, after_key: Optional[Sequence[Any]], limit: int
+) -> list[models.Movie]:
+    # an index range scan of stored trending scores, their order is the same
+    # decayed to any time
+    movie = models.Movie
+    movie_query = db.query(movie).filter(movie.trending_score > 0)
+    if after_key:
+        movie_query = movie_query.filter(
+            sa.tuple_(movie.trending_score, movie.id) < tuple(after_key)
+        )
+    movie_query = movie_query.order_by(movie.trending_score.desc(), movie.id.desc())
+    return movie_query.limit(limit).all()
+
+
+def get_trending_movie_key(movie: models.Movie) -> list[Any]:
+    return [movie.trending_score, movie.id]
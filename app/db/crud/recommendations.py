@@ -0,0 +1,40 @@
+import sqlalchemy as sa
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.db import models
+
+
+def recommendations_query(user_id: int, limit: int) -> Select:
+    """Movies the user hasn't reviewed with the scores predicted for them.
+
+    A prediction is the mean of the user's scores weighted by similarities of
+    the reviewed movies to the movie. Only the stored neighbours of reviewed
+    movies are read, however many reviews there are overall.
+    """
+    review = models.Review
+    neighbour = models.MovieNeighbour
+    predicted_score = (
+        sa.func.sum(neighbour.similarity * review.score)
+        / sa.func.sum(neighbour.similarity)
+    ).label('predicted_score')
+    reviewed = sa.select(review.movie_id).where(review.user_id == user_id)
+    predictions = (
+        sa.select(neighbour.neighbour_id.label('movie_id'), predicted_score)
+        .join(review, review.movie_id == neighbour.movie_id)
+        .where(review.user_id == user_id, neighbour.neighbour_id.not_in(reviewed))
+        .group_by(neighbour.neighbour_id)
+        .order_by(predicted_score.desc(), neighbour.neighbour_id)
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        sa.select(models.Movie, predictions.c.predicted_score)
+        .join(predictions, predictions.c.movie_id == models.Movie.id)
+        .order_by(predictions.c.predicted_score.desc(), models.Movie.id)
+    )
+
+
+def get_recommendations(db: Session, user_id: int, limit: int) -> list[Row]:
+    return db.execute(recommendations_query(user_id, limit)).all()
@@ -0,0 +1,285 @@
+from datetime import datetime
+from typing import Any, Optional, Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import Insert, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy.sql import Select
+
+from app.db import models, schemas, trending, write_behind
+from app.db.crud.statistics import (
+    count_score,
+    get_movie_statistic_deltas,
+    new_movie_statistic_delta,
+    update_movie_statistic,
+    update_movie_statistics,
+)
+
+
+def new_review(
+    review: schemas.ReviewCreate, user_id: int, review_id: int, created_at: datetime
+) -> models.Review:
+    # what the database has for a just inserted review, without selecting it back
+    return models.Review(
+        id=review_id, **review.dict(), user_id=user_id, created_at=created_at
+    )
+
+
+def review_of_movie_statement(
+    review: schemas.ReviewCreate, user_id: int, created_at: datetime
+) -> Insert:
+    # nothing is inserted if the movie doesn't exist
+    return insert(models.Review).from_select(
+        ['user_id', 'movie_id', 'score', 'review_text', 'created_at'],
+        sa.select(
+            sa.literal(user_id),
+            sa.literal(review.movie_id),
+            sa.literal(review.score),
+            sa.literal(review.review_text, sa.Text),
+            sa.literal(created_at, sa.DateTime),
+        ).where(sa.exists().where(models.Movie.id == review.movie_id)),
+    )
+
+
+def add_review(
+    db: Session, review: schemas.ReviewCreate, user_id: int
+) -> Optional[models.Review]:
+    """Insert the review and update statistics of its movie in one transaction.
+
+    None if the movie doesn't exist. The movie is updated first, so its row is
+    written (and locked) from the start of the transaction. IntegrityError is
+    raised if the user has already reviewed the movie, nothing is changed then.
+    In the write-behind mode the statistic is updated by the buffer later.
+    """
+    buffer = write_behind.get_statistic_buffer()
+    created_at = trending.utc_now()
+    if buffer is None and not update_movie_statistic(db, review, created_at):
+        return None
+    try:
+        if buffer is None:
+            result = db.execute(
+                insert(models.Review).values(
+                    **review.dict(), user_id=user_id, created_at=created_at
+                )
+            )
+        else:
+            result = db.execute(review_of_movie_statement(review, user_id, created_at))
+            if not result.rowcount:
+                return None
+    except IntegrityError:
+        db.rollback()
+        raise
+    db.commit()
+    if buffer is not None:
+        buffer.add(get_movie_statistic_deltas([review], created_at))
+    return new_review(review, user_id, result.lastrowid, created_at)
+
+
+def add_reviews(
+    db: Session, reviews: Sequence[schemas.ReviewCreate], user_id: int
+) -> tuple[set[int], set[int]]:
+    """Insert reviews of the user and update statistics of their movies.
+
+    Returns positions of reviews of unknown movies and of already reviewed
+    ones (repeats in `reviews` included), they are skipped. It isn't committed,
+    so several calls can make one transaction.
+    """
+    movie_ids = {review.movie_id for review in reviews}
+    known = set(
+        db.execute(
+            sa.select(models.Movie.id).where(models.Movie.id.in_(movie_ids))
+        ).scalars()
+    )
+    reviewed = set(
+        db.execute(
+            sa.select(models.Review.movie_id).where(
+                models.Review.user_id == user_id, models.Review.movie_id.in_(known)
+            )
+        ).scalars()
+    )
+
+    unknown, duplicates = set(), set()
+    new_reviews = []
+    for position, review in enumerate(reviews):
+        if review.movie_id not in known:
+            unknown.add(position)
+        elif review.movie_id in reviewed:
+            duplicates.add(position)
+        else:
+            reviewed.add(review.movie_id)
+            new_reviews.append(review)
+
+    if new_reviews:
+        created_at = trending.utc_now()
+        db.execute(
+            insert(models.Review),
+            [
+                {**review.dict(), 'user_id': user_id, 'created_at': created_at}
+                for review in new_reviews
+            ],
+        )
+        update_movie_statistics(db, get_movie_statistic_deltas(new_reviews, created_at))
+    return unknown, duplicates
+
+
+def add_review_batches(
+    db: Session,
+    batches: Sequence[Sequence[schemas.ReviewCreate]],
+    user_id: int,
+    attempts: int = 3,
+) -> list[tuple[set[int], set[int]]]:
+    """add_reviews of every batch in one transaction, committed.
+
+    A movie reviewed by a concurrent request of the user after it was checked
+    fails the insert, then all batches are added again and the review is
+    reported as a duplicate. IntegrityError is raised after `attempts` tries.
+    """
+    attempt = 1
+    while True:
+        try:
+            results = [add_reviews(db, batch, user_id) for batch in batches]
+            db.commit()
+            return results
+        except IntegrityError:
+            db.rollback()
+            if attempt >= attempts:
+                raise
+            attempt += 1
+
+
+def select_review_statement(review_id: int, user_id: Optional[int]) -> Select:
+    # a review of the user, or any review without one (the admin panel)
+    review = models.Review
+    statement = sa.select(
+        review.id,
+        review.user_id,
+        review.movie_id,
+        review.score,
+        review.review_text,
+        review.created_at,
+    ).where(review.id == review_id)
+    if user_id is not None:
+        statement = statement.where(review.user_id == user_id)
+    return statement
+
+
+def review_change_statement(
+    review: Row, changes: Optional[dict[str, Any]]
+) -> Union[sa.sql.Update, sa.sql.Delete]:
+    """Apply `changes` to the review as it was read, delete it if they are None.
+
+    Nothing is changed if the review was changed since it was read, the delta
+    of its movie would be computed from stale values then.
+    """
+    filters = [
+        models.Review.id == review.id,
+        models.Review.score == review.score,
+        models.Review.review_text.is_(review.review_text),
+    ]
+    if changes is None:
+        return sa.delete(models.Review).where(*filters)
+    return sa.update(models.Review).where(*filters).values(**changes)
+
+
+def get_review_change_delta(
+    review: Row, changes: Optional[dict[str, Any]]
+) -> write_behind.Delta:
+    # the old score is taken off the movie, the new one is added to it; an edit
+    # keeps the time of the review, so its trending weight too
+    delta = new_movie_statistic_delta(review.movie_id)
+    count_score(delta, review.score, review.review_text, review.created_at, sign=-1)
+    if changes is not None:
+        changed = {**review._asdict(), **changes}
+        count_score(delta, changed['score'], changed['review_text'], review.created_at)
+    return delta
+
+
+def get_review_changes(review: schemas.ReviewUpdate) -> dict[str, Any]:
+    # fields that aren't sent are kept, a null score too
+    changes = review.dict(exclude_unset=True)
+    if changes.get('score', 0) is None:
+        del changes['score']
+    return changes
+
+
+def change_review(
+    db: Session,
+    review_id: int,
+    user_id: Optional[int],
+    changes: Optional[dict[str, Any]],
+    buffered: bool = True,
+) -> Optional[models.Review]:
+    """Change (or delete, if `changes` are None) a review and its movie statistic.
+
+    Both are written in one transaction, the movie is adjusted by the
+    difference of the scores, never recounted. Only reviews of `user_id` are
+    changed, unless it's None. Returns the changed (or deleted) review, None if
+    there is no such review, nothing is written without changes. In the
+    write-behind mode the statistic is updated by the buffer later, unless
+    `buffered` is false: processes that don't run the buffer (the admin)
+    write it at once.
+    """
+    buffer = write_behind.get_statistic_buffer() if buffered else None
+    while True:
+        review = db.execute(select_review_statement(review_id, user_id)).first()
+        if review is None:
+            return None
+        if changes == {}:
+            return models.Review(**review._asdict())
+        # the first write of the transaction, the review is locked from here
+        if db.execute(review_change_statement(review, changes)).rowcount:
+            break
+        db.rollback()
+    delta = get_review_change_delta(review, changes)
+    if buffer is None:
+        update_movie_statistics(db, [delta])
+    db.commit()
+    if buffer is not None:
+        buffer.add([delta])
+    return models.Review(**{**review._asdict(), **(changes or {})})
+
+
+def update_review(
+    db: Session, review_id: int, user_id: Optional[int], review: schemas.ReviewUpdate
+) -> Optional[models.Review]:
+    return change_review(db, review_id, user_id, get_review_changes(review))
+
+
+def delete_review(db: Session, review_id: int, user_id: Optional[int]) -> bool:
+    return change_review(db, review_id, user_id, None) is not None
+
+
+def get_reviews_query(
+    column: Any, value: int, after_key: Optional[Sequence[Any]]
+) -> Select:
+    """Reviews with `column` (movie_id or user_id) equal to `value`, newest first.
+
+    An index range scan of (movie_id, id) or (user_id, id) from `after_key`.
+    Relationships of reviews are never loaded, so a page is a single query.
+    """
+    review_query = (
+        sa.select(models.Review).options(raiseload('*')).where(column == value)
+    )
+    if after_key:
+        review_query = review_query.where(models.Review.id < after_key[0])
+    return review_query.order_by(models.Review.id.desc())
+
+
+def get_movie_reviews(
+    db: Session, movie_id: int, after_key: Optional[Sequence[Any]], limit: int
+) -> list[models.Review]:
+    review_query = get_reviews_query(models.Review.movie_id, movie_id, after_key)
+    return db.execute(review_query.limit(limit)).scalars().all()
+
+
+def get_user_reviews(
+    db: Session, user_id: int, after_key: Optional[Sequence[Any]], limit: int
+) -> list[models.Review]:
+    review_query = get_reviews_query(models.Review.user_id, user_id, after_key)
+    return db.execute(review_query.limit(limit)).scalars().all()
+
+
+def get_review_key(review: models.Review) -> list[Any]:
+    return [review.id]
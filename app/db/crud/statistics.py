@@ -0,0 +1,143 @@
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import Insert, insert
+from sqlalchemy.orm import Session
+
+from app.db import leaderboard, models, schemas, trending, write_behind
+
+
+def leaderboard_entries_statement(movie_ids: Iterable[int]) -> Insert:
+    # scores of the movies as they are in the database
+    movie = models.Movie
+    statement = insert(models.LeaderboardEntry).from_select(
+        ['movie_id', 'release_year', 'weighted_score'],
+        sa.select(
+            movie.id,
+            movie.release_year,
+            leaderboard.weighted_score(movie.score_sum, movie.score_number),
+        ).where(movie.id.in_(movie_ids), movie.score_number > 0),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[models.LeaderboardEntry.movie_id],
+        set_={'weighted_score': statement.excluded.weighted_score},
+    )
+
+
+# parameters of movie_statistic_statement adding to the histogram, by score
+HISTOGRAM_DELTA_KEYS = [f'new_{field}' for field in models.HISTOGRAM_FIELDS]
+
+
+def new_movie_statistic_delta(movie_id: int) -> write_behind.Delta:
+    return {
+        'movie_id': movie_id,
+        'new_sum': 0,
+        'new_scores': 0,
+        'new_texts': 0,
+        **dict.fromkeys(HISTOGRAM_DELTA_KEYS, 0),
+        'new_trending': 0.0,
+    }
+
+
+def count_score(
+    delta: write_behind.Delta,
+    score: int,
+    review_text: Optional[str],
+    created_at: Optional[datetime],
+    sign: int = 1,
+) -> None:
+    # a score added to the delta, or taken off it with sign=-1
+    delta['new_sum'] += sign * score
+    delta['new_scores'] += sign
+    delta['new_texts'] += sign * (review_text is not None)
+    delta[HISTOGRAM_DELTA_KEYS[score]] += sign
+    delta['new_trending'] += sign * trending.get_weight(created_at)
+
+
+def get_movie_statistic_deltas(
+    reviews: Iterable[schemas.ReviewCreate], created_at: datetime
+) -> list[write_behind.Delta]:
+    # parameters of movie_statistic_statement, one set per movie
+    deltas: dict[int, write_behind.Delta] = {}
+    for review in reviews:
+        delta = deltas.get(review.movie_id)
+        if delta is None:
+            delta = deltas[review.movie_id] = new_movie_statistic_delta(review.movie_id)
+        count_score(delta, review.score, review.review_text, created_at)
+    return list(deltas.values())
+
+
+def movie_statistic_statement() -> sa.sql.Update:
+    """Add scores to the statistic of a movie in place, by the database.
+
+    Parameters are `movie_id`, the sum of the new scores (`new_sum`), the
+    number of them (`new_scores`) and the number of them with texts
+    (`new_texts`), the number of the new scores of each value for the
+    histogram (HISTOGRAM_DELTA_KEYS) and the weight of the reviews added to
+    the trending score (`new_trending`), all negative for removed scores.
+    Concurrent writers can't lose each other's increments, and the average is
+    recomputed from the integer sum, so it doesn't drift. The SET expressions
+    see the values from before the update.
+    """
+    movie = models.Movie.__table__
+    score_sum = movie.c.score_sum + sa.bindparam('new_sum')
+    score_number = movie.c.score_number + sa.bindparam('new_scores')
+    return (
+        sa.update(movie)
+        .where(movie.c.id == sa.bindparam('movie_id'))
+        .values(
+            avg_score=sa.case(
+                (score_number > 0, sa.cast(score_sum, sa.Float) / score_number),
+                else_=0.0,
+            ),
+            score_sum=score_sum,
+            score_number=score_number,
+            review_number=movie.c.review_number + sa.bindparam('new_texts'),
+            **{
+                field: movie.c[field] + sa.bindparam(key)
+                for field, key in zip(models.HISTOGRAM_FIELDS, HISTOGRAM_DELTA_KEYS)
+            },
+            # weights are huge floats, removing them all may leave a residue
+            trending_score=sa.case(
+                (
+                    score_number > 0,
+                    movie.c.trending_score + sa.bindparam('new_trending'),
+                ),
+                else_=0.0,
+            ),
+        )
+    )
+
+
+def unscored_leaderboard_entries_statement(movie_ids: Iterable[int]) -> sa.sql.Delete:
+    # entries of the movies whose last scores were removed
+    entry = models.LeaderboardEntry.__table__
+    movie = models.Movie.__table__
+    return sa.delete(entry).where(
+        entry.c.movie_id.in_(
+            sa.select(movie.c.id).where(
+                movie.c.id.in_(movie_ids), movie.c.score_number <= 0
+            )
+        )
+    )
+
+
+def update_movie_statistics(db: Session, deltas: Sequence[write_behind.Delta]) -> None:
+    # one update per movie however many of its reviews there are
+    db.execute(movie_statistic_statement(), deltas)
+    movie_ids = [delta['movie_id'] for delta in deltas]
+    db.execute(leaderboard_entries_statement(movie_ids))
+    if any(delta['new_scores'] < 0 for delta in deltas):
+        db.execute(unscored_leaderboard_entries_statement(movie_ids))
+
+
+def update_movie_statistic(
+    db: Session, review: schemas.ReviewCreate, created_at: datetime
+) -> bool:
+    # whether the movie exists, it's found by the update itself
+    delta = get_movie_statistic_deltas([review], created_at)[0]
+    if not db.execute(movie_statistic_statement(), delta).rowcount:
+        return False
+    db.execute(leaderboard_entries_statement([review.movie_id]))
+    return True
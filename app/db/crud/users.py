@@ -0,0 +1,34 @@
+from typing import Optional, Sequence
+
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.db import models, schemas
+from app.db.crud.columns import get_columns
+from app.hashing import hash_password
+
+
+def get_user(db: Session, user_id: int) -> Optional[models.User]:
+    return db.query(models.User).filter(models.User.id == user_id).first()
+
+
+def get_user_row(db: Session, user_id: int, fields: Sequence[str]) -> Optional[Row]:
+    return (
+        db.query(*get_columns(models.User, fields))
+        .filter(models.User.id == user_id)
+        .first()
+    )
+
+
+def get_user_by_login(db: Session, login: str) -> Optional[models.User]:
+    return db.query(models.User).filter(models.User.login == login).first()
+
+
+def create_user(db: Session, user: schemas.UserCreate) -> models.User:
+    db_user = models.User(
+        login=user.login, hashed_password=hash_password(user.password)
+    )
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
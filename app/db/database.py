@@ -1,19 +1,177 @@
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+import logging
+from functools import lru_cache
+from typing import Any, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.config import get_settings
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
+PragmaValue = Union[str, int]
+
+# Named sets of pragmas applied to every new SQLite connection.
+# WAL lets readers proceed while a writer holds the database,
+# synchronous=NORMAL is durable enough in WAL mode and saves an fsync per commit.
+SQLITE_PRAGMA_PROFILES: dict[str, dict[str, PragmaValue]] = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,  # negative means KiB, i.e. 64 MiB
+        'mmap_size': 268435456,  # 256 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,  # ms
+    },
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+}
+
+# sqlite reports these pragmas as numbers
+_PRAGMA_VALUE_CODES: dict[str, dict[str, int]] = {
+    'synchronous': {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3},
+    'temp_store': {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2},
+}
+
+
+def get_pragma_profile(name: str) -> dict[str, PragmaValue]:
+    try:
+        return SQLITE_PRAGMA_PROFILES[name]
+    except KeyError as err:
+        raise ValueError(f'Unknown SQLite pragma profile "{name}"') from err
+
+
+def set_sqlite_pragmas(dbapi_connection: Any, pragmas: dict[str, PragmaValue]) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    finally:
+        cursor.close()
+
+
+def get_sqlite_pragmas(engine: Engine, pragmas: list[str]) -> dict[str, PragmaValue]:
+    with engine.connect() as connection:
+        return {
+            pragma: connection.exec_driver_sql(f'PRAGMA {pragma}').scalar()
+            for pragma in pragmas
+        }
+
+
+def _normalize_pragma_value(pragma: str, value: PragmaValue) -> PragmaValue:
+    if isinstance(value, str):
+        return _PRAGMA_VALUE_CODES.get(pragma, {}).get(value.upper(), value.lower())
+    return value
+
+
+def check_sqlite_pragmas() -> dict[str, PragmaValue]:
+    """Log the pragmas in effect and warn about the ones sqlite didn't accept."""
+    engine = get_engine()
+    if engine.dialect.name != 'sqlite':
+        return {}
+
+    expected = get_pragma_profile(get_settings().SQLITE_PRAGMA_PROFILE)
+    actual = get_sqlite_pragmas(engine, list(expected))
+    logger.info('SQLite pragmas in effect: %s', actual)
+    for pragma, value in expected.items():
+        if _normalize_pragma_value(pragma, value) != _normalize_pragma_value(
+            pragma, actual[pragma]
+        ):
+            logger.warning(
+                'SQLite pragma %s is %s instead of %s', pragma, actual[pragma], value
+            )
+    return actual
+
 
+def _listen_sqlite_pragmas(engine: Engine) -> None:
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = get_pragma_profile(get_settings().SQLITE_PRAGMA_PROFILE)
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection: Any, _: Any) -> None:
+        set_sqlite_pragmas(dbapi_connection, pragmas)
+
+
+@lru_cache(maxsize=None)
 def get_engine() -> Engine:
-    return create_engine(
-        get_settings().SQLALCHEMY_DATABASE_URI,
+    # one engine (and so one connection pool) per process, built on first use
+    settings = get_settings()
+    engine = create_engine(
+        settings.SQLALCHEMY_DATABASE_URI,
         connect_args={'check_same_thread': False},
+        # pysqlite uses NullPool for file databases by default,
+        # which means a fresh connection for every session
+        poolclass=QueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    _listen_sqlite_pragmas(engine)
+    return engine
+
+
+def get_async_database_uri() -> str:
+    settings = get_settings()
+    if settings.ASYNC_SQLALCHEMY_DATABASE_URI:
+        return settings.ASYNC_SQLALCHEMY_DATABASE_URI
+
+    url = make_url(settings.SQLALCHEMY_DATABASE_URI)
+    if url.get_backend_name() == 'sqlite':
+        url = url.set(drivername='sqlite+aiosqlite')
+    return str(url)
+
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    settings = get_settings()
+    engine = create_async_engine(
+        get_async_database_uri(),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
     )
+    _listen_sqlite_pragmas(engine.sync_engine)
+    return engine
 
 
+@lru_cache(maxsize=None)
 def get_session() -> sessionmaker:
     return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+def dispose_engine() -> None:
+    # close pooled connections (e.g. inherited from a parent process before fork)
+    # without building an engine if nobody has used it yet
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+
+
+@lru_cache(maxsize=None)
+def get_async_session() -> sessionmaker:
+    # objects must stay usable after commit, lazy loading isn't possible in async code
+    return sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        bind=get_async_engine(),
+        class_=AsyncSession,
+    )
+
+
+async def dispose_async_engine() -> None:
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
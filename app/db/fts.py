@@ -0,0 +1,76 @@
+import re
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.elements import ColumnElement
+
+# SQLite FTS5 index over movie titles. It's an external content table, so titles
+# are stored only in `movies`, and triggers keep the index in sync with every
+# insert (from the API or the admin panel), update and delete.
+movies_fts = sa.table(
+    'movies_fts',
+    sa.column('rowid', sa.Integer),
+    sa.column('movies_fts'),  # the hidden column named as the table is for MATCH
+    sa.column('rank', sa.Float),  # bm25, the lower the more relevant
+)
+
+CREATE_MOVIES_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts
+    USING fts5(title, content='movies', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title)
+        VALUES ('delete', old.id, old.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE OF title ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title)
+        VALUES ('delete', old.id, old.title);
+        INSERT INTO movies_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+]
+
+
+def create_movies_fts(_: Any, connection: Connection, **__: Any) -> None:
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in CREATE_MOVIES_FTS:
+        connection.exec_driver_sql(statement)
+
+
+def drop_movies_fts(_: Any, connection: Connection, **__: Any) -> None:
+    if connection.dialect.name != 'sqlite':
+        return
+    connection.exec_driver_sql('DROP TABLE IF EXISTS movies_fts')
+
+
+def rebuild_movies_fts(engine: Engine) -> None:
+    # (re)index titles of a database created before the index existed
+    with engine.begin() as connection:
+        create_movies_fts(None, connection)
+        connection.exec_driver_sql(
+            "INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')"
+        )
+
+
+def get_title_match_query(text: str) -> str:
+    """FTS5 query matching titles with words starting with every word of `text`.
+
+    Each word is quoted, so FTS5 operators in the user input are taken literally.
+    Returns an empty string when `text` has no words to search by.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def title_matches(match_query: str) -> ColumnElement:
+    return movies_fts.c.movies_fts.op('MATCH')(match_query)
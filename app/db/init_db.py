@@ -1,6 +1,105 @@
-from app.db import models
+import logging
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.db import fts, models
 from app.db.database import get_engine
 
+logger = logging.getLogger(__name__)
+
+
+def get_index_names(engine: Engine) -> set[str]:
+    # the inspector doesn't report expression indexes of sqlite
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+        return set(result.scalars())
+
+
+# score_sum of databases created before it, the closest sum to the averages
+ADD_SCORE_SUM = [
+    'ALTER TABLE movies ADD COLUMN score_sum INTEGER NOT NULL DEFAULT 0',
+    'UPDATE movies SET score_sum = CAST(round(avg_score * score_number) AS INTEGER)',
+]
+# the histogram of databases created before it, counted from the reviews
+ADD_HISTOGRAM = [
+    *(
+        f'ALTER TABLE movies ADD COLUMN {field} INTEGER NOT NULL DEFAULT 0'
+        for field in models.HISTOGRAM_FIELDS
+    ),
+    'UPDATE movies SET '
+    + ', '.join(f'{field} = counted.{field}' for field in models.HISTOGRAM_FIELDS)
+    + ' FROM (SELECT movie_id, '
+    + ', '.join(
+        f'sum(score = {score}) AS {models.get_histogram_field(score)}'
+        for score in models.SCORES
+    )
+    + ' FROM reviews GROUP BY movie_id) AS counted'
+    ' WHERE counted.movie_id = movies.id',
+]
+# trending scores of databases created before them, see backfill_trending.py
+ADD_TRENDING_SCORE = [
+    'ALTER TABLE movies ADD COLUMN trending_score FLOAT NOT NULL DEFAULT 0',
+]
+# times of reviews written before they were kept are unknown and left NULL
+ADD_CREATED_AT = [
+    'ALTER TABLE reviews ADD COLUMN created_at DATETIME',
+]
+# columns added to tables later, by the first column of each upgrade
+COLUMN_UPGRADES = [
+    ('movies', 'score_sum', ADD_SCORE_SUM),
+    ('movies', models.HISTOGRAM_FIELDS[0], ADD_HISTOGRAM),
+    ('movies', 'trending_score', ADD_TRENDING_SCORE),
+    ('reviews', 'created_at', ADD_CREATED_AT),
+]
+
+
+def add_columns(engine: Engine) -> None:
+    # before create_all, the leaderboard is seeded from score_sum
+    inspector = sa.inspect(engine)
+    columns = {
+        table: {column['name'] for column in inspector.get_columns(table)}
+        for table in {table for table, _, _ in COLUMN_UPGRADES}
+        if inspector.has_table(table)
+    }
+    with engine.begin() as connection:
+        for table, column, statements in COLUMN_UPGRADES:
+            if table not in columns or column in columns[table]:
+                continue
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+
+
+def upgrade_db(engine: Engine) -> None:
+    # create_all skips tables that exist, so indexes added to them later
+    # have to be built separately
+    index_names = get_index_names(engine)
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in index_names:
+                continue
+            try:
+                index.create(bind=engine)
+            except IntegrityError:
+                logger.error(
+                    'Index %s is not created, %s has duplicate values',
+                    index.name,
+                    table.name,
+                )
+
 
 def init_db() -> None:
-    models.Base.metadata.create_all(bind=get_engine())
+    engine = get_engine()
+    # the title index is made by create_all, empty, in databases created before it
+    inspector = sa.inspect(engine)
+    index_titles = inspector.has_table('movies') and not inspector.has_table(
+        'movies_fts'
+    )
+    add_columns(engine)
+    models.Base.metadata.create_all(bind=engine)
+    upgrade_db(engine)
+    if index_titles:
+        fts.rebuild_movies_fts(engine)
@@ -0,0 +1,70 @@
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import get_settings
+
+# Movies ranked by an IMDb-style weighted score, the average pulled towards a
+# prior score the less reviews a movie has:
+#
+#     (score_sum + m * c) / (score_number + m)
+#
+# Rows are upserted by crud whenever the statistic of a movie changes, so the
+# top is read from an index instead of sorting the catalog. Triggers follow
+# changes of release years and deletes made outside of crud (the admin panel).
+CREATE_LEADERBOARD = [
+    """
+    CREATE TRIGGER IF NOT EXISTS leaderboard_movies_au
+    AFTER UPDATE OF release_year ON movies BEGIN
+        UPDATE leaderboard SET release_year = new.release_year
+        WHERE movie_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS leaderboard_movies_ad AFTER DELETE ON movies BEGIN
+        DELETE FROM leaderboard WHERE movie_id = old.id;
+    END
+    """,
+]
+
+# reviewed movies missing from the leaderboard, parameters are (m, c, m)
+SEED_LEADERBOARD = """
+    INSERT OR IGNORE INTO leaderboard (movie_id, release_year, weighted_score)
+    SELECT id, release_year, (score_sum + ? * ?) / (score_number + ?)
+    FROM movies WHERE score_number > 0
+"""
+
+
+@lru_cache(maxsize=None)
+def get_prior() -> tuple[int, float]:
+    settings = get_settings()
+    return settings.LEADERBOARD_MIN_VOTES, settings.LEADERBOARD_PRIOR_SCORE
+
+
+def weighted_score(score_sum: Any, score_number: Any) -> Any:
+    # works for numbers as well as for columns
+    min_votes, prior_score = get_prior()
+    return (score_sum + min_votes * prior_score) / (score_number + min_votes)
+
+
+def seed_leaderboard(connection: Connection) -> None:
+    min_votes, prior_score = get_prior()
+    connection.exec_driver_sql(
+        SEED_LEADERBOARD, (min_votes, float(prior_score), min_votes)
+    )
+
+
+def create_leaderboard(_: Any, connection: Connection, **__: Any) -> None:
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in CREATE_LEADERBOARD:
+        connection.exec_driver_sql(statement)
+    seed_leaderboard(connection)
+
+
+def rebuild_leaderboard(engine: Engine) -> None:
+    # recompute every score, e.g. after LEADERBOARD_* settings are changed
+    with engine.begin() as connection:
+        connection.exec_driver_sql('DELETE FROM leaderboard')
+        create_leaderboard(None, connection)
@@ -1,12 +1,44 @@
-from typing import Optional
+import string
+from typing import Any
 
 import sqlalchemy as sa
 from sqlalchemy.orm import relationship
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from app.config import get_settings
+
+from . import counters, fts, leaderboard
 from .database import Base
 
 
+def normalize_title(title: Any) -> sa.sql.ColumnElement:
+    # it's computed by the database so lookups use the same rules as the index
+    return sa.func.lower(sa.func.trim(title))
+
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def get_normalized_title(title: str) -> str:
+    # normalize_title done in Python, sqlite trims spaces and lowers ASCII only
+    return title.strip(' ').translate(_ASCII_LOWER)
+
+
+# scores of reviews are 0-10, movies count the scores of each value
+SCORES = range(11)
+
+
+def get_histogram_field(score: int) -> str:
+    return f'score_{score}_number'
+
+
+HISTOGRAM_FIELDS = [get_histogram_field(score) for score in SCORES]
+
+
+def histogram_column() -> sa.Column:
+    return sa.Column(sa.Integer, default=0, server_default='0', nullable=False)
+
+
 class User(Base):
     __tablename__ = 'users'
 
@@ -20,7 +52,9 @@ class User(Base):
         return f'<User "{self.login}">'
 
     def set_hashed_password(self, password: str) -> None:
-        self.hashed_password = generate_password_hash(password)
+        self.hashed_password = generate_password_hash(
+            password, method=get_settings().PASSWORD_HASH_METHOD
+        )
 
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.hashed_password, password)
@@ -33,10 +67,28 @@ class Movie(Base):
     title = sa.Column(sa.String, nullable=False)
     release_year = sa.Column(sa.Integer, nullable=False)
 
-    # review statistic
+    # review statistic, kept up to date by the database (see crud.add_review);
+    # avg_score is score_sum / score_number, stored for the indexes below
     avg_score = sa.Column(sa.Float, default=0.0, nullable=False)
+    score_sum = sa.Column(sa.Integer, default=0, server_default='0', nullable=False)
     score_number = sa.Column(sa.Integer, default=0, nullable=False)
     review_number = sa.Column(sa.Integer, default=0, nullable=False)
+    # the histogram of scores, see HISTOGRAM_FIELDS
+    score_0_number = histogram_column()
+    score_1_number = histogram_column()
+    score_2_number = histogram_column()
+    score_3_number = histogram_column()
+    score_4_number = histogram_column()
+    score_5_number = histogram_column()
+    score_6_number = histogram_column()
+    score_7_number = histogram_column()
+    score_8_number = histogram_column()
+    score_9_number = histogram_column()
+    score_10_number = histogram_column()
+    # reviews decayed by age, stored as of TRENDING_EPOCH, see app.db.trending
+    trending_score = sa.Column(
+        sa.Float, default=0.0, server_default='0', nullable=False
+    )
 
     reviews = relationship('Review', back_populates='movie', uselist=True)
 
@@ -44,20 +96,19 @@ class Movie(Base):
         # The first widely known movie «L'Arrivée d'un train en gare de la Ciotat»
         # was released at 1895
         sa.CheckConstraint('release_year >= 1895'),
+        # titles are unique regardless of case and surrounding spaces
+        sa.Index('uq_movies_normalized_title', normalize_title(title), unique=True),
+        # filter by year, optionally sorted by score (see crud.filter_movies)
+        sa.Index('ix_movies_release_year_avg_score', release_year, avg_score, id),
+        # sort of the whole catalog by score
+        sa.Index('ix_movies_avg_score', avg_score, id),
+        # GET /movies/trending (see crud.get_trending_movies)
+        sa.Index('ix_movies_trending_score', trending_score, id),
     )
 
     def __repr__(self) -> str:
         return f'<Movie "{self.title}">'
 
-    def update_avg_score(self, new_score: int) -> None:
-        old_score_sum = self.avg_score * self.score_number
-        self.score_number += 1
-        self.avg_score = (old_score_sum + new_score) / self.score_number
-
-    def update_review_number(self, review_text: Optional[str]) -> None:
-        if review_text is not None:
-            self.review_number += 1
-
 
 class Review(Base):
     __tablename__ = 'reviews'
@@ -68,6 +119,9 @@ class Review(Base):
 
     score = sa.Column(sa.SmallInteger, nullable=False)
     review_text = sa.Column(sa.Text, nullable=True)
+    # UTC, set by crud along with the trending score it adds to the movie;
+    # NULL for reviews written before times were kept (see init_db)
+    created_at = sa.Column(sa.DateTime, nullable=True)
 
     user = relationship('User', back_populates='reviews', uselist=False)
     movie = relationship('Movie', back_populates='reviews', uselist=False)
@@ -78,4 +132,65 @@ class Review(Base):
     __table_args__ = (
         sa.CheckConstraint('0 <= score AND score <= 10'),
         sa.UniqueConstraint('user_id', 'movie_id'),
+        # reviews of a movie or of a user by id (see crud.get_reviews_query)
+        sa.Index('ix_reviews_movie_id_id', 'movie_id', 'id'),
+        sa.Index('ix_reviews_user_id_id', 'user_id', 'id'),
     )
+
+
+class Counter(Base):
+    __tablename__ = 'counters'
+
+    # maintained by triggers, see app.db.counters
+    name = sa.Column(sa.String, primary_key=True)
+    value = sa.Column(sa.Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return f'<Counter "{self.name}" = {self.value}>'
+
+
+class LeaderboardEntry(Base):
+    __tablename__ = 'leaderboard'
+
+    # reviewed movies by weighted score, see app.db.leaderboard
+    movie_id = sa.Column(sa.Integer, sa.ForeignKey(Movie.id), primary_key=True)
+    release_year = sa.Column(sa.Integer, nullable=False)
+    weighted_score = sa.Column(sa.Float, nullable=False)
+
+    movie = relationship('Movie', uselist=False)
+
+    __table_args__ = (
+        sa.Index('ix_leaderboard_weighted_score', weighted_score, movie_id),
+        sa.Index(
+            'ix_leaderboard_release_year_weighted_score',
+            release_year,
+            weighted_score,
+            movie_id,
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f'<LeaderboardEntry {self.movie_id} = {self.weighted_score}>'
+
+
+class MovieNeighbour(Base):
+    __tablename__ = 'movie_neighbours'
+
+    # the most similar movies of each movie by their reviews, built offline,
+    # see app.db.recommendations
+    movie_id = sa.Column(sa.Integer, primary_key=True)
+    neighbour_id = sa.Column(sa.Integer, primary_key=True)
+    similarity = sa.Column(sa.Float, nullable=False)
+
+    # rows are stored in the primary key, neighbours of a movie are adjacent
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    def __repr__(self) -> str:
+        return f'<MovieNeighbour {self.movie_id} ~ {self.neighbour_id}>'
+
+
+# full-text index of movie titles, see app.db.fts
+sa.event.listen(Base.metadata, 'after_create', fts.create_movies_fts)
+sa.event.listen(Base.metadata, 'before_drop', fts.drop_movies_fts)
+sa.event.listen(Base.metadata, 'after_create', counters.create_counters)
+sa.event.listen(Base.metadata, 'after_create', leaderboard.create_leaderboard)
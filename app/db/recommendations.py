@@ -0,0 +1,181 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Item-based collaborative filtering. Reviews are loaded into a sparse
+# users x movies matrix of scores with columns scaled to unit length, so the
+# product of two columns is the cosine similarity of their movies. Blocks of
+# movies are multiplied by the whole matrix in worker processes, and the k
+# most similar movies of each are stored in movie_neighbours. Recommendations
+# are read from there only (see crud.recommendations_query).
+#
+# With adjusted cosine, scores are centered on the mean score of their users
+# first, so users who score everything high (or low) don't make movies alike.
+
+SELECT_REVIEWS = """
+    SELECT user_id, movie_id, score FROM reviews
+    WHERE user_id IS NOT NULL AND movie_id IS NOT NULL
+"""
+INSERT_NEIGHBOURS = """
+    INSERT INTO movie_neighbours (movie_id, neighbour_id, similarity)
+    VALUES (?, ?, ?)
+"""
+
+# the matrices of a worker process, set once rather than sent with every block
+_matrices: dict[str, sparse.csr_matrix] = {}
+
+
+class NeighbourOptions(NamedTuple):
+    # neighbours kept per movie
+    k: int = 50
+    # adjusted cosine similarity rather than the plain one
+    adjusted: bool = True
+    # processes computing similarities, the number of CPUs if None
+    workers: Optional[int] = None
+    # movies multiplied by the matrix at a time
+    block_size: int = 256
+    # rows read or written at a time
+    chunk_size: int = 100000
+
+
+class NeighbourBuild(NamedTuple):
+    movies: int
+    neighbours: int
+
+
+def load_reviews(engine: Engine, chunk_size: int) -> np.ndarray:
+    # (user_id, movie_id, score) rows, plain tuples of the driver's cursor
+    chunks = []
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(SELECT_REVIEWS)
+        while rows := cursor.fetchmany(chunk_size):
+            chunks.append(np.array(rows, dtype=np.int64))
+    finally:
+        connection.close()
+    if not chunks:
+        return np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+def get_score_matrix(reviews: np.ndarray, adjusted: bool) -> sparse.csr_matrix:
+    """Users x movies (by ids) scores with columns of unit length."""
+    user_ids, movie_ids, scores = reviews.T
+    values = scores.astype(np.float64)
+    if adjusted:
+        score_sums = np.bincount(user_ids, weights=values)
+        score_numbers = np.bincount(user_ids)
+        values -= (score_sums / np.maximum(score_numbers, 1))[user_ids]
+    norms = np.sqrt(np.bincount(movie_ids, weights=values**2))
+    # movies scored only with the means of their users are similar to none
+    values = np.divide(
+        values, norms[movie_ids], out=np.zeros_like(values), where=norms[movie_ids] > 0
+    )
+    shape = (user_ids.max() + 1, movie_ids.max() + 1)
+    return sparse.csr_matrix((values, (user_ids, movie_ids)), shape=shape)
+
+
+def set_matrices(by_movie: sparse.csr_matrix, by_user: sparse.csr_matrix) -> None:
+    _matrices['by_movie'] = by_movie
+    _matrices['by_user'] = by_user
+
+
+def get_block_neighbours(
+    first_id: int, last_id: int, k: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The k nearest neighbours of movies with ids in [first_id, last_id).
+
+    Run in worker processes with the matrices set by set_matrices.
+    """
+    similarities = (
+        _matrices['by_movie'][first_id:last_id] @ _matrices['by_user']
+    ).tocsr()
+    movie_ids, neighbour_ids, values = [], [], []
+    for row in range(similarities.shape[0]):
+        start, end = similarities.indptr[row], similarities.indptr[row + 1]
+        row_ids = similarities.indices[start:end]
+        row_values = similarities.data[start:end]
+        # the movie itself and dissimilar ones aren't neighbours
+        keep = (row_ids != first_id + row) & (row_values > 0)
+        row_ids, row_values = row_ids[keep], row_values[keep]
+        if row_values.size > k:
+            top = np.argpartition(-row_values, k - 1)[:k]
+            row_ids, row_values = row_ids[top], row_values[top]
+        movie_ids.append(np.full(row_ids.size, first_id + row, dtype=np.int64))
+        neighbour_ids.append(row_ids.astype(np.int64))
+        values.append(row_values)
+    if not movie_ids:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float64)
+    return (
+        np.concatenate(movie_ids),
+        np.concatenate(neighbour_ids),
+        np.concatenate(values),
+    )
+
+
+def iter_neighbours(
+    score_matrix: sparse.csr_matrix, k: int, workers: int, block_size: int
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    by_movie = score_matrix.T.tocsr()
+    by_user = score_matrix.tocsc()
+    movie_number = score_matrix.shape[1]
+    blocks = [
+        (first_id, min(first_id + block_size, movie_number))
+        for first_id in range(0, movie_number, block_size)
+    ]
+    if workers <= 1:
+        set_matrices(by_movie, by_user)
+        try:
+            for first_id, last_id in blocks:
+                yield get_block_neighbours(first_id, last_id, k)
+        finally:
+            _matrices.clear()
+        return
+    # spawned workers get the matrices once, then only ranges of ids
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=set_matrices,
+        initargs=(by_movie, by_user),
+    ) as executor:
+        yield from executor.map(get_block_neighbours, *zip(*blocks), [k] * len(blocks))
+
+
+def build_neighbours(
+    engine: Engine, options: NeighbourOptions = NeighbourOptions()
+) -> NeighbourBuild:
+    """Replace movie_neighbours with the `k` most similar movies of each movie.
+
+    Similarities are computed before the table is written, then it's replaced
+    in one short transaction: readers see either the old neighbours or the new
+    ones, and writers of reviews aren't locked out meanwhile.
+    """
+    k, adjusted, workers, block_size, chunk_size = options
+    workers = workers or multiprocessing.cpu_count()
+    reviews = load_reviews(engine, chunk_size)
+    blocks = []
+    if reviews.size:
+        score_matrix = get_score_matrix(reviews, adjusted)
+        # arrays are kept rather than rows, a few bytes per neighbour
+        blocks = list(iter_neighbours(score_matrix, k, workers, block_size))
+    movies = sum(np.unique(movie_ids).size for movie_ids, _, _ in blocks)
+    columns = [np.concatenate(arrays) for arrays in zip(*blocks)]
+    neighbours = columns[0].size if columns else 0
+    with engine.begin() as connection:
+        connection.exec_driver_sql('DELETE FROM movie_neighbours')
+        for start in range(0, neighbours, chunk_size):
+            rows = zip(
+                *(column[start : start + chunk_size].tolist() for column in columns)
+            )
+            connection.exec_driver_sql(INSERT_NEIGHBOURS, list(rows))
+    logger.info('Stored %d neighbours of %d movies', neighbours, movies)
+    return NeighbourBuild(movies=movies, neighbours=neighbours)
@@ -0,0 +1,190 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from app.db.leaderboard import rebuild_leaderboard
+from app.db.models import HISTOGRAM_FIELDS, SCORES
+
+logger = logging.getLogger(__name__)
+
+# Statistics of movies are updated incrementally, so whatever bypasses crud
+# (direct database edits, lost write-behind scores) makes them drift from the
+# reviews. Here they are recomputed from scratch: the reviews are split into
+# ranges of ids counted by worker processes chunk by chunk with bincount,
+# then movies are compared with the totals chunk by chunk as well. Memory is
+# bounded by the chunk size and the number of movies, not of reviews.
+#
+# Scores written while it runs may be reported as drift, so it's meant to be
+# run while reviews aren't added (and with the write-behind buffer flushed).
+# A fix is applied only if the movie hasn't changed since it was compared.
+
+# rows of the totals, columns are movie ids, the histogram follows the rest
+SCORE_SUM, SCORE_NUMBER, REVIEW_NUMBER = range(3)
+HISTOGRAM = slice(3, 3 + len(SCORES))
+TOTALS = HISTOGRAM.stop
+COUNTED_FIELDS = ['score_sum', 'score_number', 'review_number', *HISTOGRAM_FIELDS]
+
+SELECT_REVIEWS = """
+    SELECT movie_id, score, review_text IS NOT NULL FROM reviews
+    WHERE id > ? AND id <= ? AND movie_id >= 0 AND movie_id < ?
+"""
+SELECT_MOVIES = f"""
+    SELECT id, avg_score, {', '.join(COUNTED_FIELDS)} FROM movies
+    WHERE id > ? ORDER BY id LIMIT ?
+"""
+UPDATE_MOVIE = f"""
+    UPDATE movies
+    SET avg_score = ?, {', '.join(f'{field} = ?' for field in COUNTED_FIELDS)}
+    WHERE id = ? AND {' AND '.join(f'{field} = ?' for field in COUNTED_FIELDS)}
+"""
+
+
+class Reconciliation(NamedTuple):
+    checked: int
+    # ids of movies whose statistics differ from their reviews
+    drifted: list[int]
+    fixed: int
+
+
+def split_ids(first_id: int, last_id: int, parts: int) -> list[tuple[int, int]]:
+    # ranges (after, up to] of about the same size
+    bounds = np.linspace(first_id - 1, last_id, parts + 1).round().astype(int)
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+
+
+def count_reviews(
+    url: str, after_id: int, last_id: int, size: int, chunk_size: int
+) -> np.ndarray:
+    """Totals of the reviews with ids in (after_id, last_id] by their movies.
+
+    Run in worker processes, so it connects by itself.
+    """
+    engine = create_engine(url)
+    totals = np.zeros((TOTALS, size), dtype=np.int64)
+    # plain tuples of the driver's cursor, rows of SQLAlchemy cost more than counting
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(SELECT_REVIEWS, (after_id, last_id, size))
+        while rows := cursor.fetchmany(chunk_size):
+            chunk = np.array(rows, dtype=np.int64)
+            movie_ids = chunk[:, 0]
+            totals[SCORE_SUM] += np.bincount(
+                movie_ids, weights=chunk[:, 1], minlength=size
+            ).astype(np.int64)
+            totals[SCORE_NUMBER] += np.bincount(movie_ids, minlength=size)
+            totals[REVIEW_NUMBER] += np.bincount(
+                movie_ids, weights=chunk[:, 2], minlength=size
+            ).astype(np.int64)
+            # scores of each movie, counted at once by (movie, score) pairs
+            totals[HISTOGRAM] += (
+                np.bincount(
+                    movie_ids * len(SCORES) + chunk[:, 1], minlength=size * len(SCORES)
+                )
+                .reshape(size, len(SCORES))
+                .T
+            )
+    finally:
+        connection.close()
+        engine.dispose()
+    return totals
+
+
+def get_review_totals(
+    engine: Engine, size: int, workers: int, chunk_size: int
+) -> np.ndarray:
+    with engine.connect() as connection:
+        first_id, last_id = connection.exec_driver_sql(
+            'SELECT min(id), max(id) FROM reviews'
+        ).one()
+    totals = np.zeros((TOTALS, size), dtype=np.int64)
+    if first_id is None:
+        return totals
+
+    url = engine.url.render_as_string(hide_password=False)
+    ranges = split_ids(first_id, last_id, workers)
+    args = [(url, after_id, up_to, size, chunk_size) for after_id, up_to in ranges]
+    if workers <= 1:
+        for task in args:
+            totals += count_reviews(*task)
+        return totals
+    # spawned workers don't inherit the engine and open connections of the parent
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+    ) as executor:
+        for range_totals in executor.map(count_reviews, *zip(*args)):
+            totals += range_totals
+    return totals
+
+
+def get_averages(score_sums: np.ndarray, score_numbers: np.ndarray) -> np.ndarray:
+    # as computed by crud.movie_statistic_statement, 0 without scores
+    averages = np.zeros(score_sums.shape, dtype=np.float64)
+    np.divide(score_sums, score_numbers, out=averages, where=score_numbers > 0)
+    return averages
+
+
+def reconcile_statistics(
+    engine: Engine,
+    fix: bool = False,
+    workers: Optional[int] = None,
+    chunk_size: int = 100000,
+) -> Reconciliation:
+    """Compare statistics of all movies with their reviews, optionally fix them.
+
+    `workers` processes count the reviews, the number of CPUs by default.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    with engine.connect() as connection:
+        last_movie_id = connection.exec_driver_sql(
+            'SELECT max(id) FROM movies'
+        ).scalar()
+    if last_movie_id is None:
+        return Reconciliation(checked=0, drifted=[], fixed=0)
+    totals = get_review_totals(engine, last_movie_id + 1, workers, chunk_size)
+
+    checked, drifted, fixed = 0, [], 0
+    after_id = -1
+    while True:
+        with engine.connect() as connection:
+            rows = connection.exec_driver_sql(
+                SELECT_MOVIES, (after_id, chunk_size)
+            ).all()
+        if not rows:
+            break
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        avg_scores = np.array([row[1] for row in rows], dtype=np.float64)
+        stored = np.array([row[2:] for row in rows], dtype=np.int64).T
+        expected = totals[:, ids]
+        expected_avg_scores = get_averages(expected[SCORE_SUM], expected[SCORE_NUMBER])
+        drift = (stored != expected).any(axis=0) | ~np.isclose(
+            avg_scores, expected_avg_scores, rtol=0, atol=1e-9
+        )
+
+        chunk_drifted = np.flatnonzero(drift)
+        drifted.extend(ids[chunk_drifted].tolist())
+        if fix and chunk_drifted.size:
+            params = [
+                (
+                    float(expected_avg_scores[i]),
+                    *expected[:, i].tolist(),
+                    int(ids[i]),
+                    *stored[:, i].tolist(),
+                )
+                for i in chunk_drifted
+            ]
+            with engine.begin() as connection:
+                result = connection.exec_driver_sql(UPDATE_MOVIE, params)
+                fixed += result.rowcount
+        checked += len(rows)
+        after_id = int(ids[-1])
+
+    if fixed:
+        rebuild_leaderboard(engine)
+    logger.info('Checked %d movies, %d drifted, %d fixed', checked, len(drifted), fixed)
+    return Reconciliation(checked=checked, drifted=drifted, fixed=fixed)
@@ -1,7 +1,13 @@
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from enum import Enum
+from typing import Generic, Optional, Sequence, TypeVar
 
-from pydantic import BaseModel, Field
+from fastapi_pagination import Page, Params
+from fastapi_pagination.bases import AbstractParams
+from pydantic import BaseModel, Field, conint
+from pydantic.generics import GenericModel
+
+T = TypeVar('T')
 
 
 class UserBase(BaseModel):
@@ -19,6 +25,12 @@ class User(UserBase):
         orm_mode = True
 
 
+class Token(BaseModel):
+    access_token: str
+    token_type: str = 'bearer'
+    expires_in: int
+
+
 class MovieBase(BaseModel):
     title: str
     release_year: int = Field(ge=1895, le=date.today().year)
@@ -41,10 +53,89 @@ class ExtMovie(Movie):
     review_number: int
 
 
+class TopMovie(BaseModel):
+    weighted_score: float
+    movie: ExtMovie
+
+    class Config:
+        orm_mode = True
+
+
+class TrendingMovie(BaseModel):
+    # decayed to the time of the request, see app.db.trending
+    trending_score: float
+    movie: ExtMovie
+
+
+class ScoreHistogram(BaseModel):
+    movie_id: int
+    score_number: int
+    # the number of scores of each value, buckets[score]
+    buckets: list[int]
+    # None while the movie has no scores, as are percentiles
+    median: Optional[float]
+    # the score at each percentile, by the nearest rank
+    percentiles: dict[int, Optional[int]]
+
+
+class Recommendation(BaseModel):
+    movie: ExtMovie
+    predicted_score: float
+
+
+class BulkError(BaseModel):
+    # position of the row in the upload, from 0, blank lines aren't counted
+    index: int
+    detail: str
+
+
+class BulkResult(BaseModel):
+    created: int
+    errors: list[BulkError]
+
+
 class MovieFilters(BaseModel):
     filter_by_text: Optional[str] = ''
     filter_by_year: Optional[int]
     sort_by_avg_score: Optional[bool] = False
+    # order movies matching filter_by_text by relevance
+    sort_by_relevance: Optional[bool] = False
+
+
+class ExportFormat(str, Enum):
+    ndjson = 'ndjson'
+    csv = 'csv'
+
+
+class Pagination(str, Enum):
+    offset = 'offset'
+    # keyset pagination, pages are requested with `next_cursor` of the previous one
+    cursor = 'cursor'
+
+
+class PaginationParams(BaseModel):
+    pagination: Pagination = Pagination.offset
+    cursor: Optional[str] = None
+    # counting may cost more than the page itself, clients can opt out
+    include_total: bool = True
+
+
+class OffsetPage(Page[T], Generic[T]):
+    # None if the client didn't ask for the total
+    total: Optional[conint(ge=0)]  # type: ignore
+
+    @classmethod
+    def create(  # type: ignore[override]
+        cls, items: Sequence[T], total: Optional[int], params: AbstractParams
+    ) -> 'OffsetPage[T]':
+        if not isinstance(params, Params):
+            raise ValueError('OffsetPage should be used with Params')
+        return cls(total=total, items=items, page=params.page, size=params.size)
+
+
+class CursorPage(GenericModel, Generic[T]):
+    items: Sequence[T]
+    next_cursor: Optional[str]
 
 
 class ReviewBase(BaseModel):
@@ -62,6 +153,18 @@ class Review(ReviewCreate):
         orm_mode = True
 
 
+class ReviewUpdate(BaseModel):
+    # only sent fields are changed, a null text removes it
+    score: Optional[int] = Field(None, ge=0, le=10)
+    review_text: Optional[str]
+
+
+class ExtReview(Review):
+    id: int
+    user_id: int
+    created_at: Optional[datetime]
+
+
 class HTTPError(BaseModel):
     detail: str
 
@@ -0,0 +1,191 @@
+import logging
+import math
+import sys
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Movies by recent reviews: a review counts 1 when it's written and half as
+# much every TRENDING_HALF_LIFE after that, the trending score of a movie is
+# the sum over its reviews. Decaying the scores as time goes by would rewrite
+# every movie, so they are stored decayed to a fixed epoch instead (forward
+# decay): a review written at t adds exp(rate * (t - epoch)) to its movie, a
+# removed one takes it off, and a stored score is multiplied by
+# exp(-rate * (now - epoch)) as it's read. Every movie is scaled by the same
+# factor at a time, so the order of the stored scores is the trending order
+# and the top is read from an index of them.
+#
+# Reviews of unknown times (written before they were kept) count as old ones,
+# they add nothing. Weights double every half-life, floats overflow about a
+# thousand half-lives after the epoch, so it has to be moved forward long
+# before that.
+
+# the largest exponent of a weight that is a float
+MAX_EXPONENT = math.log(sys.float_info.max)
+EPOCH_WARNING = 'Trending weights overflow, move TRENDING_EPOCH forward'
+
+# rows of the totals of rebuild_trending, columns are movie ids: the sum of
+# the weights, the number of reviews and of the ones with times
+TRENDING, REVIEWS, TIMED = range(3)
+TOTALS = 3
+MAX_ID = 2**63 - 1
+
+# reviews of a range of ids by id, with their ages at the epoch in seconds,
+# parameters are (epoch, after id, up to id, size, chunk size)
+SELECT_REVIEW_TIMES = """
+    SELECT id, movie_id, created_at IS NOT NULL,
+        coalesce((julianday(created_at) - julianday(?)) * 86400.0, 0.0)
+    FROM reviews
+    WHERE id > ? AND id <= ? AND movie_id >= 0 AND movie_id < ?
+    ORDER BY id LIMIT ?
+"""
+# the same of one movie, parameters are (epoch, movie id)
+SELECT_MOVIE_REVIEW_TIMES = """
+    SELECT id, movie_id, created_at IS NOT NULL,
+        coalesce((julianday(created_at) - julianday(?)) * 86400.0, 0.0)
+    FROM reviews WHERE movie_id = ?
+"""
+
+
+@lru_cache(maxsize=None)
+def get_decay() -> tuple[datetime, float]:
+    # the epoch and the decay rate per second
+    settings = get_settings()
+    return settings.TRENDING_EPOCH, math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def utc_now() -> datetime:
+    # naive like CURRENT_TIMESTAMP of sqlite and the created_at column
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get_weight(created_at: Optional[datetime]) -> float:
+    # what a review written at `created_at` adds to the stored score
+    if created_at is None:
+        return 0.0
+    epoch, rate = get_decay()
+    try:
+        return math.exp(rate * (created_at - epoch).total_seconds())
+    except OverflowError:
+        # the review is left out rather than the write failing
+        logger.error(EPOCH_WARNING)
+        return 0.0
+
+
+def decay(trending_score: float, now: datetime) -> float:
+    # a stored score as of `now`, never below 0 whatever the rounding
+    epoch, rate = get_decay()
+    return max(trending_score, 0.0) * math.exp(-rate * (now - epoch).total_seconds())
+
+
+def count_reviews(totals: np.ndarray, rows: list[Any], rate: float) -> None:
+    # rows of SELECT_REVIEW_TIMES added to the totals of their movies
+    chunk = np.array(rows, dtype=np.float64)
+    movie_ids = chunk[:, 1].astype(np.int64)
+    timed = chunk[:, 2]
+    exponents = rate * chunk[:, 3]
+    overflow = (timed > 0) & (exponents > MAX_EXPONENT)
+    if overflow.any():
+        logger.error(EPOCH_WARNING)
+    # reviews of unknown times and overflowing ones left out like by get_weight
+    weights = np.exp(np.where((timed > 0) & ~overflow, exponents, -np.inf))
+    size = totals.shape[1]
+    totals[TRENDING] += np.bincount(movie_ids, weights=weights, minlength=size)
+    totals[REVIEWS] += np.bincount(movie_ids, minlength=size)
+    totals[TIMED] += np.bincount(movie_ids, weights=timed, minlength=size)
+
+
+def scan_reviews(
+    cursor: Any, totals: np.ndarray, after_id: int, last_id: int, chunk_size: int
+) -> None:
+    # reviews with ids in (after_id, last_id] counted chunk by chunk, a query each
+    epoch, rate = get_decay()
+    while rows := cursor.execute(
+        SELECT_REVIEW_TIMES,
+        (epoch.isoformat(' '), after_id, last_id, totals.shape[1], chunk_size),
+    ).fetchall():
+        count_reviews(totals, rows, rate)
+        after_id = rows[-1][0]
+
+
+def update_totals(
+    cursor: Any, totals: np.ndarray, last_id: int, chunk_size: int
+) -> np.ndarray:
+    """Totals of a scan up to `last_id` brought up to date, writers locked out.
+
+    Reviews added since then have greater ids, they are counted on top.
+    Removed ones are found by the numbers of scores of their movies (every
+    review has one), which differ from the totals then. These movies are
+    counted again from their reviews, as are movies with drifted statistics.
+    """
+    movie_ids, score_numbers = (
+        np.array(
+            cursor.execute('SELECT id, score_number FROM movies').fetchall(),
+            dtype=np.int64,
+        )
+        .reshape(-1, 2)
+        .T
+    )
+    # movies added meanwhile
+    size = max(totals.shape[1], int(movie_ids.max(initial=-1)) + 1)
+    totals = np.pad(totals, ((0, 0), (0, size - totals.shape[1])))
+    scan_reviews(cursor, totals, last_id, MAX_ID, chunk_size)
+
+    changed = movie_ids[totals[REVIEWS, movie_ids] != score_numbers]
+    totals[:, changed] = 0
+    epoch, rate = get_decay()
+    for movie_id in changed.tolist():
+        if rows := cursor.execute(
+            SELECT_MOVIE_REVIEW_TIMES, (epoch.isoformat(' '), movie_id)
+        ).fetchall():
+            count_reviews(totals, rows, rate)
+    return totals
+
+
+def rebuild_trending(engine: Engine, chunk_size: int = 100000) -> int:
+    """Recompute trending scores of all movies from their reviews.
+
+    Needed after TRENDING_* settings are changed. Reviews are counted chunk by
+    chunk, each chunk read by a query of its own, so writers aren't kept
+    waiting. Then writers are locked out, reviews changed meanwhile are
+    counted again and the scores are written. Run it with the write-behind
+    buffer flushed: scores pending there would be added twice. Returns the
+    number of reviews with times, the others add nothing.
+    """
+    with engine.connect() as connection:
+        last_movie_id, last_id = connection.exec_driver_sql(
+            'SELECT (SELECT max(id) FROM movies), '
+            '(SELECT coalesce(max(id), 0) FROM reviews)'
+        ).one()
+    if last_movie_id is None:
+        return 0
+    totals = np.zeros((TOTALS, last_movie_id + 1), dtype=np.float64)
+    # plain tuples of the driver's cursor, rows of SQLAlchemy cost more
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        scan_reviews(cursor, totals, -1, last_id, chunk_size)
+        cursor.execute('BEGIN IMMEDIATE')
+        totals = update_totals(cursor, totals, last_id, chunk_size)
+        scores = totals[TRENDING]
+        movie_ids = np.flatnonzero(scores)
+        cursor.execute('UPDATE movies SET trending_score = 0')
+        cursor.executemany(
+            'UPDATE movies SET trending_score = ? WHERE id = ?',
+            zip(scores[movie_ids].tolist(), movie_ids.tolist()),
+        )
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+
+    counted = int(totals[TIMED].sum())
+    logger.info('Trending scores of %d movies from %d reviews', len(movie_ids), counted)
+    return counted
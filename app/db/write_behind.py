@@ -0,0 +1,221 @@
+import logging
+import secrets
+import threading
+from functools import lru_cache, partial
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from app.config import get_settings
+from app.db.models import HISTOGRAM_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Under a burst of reviews of one movie every review write waits for the same
+# row of `movies`. In the write-behind mode reviews are inserted right away,
+# but the scores they add to their movies are summed up in the process and
+# written by one UPDATE per movie from time to time. Pending scores are added
+# to movies as they are read, so responses stay current. Sorting and ranking
+# see written scores only, and pending ones are lost if the process is killed.
+
+# a statistic delta of a movie, see crud.get_movie_statistic_deltas; counts
+# of scores, and the trending weight of them
+Delta = dict[str, Any]
+# selected along with requested fields of movie rows to add pending scores
+STATISTIC_FIELDS = ['id', 'score_sum', 'score_number']
+
+
+def merge_deltas(into: dict[int, Delta], deltas: Iterable[Delta]) -> None:
+    for delta in deltas:
+        pending = into.get(delta['movie_id'])
+        if pending is None:
+            into[delta['movie_id']] = dict(delta)
+            continue
+        for key, value in delta.items():
+            if key != 'movie_id':
+                pending[key] += value
+
+
+class PendingStatistic:
+    """A movie (an ORM object or a row) with pending scores added to it.
+
+    Other attributes are read from the movie, so it's serialized like the
+    movie itself. The movie isn't changed, a session has nothing to write.
+    """
+
+    def __init__(self, movie: Any, delta: Delta) -> None:
+        self._movie = movie
+        self._delta = delta
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._movie, name)
+        if name in HISTOGRAM_FIELDS:
+            # see crud.HISTOGRAM_DELTA_KEYS
+            value += self._delta[f'new_{name}']
+        return value
+
+    @property
+    def score_sum(self) -> int:
+        return self._movie.score_sum + self._delta['new_sum']
+
+    @property
+    def score_number(self) -> int:
+        return self._movie.score_number + self._delta['new_scores']
+
+    @property
+    def review_number(self) -> int:
+        return self._movie.review_number + self._delta['new_texts']
+
+    @property
+    def avg_score(self) -> float:
+        # 0 like in the database when the last scores are removed
+        if self.score_number <= 0:
+            return 0.0
+        return self.score_sum / self.score_number
+
+
+class FlushThread:
+    """A daemon thread calling `flush` every `interval` seconds and when woken."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self, flush: Callable[[], None]) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(flush,), name='statistic-flush', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        # returns once the last flush is over
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, flush: Callable[[], None]) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            flush()
+
+
+class StatisticBuffer:
+    """Pending statistic deltas of movies, written by a background thread.
+
+    Deltas are written every `flush_interval` seconds, as soon as
+    `flush_size` scores are pending, and when the buffer is stopped.
+    """
+
+    def __init__(self, flush_size: int, flush_interval: float) -> None:
+        self.flush_size = flush_size
+        self._pending: dict[int, Delta] = {}
+        # taken by a flush, still added to reads until they are committed
+        self._flushing: dict[int, Delta] = {}
+        self._scores = 0
+        # tells responses with different pending scores apart in ETags
+        self._token = secrets.token_hex(4)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_thread = FlushThread(flush_interval)
+
+    def add(self, deltas: Iterable[Delta]) -> None:
+        deltas = list(deltas)
+        with self._lock:
+            merge_deltas(self._pending, deltas)
+            self._scores += sum(delta['new_scores'] for delta in deltas)
+            self._generation += 1
+            full = self._scores >= self.flush_size
+        if full:
+            self._flush_thread.wake()
+
+    def get(self, movie_id: int) -> Optional[Delta]:
+        with self._lock:
+            deltas = [
+                pending[movie_id]
+                for pending in (self._flushing, self._pending)
+                if movie_id in pending
+            ]
+        if not deltas:
+            return None
+        merged: dict[int, Delta] = {}
+        merge_deltas(merged, deltas)
+        return merged[movie_id]
+
+    def with_pending(self, movie: Any) -> Any:
+        delta = self.get(movie.id)
+        return movie if delta is None else PendingStatistic(movie, delta)
+
+    def tag(self) -> str:
+        # empty when the database has it all, then ETags are shared by workers
+        with self._lock:
+            if not (self._pending or self._flushing):
+                return ''
+            return f'.{self._token}.{self._generation}'
+
+    def flush(self, write: Callable[[list[Delta]], None]) -> None:
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._flushing, self._pending = self._pending, {}
+                self._scores = 0
+            try:
+                write(list(self._flushing.values()))
+            except Exception:  # pylint: disable=broad-except
+                logger.exception(
+                    'Statistic of %d movies is not written, retrying later',
+                    len(self._flushing),
+                )
+                with self._lock:
+                    merge_deltas(self._pending, self._flushing.values())
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                    self._generation += 1
+
+    def start(self, write: Callable[[list[Delta]], None]) -> None:
+        self._flush_thread.start(partial(self.flush, write))
+
+    def stop(self, write: Callable[[list[Delta]], None]) -> None:
+        self._flush_thread.stop()
+        # whatever was added while the thread was stopping
+        self.flush(write)
+
+
+@lru_cache(maxsize=None)
+def get_statistic_buffer() -> Optional[StatisticBuffer]:
+    settings = get_settings()
+    if not settings.STATISTIC_WRITE_BEHIND:
+        return None
+    return StatisticBuffer(
+        flush_size=settings.STATISTIC_FLUSH_SIZE,
+        flush_interval=settings.STATISTIC_FLUSH_INTERVAL,
+    )
+
+
+def with_pending_statistic(movie: Any) -> Any:
+    buffer = get_statistic_buffer()
+    return movie if buffer is None else buffer.with_pending(movie)
+
+
+def with_pending_statistics(movies: Sequence[Any]) -> Sequence[Any]:
+    buffer = get_statistic_buffer()
+    if buffer is None:
+        return movies
+    return [buffer.with_pending(movie) for movie in movies]
+
+
+def get_pending_tag() -> str:
+    buffer = get_statistic_buffer()
+    return '' if buffer is None else buffer.tag()
@@ -1,14 +1,30 @@
-from typing import Generator
+from dataclasses import dataclass
+from typing import AsyncGenerator, Awaitable, Callable, Generator, Optional
 
-from fastapi import Depends
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi import Depends, Request, Response
+from fastapi.security import (
+    HTTPAuthorizationCredentials,
+    HTTPBasic,
+    HTTPBasicCredentials,
+    HTTPBearer,
+)
+from fastapi_pagination import Params
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db import crud, models
-from app.db.database import get_session
-from app.exceptions import InvalidCredentials
+from app.auth import get_credential_cache, verify_access_token
+from app.db import async_crud, crud, models, schemas
+from app.db.database import get_async_session, get_session
+from app.db.write_behind import get_pending_tag
+from app.exceptions import InvalidCredentials, InvalidToken
+from app.fieldsets import movie_fields
+from app.hashing import async_verify_password, verify_password
+from app.http_cache import check_not_modified, get_cache_control
 
 security = HTTPBasic()
+# for endpoints accepting both schemes, whichever header is present is used
+optional_basic_security = HTTPBasic(auto_error=False)
+optional_bearer_security = HTTPBearer(auto_error=False)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -24,11 +40,146 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def auth_required(
-    credentials: HTTPBasicCredentials = Depends(security), db: Session = Depends(get_db)
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    session_local = get_async_session()
+    db = session_local()
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
+def _verify_basic_credentials(
+    credentials: HTTPBasicCredentials, db: Session
 ) -> models.User:
+    credential_cache = get_credential_cache()
+    cached_user = credential_cache.get(credentials.username, credentials.password)
+    if cached_user:
+        return cached_user
+
     db_user = crud.get_user_by_login(db, login=credentials.username)
-    if not (db_user and db_user.check_password(credentials.password)):
+    if not (db_user and verify_password(db_user.hashed_password, credentials.password)):
         raise InvalidCredentials
 
+    credential_cache.add(db_user, credentials.password)
     return db_user
+
+
+async def _async_verify_basic_credentials(
+    credentials: HTTPBasicCredentials, db: AsyncSession
+) -> models.User:
+    credential_cache = get_credential_cache()
+    cached_user = credential_cache.get(credentials.username, credentials.password)
+    if cached_user:
+        return cached_user
+
+    db_user = await async_crud.get_user_by_login(db, login=credentials.username)
+    if not (
+        db_user
+        and await async_verify_password(db_user.hashed_password, credentials.password)
+    ):
+        raise InvalidCredentials
+
+    credential_cache.add(db_user, credentials.password)
+    return db_user
+
+
+def _verify_bearer_credentials(
+    credentials: HTTPAuthorizationCredentials,
+) -> models.User:
+    # the user comes from the token claims, no database round trip
+    token_user = verify_access_token(credentials.credentials)
+    if token_user is None:
+        raise InvalidToken
+    return token_user
+
+
+def auth_required(
+    credentials: HTTPBasicCredentials = Depends(security), db: Session = Depends(get_db)
+) -> models.User:
+    return _verify_basic_credentials(credentials, db)
+
+
+async def async_auth_required(
+    credentials: HTTPBasicCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> models.User:
+    return await _async_verify_basic_credentials(credentials, db)
+
+
+def token_auth_required(
+    bearer_credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+        optional_bearer_security
+    ),
+    basic_credentials: Optional[HTTPBasicCredentials] = Depends(
+        optional_basic_security
+    ),
+    db: Session = Depends(get_db),
+) -> models.User:
+    if bearer_credentials:
+        return _verify_bearer_credentials(bearer_credentials)
+    if basic_credentials:
+        return _verify_basic_credentials(basic_credentials, db)
+    raise InvalidCredentials
+
+
+async def async_token_auth_required(
+    bearer_credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+        optional_bearer_security
+    ),
+    basic_credentials: Optional[HTTPBasicCredentials] = Depends(
+        optional_basic_security
+    ),
+    db: AsyncSession = Depends(get_async_db),
+) -> models.User:
+    if bearer_credentials:
+        return _verify_bearer_credentials(bearer_credentials)
+    if basic_credentials:
+        return await _async_verify_basic_credentials(basic_credentials, db)
+    raise InvalidCredentials
+
+
+def catalog_not_modified(cache_control: str) -> Callable[..., None]:
+    """Answer 304 before running the endpoint if the catalog hasn't changed.
+
+    `cache_control` is the name of the setting with the route's Cache-Control.
+    Scores pending in the write-behind mode change the version as well.
+    """
+
+    def dependency(
+        request: Request, response: Response, db: Session = Depends(get_db)
+    ) -> None:
+        check_not_modified(
+            request,
+            response,
+            f'{crud.get_catalog_version(db)}{get_pending_tag()}',
+            get_cache_control(cache_control),
+        )
+
+    return dependency
+
+
+def async_catalog_not_modified(cache_control: str) -> Callable[..., Awaitable[None]]:
+    async def dependency(
+        request: Request, response: Response, db: AsyncSession = Depends(get_async_db)
+    ) -> None:
+        check_not_modified(
+            request,
+            response,
+            f'{await async_crud.get_catalog_version(db)}{get_pending_tag()}',
+            get_cache_control(cache_control),
+        )
+
+    return dependency
+
+
+@dataclass
+class MovieListParams:
+    # query parameters of GET /movies besides the filters, taken as one
+    params: Params = Depends()
+    pagination_params: schemas.PaginationParams = Depends()
+    fields: Optional[list[str]] = Depends(movie_fields)
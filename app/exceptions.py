@@ -6,6 +6,12 @@ InvalidCredentials = HTTPException(
     headers={'WWW-Authenticate': 'Basic'},
 )
 
+InvalidToken = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail='Invalid or expired token',
+    headers={'WWW-Authenticate': 'Bearer'},
+)
+
 MovieAlreadyRegistered = HTTPException(
     status_code=status.HTTP_409_CONFLICT,
     detail='Movie already registered',
@@ -21,6 +27,12 @@ ReviewAlreadyExists = HTTPException(
     detail='You have already reviewed this movie',
 )
 
+# reviews of other users aren't told apart from missing ones
+ReviewNotFound = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND,
+    detail='Review not found',
+)
+
 LoginAlreadyRegistered = HTTPException(
     status_code=status.HTTP_409_CONFLICT,
     detail='Login already registered',
@@ -35,3 +47,33 @@ WrongYear = HTTPException(
     status_code=status.HTTP_409_CONFLICT,
     detail='You entered the wrong year',
 )
+
+InvalidCursor = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail='Invalid pagination cursor',
+)
+
+CursorSortNotSupported = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail='Cursor pagination does not support sorting by relevance',
+)
+
+UnknownField = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail='Unknown field requested',
+)
+
+UnsupportedBulkFormat = HTTPException(
+    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+    detail='Send a JSON array, NDJSON or CSV',
+)
+
+InvalidBulkBody = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail='The body is not a JSON array',
+)
+
+InvalidCsvHeader = HTTPException(
+    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    detail='The CSV header is not a record',
+)
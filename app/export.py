@@ -0,0 +1,55 @@
+import csv
+import io
+from itertools import islice
+from typing import Any, Iterable, Iterator, Sequence, Union
+
+import orjson
+
+from app.db.schemas import ExportFormat
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: 'application/x-ndjson',
+    ExportFormat.csv: 'text/csv',
+}
+
+
+def batched(rows: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def ndjson_chunks(
+    rows: Iterable[Any], fields: Sequence[str], batch_size: int
+) -> Iterator[bytes]:
+    # a JSON object per line
+    for batch in batched(rows, batch_size):
+        yield b''.join(orjson.dumps(dict(zip(fields, row))) + b'\n' for row in batch)
+
+
+def csv_chunks(
+    rows: Iterable[Any], fields: Sequence[str], batch_size: int
+) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for batch in batched(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # only the header is left when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_chunks(
+    rows: Iterable[Any],
+    fields: Sequence[str],
+    export_format: ExportFormat,
+    batch_size: int,
+) -> Iterator[Union[bytes, str]]:
+    """Encoded `rows` of `fields`, a chunk of the response per batch of rows."""
+    if export_format == ExportFormat.csv:
+        return csv_chunks(rows, fields, batch_size)
+    return ndjson_chunks(rows, fields, batch_size)
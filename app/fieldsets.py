@@ -0,0 +1,70 @@
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+from fastapi import Query, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.config import get_settings
+from app.db import schemas
+from app.exceptions import UnknownField
+
+MOVIE_FIELDS = list(schemas.ExtMovie.__fields__)
+USER_FIELDS = list(schemas.User.__fields__)
+REVIEW_FIELDS = list(schemas.ExtReview.__fields__)
+
+
+@lru_cache(maxsize=None)
+def fast_serialization() -> bool:
+    return get_settings().FAST_SERIALIZATION
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[list[str]]:
+    """Names of the comma separated `fields`.
+
+    None means all fields serialized by the response model, unless the fast
+    path is on, then all of them are picked from rows like requested ones.
+    """
+    if fields is None:
+        return list(allowed) if fast_serialization() else None
+    # duplicates are dropped, the order is kept
+    names = list(dict.fromkeys(filter(None, map(str.strip, fields.split(',')))))
+    if not names or not set(names) <= set(allowed):
+        raise UnknownField
+    return names
+
+
+def movie_fields(
+    fields: Optional[str] = Query(
+        None,
+        description=f'Comma separated fields of movies to return: {", ".join(MOVIE_FIELDS)}',
+    )
+) -> Optional[list[str]]:
+    return parse_fields(fields, MOVIE_FIELDS)
+
+
+def user_fields(
+    fields: Optional[str] = Query(
+        None,
+        description=f'Comma separated fields of users to return: {", ".join(USER_FIELDS)}',
+    )
+) -> Optional[list[str]]:
+    return parse_fields(fields, USER_FIELDS)
+
+
+def pick_fields(obj: Any, fields: Sequence[str]) -> dict[str, Any]:
+    # rows and ORM objects alike, only the selected attributes are read
+    return {field: getattr(obj, field) for field in fields}
+
+
+def sparse_response(content: Any, response: Response) -> ORJSONResponse:
+    """Response of picked fields encoded by orjson.
+
+    Neither the response model nor jsonable_encoder are involved, so `content`
+    must be made of JSON types. Pages are taken apart shallowly, their items
+    are dicts already. Headers set by dependencies (ETag and such) on `response`
+    are kept.
+    """
+    if isinstance(content, BaseModel):
+        content = dict(content)
+    return ORJSONResponse(content, headers=dict(response.headers))
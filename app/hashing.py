@@ -0,0 +1,66 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Optional, TypeVar
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.config import get_settings
+
+T = TypeVar('T')
+
+# PBKDF2 is CPU bound and holds the GIL, so hashing in a request thread stalls
+# every other request of the worker. Here it is done in a pool of processes.
+
+
+@lru_cache(maxsize=None)
+def get_hashing_executor() -> Optional[Executor]:
+    workers = get_settings().PASSWORD_HASH_WORKERS
+    if workers == 0:
+        return None
+    # spawned workers don't inherit the engine and open connections of the parent
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+    )
+
+
+def shutdown_hashing_executor() -> None:
+    if get_hashing_executor.cache_info().currsize:
+        executor = get_hashing_executor()
+        if executor is not None:
+            executor.shutdown()
+        get_hashing_executor.cache_clear()
+
+
+def _run(func: Callable[..., T], *args: Any) -> T:
+    executor = get_hashing_executor()
+    if executor is None:
+        return func(*args)
+    # the request thread waits without holding the GIL
+    return executor.submit(func, *args).result()
+
+
+async def _async_run(func: Callable[..., T], *args: Any) -> T:
+    # without the process pool it runs in the default thread pool
+    # to keep the event loop free
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), partial(func, *args))
+
+
+def hash_password(password: str) -> str:
+    return _run(generate_password_hash, password, get_settings().PASSWORD_HASH_METHOD)
+
+
+def verify_password(hashed_password: str, password: str) -> bool:
+    return _run(check_password_hash, hashed_password, password)
+
+
+async def async_hash_password(password: str) -> str:
+    return await _async_run(
+        generate_password_hash, password, get_settings().PASSWORD_HASH_METHOD
+    )
+
+
+async def async_verify_password(hashed_password: str, password: str) -> bool:
+    return await _async_run(check_password_hash, hashed_password, password)
@@ -0,0 +1,55 @@
+from typing import Any, Optional, Sequence
+
+from app.db import schemas
+from app.db.models import HISTOGRAM_FIELDS
+
+# percentiles of GET /movies/{movie_id}/histogram
+PERCENTILES = (10, 25, 75, 90)
+
+
+def get_score_at_rank(buckets: Sequence[int], rank: int) -> int:
+    # the rank-th (from 1) of the scores sorted in ascending order
+    seen = 0
+    for score, number in enumerate(buckets):
+        seen += number
+        if seen >= rank:
+            return score
+    raise ValueError(f'Rank {rank} of {seen} scores')
+
+
+def get_median(buckets: Sequence[int]) -> Optional[float]:
+    total = sum(buckets)
+    if not total:
+        return None
+    # the middle score, or the mean of the two middle ones of an even number
+    lower = get_score_at_rank(buckets, (total + 1) // 2)
+    upper = get_score_at_rank(buckets, total // 2 + 1)
+    return (lower + upper) / 2
+
+
+def get_percentile(buckets: Sequence[int], percentile: int) -> Optional[int]:
+    total = sum(buckets)
+    if not total:
+        return None
+    # the nearest rank is ceil(percentile% of the scores), the first at least
+    rank = max(1, -(-percentile * total // 100))
+    return get_score_at_rank(buckets, rank)
+
+
+def get_histogram(movie: Any) -> schemas.ScoreHistogram:
+    """The histogram of a movie (ORM object or row) with statistics derived.
+
+    Buckets are counted as reviews are written, so it takes the same time
+    however many reviews the movie has.
+    """
+    buckets = [getattr(movie, field) for field in HISTOGRAM_FIELDS]
+    return schemas.ScoreHistogram(
+        movie_id=movie.id,
+        score_number=sum(buckets),
+        buckets=buckets,
+        median=get_median(buckets),
+        percentiles={
+            percentile: get_percentile(buckets, percentile)
+            for percentile in PERCENTILES
+        },
+    )
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from app.config import get_settings
+
+
+class NotModified(Exception):
+    """The client's copy is still current, answered with 304 and no body."""
+
+    def __init__(self, headers: dict[str, str]) -> None:
+        super().__init__()
+        self.headers = headers
+
+
+async def not_modified_handler(_: Request, exc: NotModified) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=exc.headers)
+
+
+@lru_cache
+def get_cache_control(name: str) -> str:
+    # name of the setting, read once per process instead of on every request
+    return str(getattr(get_settings(), name))
+
+
+def get_etag(version: str, request: Request) -> str:
+    # the version says when the data changed, the url which view of it it is
+    url = f'{request.url.path}?{request.url.query}'.encode()
+    return f'"{version}-{blake2b(url, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # weak comparison, as required for If-None-Match
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags
+
+
+def check_not_modified(
+    request: Request, response: Response, version: str, cache_control: str
+) -> None:
+    """Raise NotModified if the client has the current version, else set headers."""
+    headers = {'ETag': get_etag(version, request), 'Cache-Control': cache_control}
+    if etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        raise NotModified(headers)
+    response.headers.update(headers)
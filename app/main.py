@@ -1,15 +1,107 @@
+import logging
+from typing import Optional
+
 import uvicorn
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
 from fastapi_pagination import add_pagination
 
-from app.routers import movies, reviews, users
+from app.auth import get_credential_cache
+from app.config import get_settings
+from app.db import crud
+from app.db.database import (
+    check_sqlite_pragmas,
+    dispose_async_engine,
+    dispose_engine,
+    get_session,
+)
+from app.db.write_behind import Delta, get_statistic_buffer
+from app.hashing import shutdown_hashing_executor
+from app.http_cache import NotModified, not_modified_handler
+from app.routers import bulk, export, histogram, movies, rankings, reviews, users
+from app.routers.aio import histogram as aio_histogram
+from app.routers.aio import movies as aio_movies
+from app.routers.aio import reviews as aio_reviews
+from app.routers.aio import users as aio_users
+
+logger = logging.getLogger(__name__)
+
+
+def with_async_routes(router: APIRouter, async_router: APIRouter) -> APIRouter:
+    # Replace the routes that have an async counterpart and keep the rest,
+    # so both stacks serve the same API in the same route order.
+    async_routes = {
+        (route.path, frozenset(route.methods)): route
+        for route in async_router.routes
+        if isinstance(route, APIRoute)
+    }
+    combined_router = APIRouter()
+    combined_router.routes = [
+        async_routes.get((route.path, frozenset(route.methods)), route)
+        if isinstance(route, APIRoute)
+        else route
+        for route in router.routes
+    ]
+    return combined_router
+
+
+def write_movie_statistics(deltas: list[Delta]) -> None:
+    # called by the write-behind buffer from its thread
+    with get_session()() as db:
+        crud.update_movie_statistics(db, deltas)
+        db.commit()
+
+
+def on_startup() -> None:
+    # connections must not be shared with the parent process of a worker
+    dispose_engine()
+    check_sqlite_pragmas()
+    statistic_buffer = get_statistic_buffer()
+    if statistic_buffer is not None:
+        statistic_buffer.start(write_movie_statistics)
+
+
+def on_shutdown() -> None:
+    statistic_buffer = get_statistic_buffer()
+    if statistic_buffer is not None:
+        # pending scores are written before the engine is disposed
+        statistic_buffer.stop(write_movie_statistics)
+    dispose_engine()
+    shutdown_hashing_executor()
+    logger.info('Credential cache stats: %s', get_credential_cache().stats())
+
+
+def create_app() -> FastAPI:
+    settings = get_settings()
+    fastapi_app = FastAPI()
+
+    # the fixed paths of /movies go before /movies/{movie_id}
+    routers: list[tuple[APIRouter, Optional[APIRouter]]] = [
+        (reviews.router, aio_reviews.router),
+        (bulk.router, None),
+        (export.router, None),
+        (rankings.router, None),
+        (movies.router, aio_movies.router),
+        (histogram.router, aio_histogram.router),
+        (users.router, aio_users.router),
+    ]
+    for router, async_router in routers:
+        if settings.ASYNC_DB and async_router is not None:
+            router = with_async_routes(router, async_router)
+        fastapi_app.include_router(router)
+    add_pagination(fastapi_app)
+    fastapi_app.add_exception_handler(NotModified, not_modified_handler)
+
+    fastapi_app.add_event_handler('startup', on_startup)
+    fastapi_app.add_event_handler('shutdown', on_shutdown)
+    if settings.ASYNC_DB:
+        fastapi_app.add_event_handler('startup', dispose_async_engine)
+        fastapi_app.add_event_handler('shutdown', dispose_async_engine)
+
+    return fastapi_app
 
-app = FastAPI()
 
-app.include_router(reviews.router)
-app.include_router(movies.router)
-app.include_router(users.router)
-add_pagination(app)
+app = create_app()
 
 
 if __name__ == '__main__':  # pragma: no cover (for debug purposes)
@@ -0,0 +1,80 @@
+import base64
+import binascii
+import json
+import math
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+from app.db import schemas
+from app.exceptions import CursorSortNotSupported, InvalidCursor
+
+T = TypeVar('T')
+
+# the only order of GET /movies/top
+TOP_MOVIES_ORDER = 'weighted_score'
+# the only order of GET /movies/trending
+TRENDING_MOVIES_ORDER = 'trending_score'
+# the only order of reviews of a movie or of a user, newest first
+REVIEWS_ORDER = '-id'
+
+# types of the values of cursor keys by order, a score and an id or an id
+_SCORE: tuple[type, ...] = (int, float)
+_ID: tuple[type, ...] = (int,)
+CURSOR_KEY_TYPES: dict[str, list[tuple[type, ...]]] = {
+    'id': [_ID],
+    REVIEWS_ORDER: [_ID],
+    'avg_score': [_SCORE, _ID],
+    TOP_MOVIES_ORDER: [_SCORE, _ID],
+    TRENDING_MOVIES_ORDER: [_SCORE, _ID],
+}
+
+
+def encode_cursor(order: str, key: Sequence[Any]) -> str:
+    # the order is kept to reject cursors of a list sorted another way
+    data = json.dumps({'order': order, 'key': list(key)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str, order: str) -> list[Any]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError) as err:
+        raise InvalidCursor from err
+    if not isinstance(data, dict) or data.get('order') != order:
+        raise InvalidCursor
+    key = data.get('key')
+    if not isinstance(key, list) or not is_valid_key(key, CURSOR_KEY_TYPES[order]):
+        raise InvalidCursor
+    return key
+
+
+def is_valid_value(value: Any, types: tuple[type, ...]) -> bool:
+    if isinstance(value, bool) or not isinstance(value, types):
+        return False
+    if isinstance(value, float):
+        return math.isfinite(value)
+    # sqlite integers are 64-bit
+    return isinstance(value, int) and -(2**63) <= value < 2**63
+
+
+def is_valid_key(key: list[Any], types: Sequence[tuple[type, ...]]) -> bool:
+    # cursors come from clients, a key of other values would break the query
+    return len(key) == len(types) and all(
+        is_valid_value(value, value_types) for value, value_types in zip(key, types)
+    )
+
+
+def create_cursor_page(
+    items: Sequence[T], size: int, order: str, get_key: Callable[[T], Sequence[Any]]
+) -> schemas.CursorPage[T]:
+    # `items` are fetched with one extra row to know if there is a next page
+    next_cursor: Optional[str] = None
+    if len(items) > size:
+        items = items[:size]
+        next_cursor = encode_cursor(order, get_key(items[-1]))
+    return schemas.CursorPage(items=items, next_cursor=next_cursor)
+
+
+def get_movie_cursor_order(movie_filters: schemas.MovieFilters) -> str:
+    if movie_filters.sort_by_relevance:
+        raise CursorSortNotSupported
+    return 'avg_score' if movie_filters.sort_by_avg_score else 'id'
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_crud, models, schemas
+from app.db.schemas import HTTPError
+from app.db.write_behind import with_pending_statistic
+from app.dependencies import (
+    async_catalog_not_modified,
+    async_token_auth_required,
+    get_async_db,
+)
+from app.exceptions import MovieNotFound
+from app.histogram import get_histogram
+
+router = APIRouter(
+    prefix='/movies',
+    dependencies=[Depends(async_token_auth_required)],
+)
+
+
+@router.get(
+    '/{movie_id}/histogram',
+    response_model=schemas.ScoreHistogram,
+    responses={
+        MovieNotFound.status_code: {
+            'model': HTTPError,
+            'description': MovieNotFound.detail,
+        },
+    },
+    dependencies=[Depends(async_catalog_not_modified('MOVIE_CACHE_CONTROL'))],
+)
+async def get_movie_histogram(
+    movie_id: int, db: AsyncSession = Depends(get_async_db)
+) -> schemas.ScoreHistogram:
+    """Scores of the movie by value, with the median and percentiles of them."""
+    movie_row = await async_crud.get_movie_row(
+        db, movie_id=movie_id, fields=['id', *models.HISTOGRAM_FIELDS]
+    )
+    if movie_row is None:
+        raise MovieNotFound
+    return get_histogram(with_pending_statistic(movie_row))
@@ -0,0 +1,206 @@
+from typing import Any, Optional, Union
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_crud, crud, models, schemas
+from app.db.schemas import HTTPError
+from app.db.write_behind import with_pending_statistic, with_pending_statistics
+from app.dependencies import (
+    MovieListParams,
+    async_catalog_not_modified,
+    async_token_auth_required,
+    get_async_db,
+)
+from app.exceptions import (
+    CursorSortNotSupported,
+    InvalidCursor,
+    MovieAlreadyRegistered,
+    MovieNotFound,
+    UnknownField,
+    WrongYear,
+)
+from app.fieldsets import movie_fields, pick_fields, sparse_response
+from app.pagination import (
+    REVIEWS_ORDER,
+    create_cursor_page,
+    decode_cursor,
+    get_movie_cursor_order,
+)
+
+router = APIRouter(
+    prefix='/movies',
+    dependencies=[Depends(async_token_auth_required)],
+)
+
+
+@router.post(
+    '/',
+    response_model=schemas.Movie,
+    responses={
+        MovieAlreadyRegistered.status_code: {
+            'model': HTTPError,
+            'description': MovieAlreadyRegistered.detail,
+        },
+        WrongYear.status_code: {
+            'model': HTTPError,
+            'description': WrongYear.detail,
+        },
+    },
+)
+async def create_movie(
+    movie: schemas.MovieCreate, db: AsyncSession = Depends(get_async_db)
+) -> models.Movie:
+    try:
+        db_movie = await async_crud.create_movie(db=db, movie=movie)
+    except IntegrityError as err:
+        raise WrongYear from err
+    # the insert is skipped when a movie with the same title is already there
+    if db_movie is None:
+        raise MovieAlreadyRegistered
+    return db_movie
+
+
+@router.get(
+    '/',
+    response_model=Union[  # type: ignore
+        schemas.OffsetPage[schemas.ExtMovie], schemas.CursorPage[schemas.ExtMovie]
+    ],
+    responses={
+        InvalidCursor.status_code: {
+            'model': HTTPError,
+            'description': ' / '.join(
+                [
+                    InvalidCursor.detail,
+                    CursorSortNotSupported.detail,
+                    UnknownField.detail,
+                ]
+            ),
+        }
+    },
+    dependencies=[Depends(async_catalog_not_modified('MOVIE_LIST_CACHE_CONTROL'))],
+)
+async def get_movies(
+    response: Response,
+    movie_filters: schemas.MovieFilters = Depends(),
+    list_params: MovieListParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+) -> Union[schemas.OffsetPage[Any], schemas.CursorPage[Any], ORJSONResponse]:
+    params, pagination_params = list_params.params, list_params.pagination_params
+    fields = list_params.fields
+    page: Union[schemas.OffsetPage[Any], schemas.CursorPage[Any]]
+    if pagination_params.pagination == schemas.Pagination.offset:
+        raw_params = params.to_raw_params()
+        if fields is None:
+            movies = await async_crud.get_movies(
+                db, movie_filters, limit=raw_params.limit, offset=raw_params.offset
+            )
+        else:
+            movies = await async_crud.get_movie_rows(
+                db,
+                movie_filters,
+                limit=raw_params.limit,
+                offset=raw_params.offset,
+                fields=fields,
+            )
+        total = None
+        if pagination_params.include_total:
+            total = await async_crud.count_movies(db, movie_filters)
+        page = schemas.OffsetPage.create(movies, total, params)
+    else:
+        order = get_movie_cursor_order(movie_filters)
+        after_key = None
+        if pagination_params.cursor:
+            after_key = decode_cursor(pagination_params.cursor, order)
+        if fields is None:
+            movies = await async_crud.get_movies_after(
+                db, movie_filters, after_key, limit=params.size + 1
+            )
+        else:
+            movies = await async_crud.get_movie_rows_after(
+                db, movie_filters, after_key, limit=params.size + 1, fields=fields
+            )
+        page = create_cursor_page(
+            movies,
+            params.size,
+            order,
+            lambda movie: crud.get_movie_sort_key(movie, movie_filters),
+        )
+
+    page.items = with_pending_statistics(page.items)
+    if fields is None:
+        return page
+    page.items = [pick_fields(movie, fields) for movie in page.items]
+    return sparse_response(page, response)
+
+
+@router.get(
+    '/{movie_id}',
+    response_model=schemas.ExtMovie,
+    responses={
+        MovieNotFound.status_code: {
+            'model': HTTPError,
+            'description': MovieNotFound.detail,
+        },
+        UnknownField.status_code: {
+            'model': HTTPError,
+            'description': UnknownField.detail,
+        },
+    },
+    dependencies=[Depends(async_catalog_not_modified('MOVIE_CACHE_CONTROL'))],
+)
+async def get_movie(
+    movie_id: int,
+    response: Response,
+    fields: Optional[list[str]] = Depends(movie_fields),
+    db: AsyncSession = Depends(get_async_db),
+) -> Union[models.Movie, ORJSONResponse]:
+    if fields is None:
+        db_movie = await async_crud.get_movie(db, movie_id=movie_id)
+        if db_movie is None:
+            raise MovieNotFound
+        return with_pending_statistic(db_movie)
+
+    movie_row = await async_crud.get_movie_row(db, movie_id=movie_id, fields=fields)
+    if movie_row is None:
+        raise MovieNotFound
+    movie = with_pending_statistic(movie_row)
+    return sparse_response(pick_fields(movie, fields), response)
+
+
+@router.get(
+    '/{movie_id}/reviews',
+    response_model=schemas.CursorPage[schemas.ExtReview],
+    responses={
+        MovieNotFound.status_code: {
+            'model': HTTPError,
+            'description': MovieNotFound.detail,
+        },
+        InvalidCursor.status_code: {
+            'model': HTTPError,
+            'description': InvalidCursor.detail,
+        },
+    },
+)
+async def get_movie_reviews(
+    movie_id: int,
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.CursorPage[Any]:
+    """Reviews of the movie, newest first."""
+    after_key = None
+    if cursor:
+        after_key = decode_cursor(cursor, REVIEWS_ORDER)
+    reviews = await async_crud.get_movie_reviews(
+        db, movie_id, after_key, limit=size + 1
+    )
+    # looked up only without reviews, to tell an unknown movie from one without them
+    if (
+        not reviews
+        and await async_crud.get_movie_row(db, movie_id=movie_id, fields=['id']) is None
+    ):
+        raise MovieNotFound
+    return create_cursor_page(reviews, size, REVIEWS_ORDER, crud.get_review_key)
@@ -0,0 +1,97 @@
+from typing import Union
+
+from fastapi import APIRouter, Depends, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_crud, models, schemas
+from app.db.schemas import HTTPError
+from app.dependencies import async_token_auth_required, get_async_db
+from app.exceptions import MovieNotFound, ReviewAlreadyExists, ReviewNotFound
+from app.fieldsets import (
+    REVIEW_FIELDS,
+    fast_serialization,
+    pick_fields,
+    sparse_response,
+)
+
+router = APIRouter(
+    prefix='/reviews',
+    responses={
+        MovieNotFound.status_code: {
+            'model': HTTPError,
+            'description': MovieNotFound.detail,
+        },
+        ReviewAlreadyExists.status_code: {
+            'model': HTTPError,
+            'description': ReviewAlreadyExists.detail,
+        },
+    },
+)
+
+
+@router.post('/', response_model=schemas.ExtReview)
+async def add_review(
+    review: schemas.ReviewCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(async_token_auth_required),
+) -> Union[models.Review, ORJSONResponse]:
+
+    try:
+        db_review = await async_crud.add_review(
+            db, review=review, user_id=current_user.id
+        )
+    except IntegrityError as err:
+        raise ReviewAlreadyExists from err
+    if db_review is None:
+        raise MovieNotFound
+    if fast_serialization():
+        return sparse_response(pick_fields(db_review, REVIEW_FIELDS), response)
+    return db_review
+
+
+@router.patch(
+    '/{review_id}',
+    response_model=schemas.ExtReview,
+    responses={
+        ReviewNotFound.status_code: {
+            'model': HTTPError,
+            'description': ReviewNotFound.detail,
+        },
+    },
+)
+async def update_review(
+    review_id: int,
+    review: schemas.ReviewUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(async_token_auth_required),
+) -> models.Review:
+    """Change the score or the text of your review, the movie follows it."""
+    db_review = await async_crud.update_review(db, review_id, current_user.id, review)
+    if db_review is None:
+        raise ReviewNotFound
+    return db_review
+
+
+@router.delete(
+    '/{review_id}',
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+    responses={
+        ReviewNotFound.status_code: {
+            'model': HTTPError,
+            'description': ReviewNotFound.detail,
+        },
+    },
+)
+async def delete_review(
+    review_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(async_token_auth_required),
+) -> Response:
+    """Delete your review, its score is taken off the movie."""
+    if not await async_crud.delete_review(db, review_id, current_user.id):
+        raise ReviewNotFound
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
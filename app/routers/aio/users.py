@@ -0,0 +1,172 @@
+from typing import Any, Optional, Union
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import create_access_token
+from app.config import get_settings
+from app.db import async_crud, crud, models, schemas
+from app.db.schemas import HTTPError
+from app.db.write_behind import with_pending_statistic
+from app.dependencies import (
+    async_auth_required,
+    async_token_auth_required,
+    get_async_db,
+)
+from app.exceptions import (
+    InvalidCredentials,
+    InvalidCursor,
+    LoginAlreadyRegistered,
+    UnknownField,
+    UserNotFound,
+)
+from app.fieldsets import pick_fields, sparse_response, user_fields
+from app.pagination import REVIEWS_ORDER, create_cursor_page, decode_cursor
+
+router = APIRouter(
+    prefix='/users',
+)
+
+
+@router.post(
+    '/',
+    response_model=schemas.User,
+    responses={
+        LoginAlreadyRegistered.status_code: {
+            'model': HTTPError,
+            'description': LoginAlreadyRegistered.detail,
+        }
+    },
+)
+async def create_user(
+    user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    db_user = await async_crud.get_user_by_login(db, login=user.login)
+    if db_user:
+        raise LoginAlreadyRegistered
+    return await async_crud.create_user(db=db, user=user)
+
+
+@router.post(
+    '/token',
+    response_model=schemas.Token,
+    responses={
+        InvalidCredentials.status_code: {
+            'model': HTTPError,
+            'description': InvalidCredentials.detail,
+        }
+    },
+)
+async def create_token(
+    current_user: models.User = Depends(async_auth_required),
+) -> schemas.Token:
+    # exchange Basic credentials for a token, so they are checked only once
+    return schemas.Token(
+        access_token=create_access_token(current_user),
+        expires_in=get_settings().ACCESS_TOKEN_TTL,
+    )
+
+
+@router.get(
+    '/me',
+    response_model=schemas.User,
+    responses={
+        UnknownField.status_code: {
+            'model': HTTPError,
+            'description': UnknownField.detail,
+        }
+    },
+)
+async def get_authorized_user(
+    response: Response,
+    fields: Optional[list[str]] = Depends(user_fields),
+    current_user: models.User = Depends(async_token_auth_required),
+) -> Union[models.User, ORJSONResponse]:
+    if fields is None:
+        return current_user
+    return sparse_response(pick_fields(current_user, fields), response)
+
+
+@router.get(
+    '/{user_id}',
+    response_model=schemas.User,
+    responses={
+        UserNotFound.status_code: {
+            'model': HTTPError,
+            'description': UserNotFound.detail,
+        },
+        UnknownField.status_code: {
+            'model': HTTPError,
+            'description': UnknownField.detail,
+        },
+    },
+    dependencies=[Depends(async_token_auth_required)],
+)
+async def get_user(
+    user_id: int,
+    response: Response,
+    fields: Optional[list[str]] = Depends(user_fields),
+    db: AsyncSession = Depends(get_async_db),
+) -> Union[models.User, ORJSONResponse]:
+    if fields is None:
+        db_user = await async_crud.get_user(db, user_id=user_id)
+        if db_user is None:
+            raise UserNotFound
+        return db_user
+
+    user_row = await async_crud.get_user_row(db, user_id=user_id, fields=fields)
+    if user_row is None:
+        raise UserNotFound
+    return sparse_response(pick_fields(user_row, fields), response)
+
+
+@router.get(
+    '/{user_id}/reviews',
+    response_model=schemas.CursorPage[schemas.ExtReview],
+    responses={
+        UserNotFound.status_code: {
+            'model': HTTPError,
+            'description': UserNotFound.detail,
+        },
+        InvalidCursor.status_code: {
+            'model': HTTPError,
+            'description': InvalidCursor.detail,
+        },
+    },
+    dependencies=[Depends(async_token_auth_required)],
+)
+async def get_user_reviews(
+    user_id: int,
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.CursorPage[Any]:
+    """Reviews of the user, newest first."""
+    after_key = None
+    if cursor:
+        after_key = decode_cursor(cursor, REVIEWS_ORDER)
+    reviews = await async_crud.get_user_reviews(db, user_id, after_key, limit=size + 1)
+    # looked up only without reviews, to tell an unknown user from one without them
+    if (
+        not reviews
+        and await async_crud.get_user_row(db, user_id=user_id, fields=['id']) is None
+    ):
+        raise UserNotFound
+    return create_cursor_page(reviews, size, REVIEWS_ORDER, crud.get_review_key)
+
+
+@router.get('/me/recommendations', response_model=list[schemas.Recommendation])
+async def get_recommendations(
+    size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(async_token_auth_required),
+) -> list[Any]:
+    """Movies you haven't reviewed, by the scores predicted from your reviews."""
+    recommendations = await async_crud.get_recommendations(
+        db, current_user.id, limit=size
+    )
+    return [
+        {'movie': with_pending_statistic(movie), 'predicted_score': predicted_score}
+        for movie, predicted_score in recommendations
+    ]
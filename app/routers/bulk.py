@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.bulk import batched, enumerate_rows, get_bulk_openapi, iter_rows, validate_rows
+from app.config import get_settings
+from app.db import crud, schemas
+from app.db.schemas import HTTPError
+from app.dependencies import get_db, token_auth_required
+from app.exceptions import (
+    InvalidBulkBody,
+    InvalidCsvHeader,
+    MovieAlreadyRegistered,
+    UnsupportedBulkFormat,
+)
+
+router = APIRouter(
+    prefix='/movies',
+    dependencies=[Depends(token_auth_required)],
+)
+
+
+@router.post(
+    '/bulk',
+    response_model=schemas.BulkResult,
+    responses={
+        UnsupportedBulkFormat.status_code: {
+            'model': HTTPError,
+            'description': UnsupportedBulkFormat.detail,
+        },
+        InvalidBulkBody.status_code: {
+            'model': HTTPError,
+            'description': InvalidBulkBody.detail,
+        },
+        InvalidCsvHeader.status_code: {
+            'model': HTTPError,
+            'description': InvalidCsvHeader.detail,
+        },
+    },
+    openapi_extra=get_bulk_openapi(schemas.MovieCreate),
+)
+async def create_movies(
+    request: Request, db: Session = Depends(get_db)
+) -> schemas.BulkResult:
+    """Create movies of a JSON array, NDJSON or CSV (title,release_year) upload.
+
+    Rows are inserted batch by batch while the upload is received, rows with
+    errors (invalid, duplicate title) are reported and don't stop the rest.
+    """
+    result = schemas.BulkResult(created=0, errors=[])
+    rows = iter_rows(request.headers.get('content-type', ''), request.stream())
+    async for batch in batched(enumerate_rows(rows), get_settings().BULK_BATCH_SIZE):
+        movies, errors = validate_rows(batch, schemas.MovieCreate)
+        result.errors.extend(errors)
+        created = await run_in_threadpool(
+            crud.create_movies, db, [movie for _, movie in movies]
+        )
+        result.created += sum(created)
+        result.errors.extend(
+            schemas.BulkError(index=index, detail=MovieAlreadyRegistered.detail)
+            for (index, _), new in zip(movies, created)
+            if not new
+        )
+    result.errors.sort(key=lambda error: error.index)
+    return result
@@ -0,0 +1,63 @@
+from typing import Any, Iterable, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db import crud, schemas
+from app.db.schemas import HTTPError
+from app.db.write_behind import get_statistic_buffer, with_pending_statistic
+from app.dependencies import get_db, token_auth_required
+from app.exceptions import UnknownField
+from app.export import MEDIA_TYPES, export_chunks
+from app.fieldsets import MOVIE_FIELDS, movie_fields
+
+router = APIRouter(
+    prefix='/movies',
+    dependencies=[Depends(token_auth_required)],
+)
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            'content': {media_type: {} for media_type in MEDIA_TYPES.values()},
+            'description': 'Movies as JSON lines or CSV rows',
+        },
+        UnknownField.status_code: {
+            'model': HTTPError,
+            'description': UnknownField.detail,
+        },
+    },
+)
+def export_movies(
+    export_format: schemas.ExportFormat = Query(
+        schemas.ExportFormat.ndjson, alias='format'
+    ),
+    movie_filters: schemas.MovieFilters = Depends(),
+    fields: Optional[list[str]] = Depends(movie_fields),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """All filtered movies, streamed without loading them into memory at once."""
+    fields = fields or MOVIE_FIELDS
+    batch_size = get_settings().EXPORT_BATCH_SIZE
+    # the session is closed after the response is sent, rows are read meanwhile
+    rows: Iterable[Any] = crud.iter_movie_rows(
+        db, movie_filters, crud.get_movie_row_fields(fields), batch_size
+    )
+    if get_statistic_buffer() is not None:
+        # selected with the statistic fields, exported with pending scores added
+        rows = (
+            tuple(getattr(with_pending_statistic(row), field) for field in fields)
+            for row in rows
+        )
+    return StreamingResponse(
+        export_chunks(rows, fields, export_format, batch_size),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="movies.{export_format.value}"'
+        },
+    )
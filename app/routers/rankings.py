@@ -0,0 +1,92 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db import crud, schemas, trending
+from app.db.schemas import HTTPError
+from app.db.write_behind import with_pending_statistic
+from app.dependencies import catalog_not_modified, get_db, token_auth_required
+from app.exceptions import InvalidCursor
+from app.pagination import (
+    TOP_MOVIES_ORDER,
+    TRENDING_MOVIES_ORDER,
+    create_cursor_page,
+    decode_cursor,
+)
+
+router = APIRouter(
+    prefix='/movies',
+    dependencies=[Depends(token_auth_required)],
+)
+
+
+@router.get(
+    '/top',
+    response_model=schemas.CursorPage[schemas.TopMovie],
+    responses={
+        InvalidCursor.status_code: {
+            'model': HTTPError,
+            'description': InvalidCursor.detail,
+        }
+    },
+    dependencies=[Depends(catalog_not_modified('MOVIE_LIST_CACHE_CONTROL'))],
+)
+def get_top_movies(
+    filter_by_year: Optional[int] = None,
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db),
+) -> schemas.CursorPage[Any]:
+    """Reviewed movies by weighted score, overall or of one release year."""
+    after_key = None
+    if cursor:
+        after_key = decode_cursor(cursor, TOP_MOVIES_ORDER)
+    entries = crud.get_top_movies(db, filter_by_year, after_key, limit=size + 1)
+    page: schemas.CursorPage[Any] = create_cursor_page(
+        entries, size, TOP_MOVIES_ORDER, crud.get_top_movie_key
+    )
+    # ranked by written scores, shown with pending ones like other movies
+    page.items = [
+        {
+            'weighted_score': entry.weighted_score,
+            'movie': with_pending_statistic(entry.movie),
+        }
+        for entry in page.items
+    ]
+    return page
+
+
+@router.get(
+    '/trending',
+    response_model=schemas.CursorPage[schemas.TrendingMovie],
+    responses={
+        InvalidCursor.status_code: {
+            'model': HTTPError,
+            'description': InvalidCursor.detail,
+        }
+    },
+)
+def get_trending_movies(
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db),
+) -> schemas.CursorPage[Any]:
+    """Movies by recent reviews, each counts half as much every TRENDING_HALF_LIFE."""
+    # scores decay as time goes by, so there is no ETag to revalidate against
+    after_key = None
+    if cursor:
+        after_key = decode_cursor(cursor, TRENDING_MOVIES_ORDER)
+    movies = crud.get_trending_movies(db, after_key, limit=size + 1)
+    page: schemas.CursorPage[Any] = create_cursor_page(
+        movies, size, TRENDING_MOVIES_ORDER, crud.get_trending_movie_key
+    )
+    now = trending.utc_now()
+    page.items = [
+        {
+            'trending_score': trending.decay(movie.trending_score, now),
+            'movie': with_pending_statistic(movie),
+        }
+        for movie in page.items
+    ]
+    return page
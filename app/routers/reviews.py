@@ -1,11 +1,30 @@
-from fastapi import APIRouter, Depends
+from typing import Union
+
+from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.bulk import batched, enumerate_rows, get_bulk_openapi, iter_rows, validate_rows
+from app.config import get_settings
 from app.db import crud, models, schemas
 from app.db.schemas import HTTPError
-from app.dependencies import auth_required, get_db
-from app.exceptions import MovieNotFound, ReviewAlreadyExists
+from app.dependencies import get_db, token_auth_required
+from app.exceptions import (
+    InvalidBulkBody,
+    InvalidCsvHeader,
+    MovieNotFound,
+    ReviewAlreadyExists,
+    ReviewNotFound,
+    UnsupportedBulkFormat,
+)
+from app.fieldsets import (
+    REVIEW_FIELDS,
+    fast_serialization,
+    pick_fields,
+    sparse_response,
+)
 
 router = APIRouter(
     prefix='/reviews',
@@ -22,20 +41,130 @@ router = APIRouter(
 )
 
 
-@router.post('/', response_model=schemas.Review)
+@router.post('/', response_model=schemas.ExtReview)
 def add_review(
     review: schemas.ReviewCreate,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth_required),
-) -> models.Review:
+    current_user: models.User = Depends(token_auth_required),
+) -> Union[models.Review, ORJSONResponse]:
 
-    if not crud.get_movie(db, movie_id=review.movie_id):
+    try:
+        db_review = crud.add_review(db, review=review, user_id=current_user.id)
+    except IntegrityError as err:
+        raise ReviewAlreadyExists from err
+    if db_review is None:
         raise MovieNotFound
+    if fast_serialization():
+        return sparse_response(pick_fields(db_review, REVIEW_FIELDS), response)
+    return db_review
+
+
+@router.post(
+    '/bulk',
+    response_model=schemas.BulkResult,
+    responses={
+        UnsupportedBulkFormat.status_code: {
+            'model': HTTPError,
+            'description': UnsupportedBulkFormat.detail,
+        },
+        InvalidBulkBody.status_code: {
+            'model': HTTPError,
+            'description': InvalidBulkBody.detail,
+        },
+        InvalidCsvHeader.status_code: {
+            'model': HTTPError,
+            'description': InvalidCsvHeader.detail,
+        },
+    },
+    openapi_extra=get_bulk_openapi(schemas.ReviewCreate),
+)
+async def add_reviews(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(token_auth_required),
+) -> schemas.BulkResult:
+    """Add reviews of a JSON array, NDJSON or CSV (movie_id,score,review_text) upload.
 
+    All reviews are added in one transaction, rows with errors (invalid,
+    unknown movie, already reviewed) are reported and don't stop the rest.
+    The whole upload is received and validated before the first write, so a
+    slow client doesn't keep the database locked for other writers.
+    """
+    result = schemas.BulkResult(created=0, errors=[])
+    rows = iter_rows(request.headers.get('content-type', ''), request.stream())
+    batches = []
+    async for batch in batched(enumerate_rows(rows), get_settings().BULK_BATCH_SIZE):
+        reviews, errors = validate_rows(batch, schemas.ReviewCreate)
+        result.errors.extend(errors)
+        batches.append(reviews)
     try:
-        db_review = crud.add_review(db, review=review, user_id=current_user.id)
-        # in update function we won't get any error because we already add review correctly
-        crud.update_movie_statistic(db, review=review)
-        return db_review
+        # committed here rather than by get_db, so a failure is in the response
+        outcomes = await run_in_threadpool(
+            crud.add_review_batches,
+            db,
+            [[review for _, review in reviews] for reviews in batches],
+            current_user.id,
+        )
     except IntegrityError as err:
+        # reviewed by concurrent requests again and again
         raise ReviewAlreadyExists from err
+    for reviews, (unknown, duplicates) in zip(batches, outcomes):
+        result.created += len(reviews) - len(unknown) - len(duplicates)
+        result.errors.extend(
+            schemas.BulkError(
+                index=index,
+                detail=MovieNotFound.detail
+                if position in unknown
+                else ReviewAlreadyExists.detail,
+            )
+            for position, (index, _) in enumerate(reviews)
+            if position in unknown or position in duplicates
+        )
+    result.errors.sort(key=lambda error: error.index)
+    return result
+
+
+@router.patch(
+    '/{review_id}',
+    response_model=schemas.ExtReview,
+    responses={
+        ReviewNotFound.status_code: {
+            'model': HTTPError,
+            'description': ReviewNotFound.detail,
+        },
+    },
+)
+def update_review(
+    review_id: int,
+    review: schemas.ReviewUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(token_auth_required),
+) -> models.Review:
+    """Change the score or the text of your review, the movie follows it."""
+    db_review = crud.update_review(db, review_id, current_user.id, review)
+    if db_review is None:
+        raise ReviewNotFound
+    return db_review
+
+
+@router.delete(
+    '/{review_id}',
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+    responses={
+        ReviewNotFound.status_code: {
+            'model': HTTPError,
+            'description': ReviewNotFound.detail,
+        },
+    },
+)
+def delete_review(
+    review_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(token_auth_required),
+) -> Response:
+    """Delete your review, its score is taken off the movie."""
+    if not crud.delete_review(db, review_id, current_user.id):
+        raise ReviewNotFound
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends
+from typing import Any, Optional, Union
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
+from app.auth import create_access_token
+from app.config import get_settings
 from app.db import crud, models, schemas
 from app.db.schemas import HTTPError
-from app.dependencies import auth_required, get_db
-from app.exceptions import LoginAlreadyRegistered, UserNotFound
+from app.db.write_behind import with_pending_statistic
+from app.dependencies import auth_required, get_db, token_auth_required
+from app.exceptions import (
+    InvalidCredentials,
+    InvalidCursor,
+    LoginAlreadyRegistered,
+    UnknownField,
+    UserNotFound,
+)
+from app.fieldsets import pick_fields, sparse_response, user_fields
+from app.pagination import REVIEWS_ORDER, create_cursor_page, decode_cursor
 
 router = APIRouter(
     prefix='/users',
@@ -28,11 +42,44 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)) -> mode
     return crud.create_user(db=db, user=user)
 
 
-@router.get('/me', response_model=schemas.User)
-def get_authorized_user(
+@router.post(
+    '/token',
+    response_model=schemas.Token,
+    responses={
+        InvalidCredentials.status_code: {
+            'model': HTTPError,
+            'description': InvalidCredentials.detail,
+        }
+    },
+)
+def create_token(
     current_user: models.User = Depends(auth_required),
-) -> models.User:
-    return current_user
+) -> schemas.Token:
+    # exchange Basic credentials for a token, so they are checked only once
+    return schemas.Token(
+        access_token=create_access_token(current_user),
+        expires_in=get_settings().ACCESS_TOKEN_TTL,
+    )
+
+
+@router.get(
+    '/me',
+    response_model=schemas.User,
+    responses={
+        UnknownField.status_code: {
+            'model': HTTPError,
+            'description': UnknownField.detail,
+        }
+    },
+)
+def get_authorized_user(
+    response: Response,
+    fields: Optional[list[str]] = Depends(user_fields),
+    current_user: models.User = Depends(token_auth_required),
+) -> Union[models.User, ORJSONResponse]:
+    if fields is None:
+        return current_user
+    return sparse_response(pick_fields(current_user, fields), response)
 
 
 @router.get(
@@ -42,12 +89,73 @@ def get_authorized_user(
         UserNotFound.status_code: {
             'model': HTTPError,
             'description': UserNotFound.detail,
-        }
+        },
+        UnknownField.status_code: {
+            'model': HTTPError,
+            'description': UnknownField.detail,
+        },
     },
-    dependencies=[Depends(auth_required)],
+    dependencies=[Depends(token_auth_required)],
 )
-def get_user(user_id: int, db: Session = Depends(get_db)) -> models.User:
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
+def get_user(
+    user_id: int,
+    response: Response,
+    fields: Optional[list[str]] = Depends(user_fields),
+    db: Session = Depends(get_db),
+) -> Union[models.User, ORJSONResponse]:
+    if fields is None:
+        db_user = crud.get_user(db, user_id=user_id)
+        if db_user is None:
+            raise UserNotFound
+        return db_user
+
+    user_row = crud.get_user_row(db, user_id=user_id, fields=fields)
+    if user_row is None:
         raise UserNotFound
-    return db_user
+    return sparse_response(pick_fields(user_row, fields), response)
+
+
+@router.get(
+    '/{user_id}/reviews',
+    response_model=schemas.CursorPage[schemas.ExtReview],
+    responses={
+        UserNotFound.status_code: {
+            'model': HTTPError,
+            'description': UserNotFound.detail,
+        },
+        InvalidCursor.status_code: {
+            'model': HTTPError,
+            'description': InvalidCursor.detail,
+        },
+    },
+    dependencies=[Depends(token_auth_required)],
+)
+def get_user_reviews(
+    user_id: int,
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_db),
+) -> schemas.CursorPage[Any]:
+    """Reviews of the user, newest first."""
+    after_key = None
+    if cursor:
+        after_key = decode_cursor(cursor, REVIEWS_ORDER)
+    reviews = crud.get_user_reviews(db, user_id, after_key, limit=size + 1)
+    # looked up only without reviews, to tell an unknown user from one without them
+    if not reviews and crud.get_user_row(db, user_id=user_id, fields=['id']) is None:
+        raise UserNotFound
+    return create_cursor_page(reviews, size, REVIEWS_ORDER, crud.get_review_key)
+
+
+@router.get('/me/recommendations', response_model=list[schemas.Recommendation])
+def get_recommendations(
+    size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(token_auth_required),
+) -> list[Any]:
+    """Movies you haven't reviewed, by the scores predicted from your reviews."""
+    recommendations = crud.get_recommendations(db, current_user.id, limit=size)
+    return [
+        {'movie': with_pending_statistic(movie), 'predicted_score': predicted_score}
+        for movie, predicted_score in recommendations
+    ]
@@ -0,0 +1,18 @@
+"""Recompute trending scores of movies from the times of their reviews."""
+import argparse
+
+from app.db.database import get_engine
+from app.db.trending import rebuild_trending
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    counted = rebuild_trending(get_engine(), chunk_size=args.chunk_size)
+    print(f'counted reviews: {counted}')
+
+
+if __name__ == '__main__':
+    main()
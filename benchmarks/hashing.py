@@ -0,0 +1,61 @@
+"""Logins per second against the size of the password hashing process pool.
+
+Run with `python -m benchmarks.hashing`. Request threads are simulated by a thread
+pool of the same size as the one FastAPI runs sync endpoints in.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from app import hashing
+from app.config import get_settings
+
+REQUEST_THREADS = 40
+
+
+def logins_per_second(pool_size: int, logins: int) -> float:
+    os.environ['PASSWORD_HASH_WORKERS'] = str(pool_size)
+    hashing.shutdown_hashing_executor()
+    hashed_password = generate_password_hash(
+        'password', method=get_settings().PASSWORD_HASH_METHOD
+    )
+    # warm up, so spawning of the pool isn't measured
+    hashing.verify_password(hashed_password, 'password')
+
+    with ThreadPoolExecutor(max_workers=REQUEST_THREADS) as request_threads:
+        start = time.perf_counter()
+        list(
+            request_threads.map(
+                lambda _: hashing.verify_password(hashed_password, 'password'),
+                range(logins),
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    hashing.shutdown_hashing_executor()
+    return logins / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument(
+        '--pool-sizes',
+        type=int,
+        nargs='+',
+        default=sorted({0, 1, 2, 4, os.cpu_count() or 1}),
+        help='0 means hashing in the request threads',
+    )
+    args = parser.parse_args()
+
+    print(f'hash method: {get_settings().PASSWORD_HASH_METHOD}')
+    print(f'{"pool size":>10} {"logins/sec":>12}')
+    for pool_size in args.pool_sizes:
+        print(f'{pool_size:>10} {logins_per_second(pool_size, args.logins):>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
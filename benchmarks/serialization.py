@@ -0,0 +1,84 @@
+"""Requests per second of GET /movies with and without FAST_SERIALIZATION.
+
+Run with `python -m benchmarks.serialization`. Pages of movies are requested
+in-process through the test client from a temporary database, so the numbers
+are mostly the cost of the query and the serialization of the page.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+from app import fieldsets
+from app.auth import create_access_token
+from app.db import database, models
+from app.main import create_app
+
+
+def create_database(db_file: str, movies: int) -> models.User:
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_file}'
+    database.get_engine.cache_clear()
+    database.get_session.cache_clear()
+    engine = database.get_engine()
+    models.Base.metadata.create_all(bind=engine)
+
+    with database.get_session()() as session:
+        user = models.User(id=1, login='benchmark', hashed_password='')
+        session.add(user)
+        session.add_all(
+            models.Movie(
+                title=f'Movie {i}',
+                release_year=1895 + i % 128,
+                avg_score=i % 101 / 10,
+                score_number=i % 1000,
+                review_number=i % 100,
+            )
+            for i in range(movies)
+        )
+        session.commit()
+        session.refresh(user)
+        return user
+
+
+def requests_per_second(fast: bool, requests: int, size: int, token: str) -> float:
+    os.environ['FAST_SERIALIZATION'] = str(fast).lower()
+    fieldsets.fast_serialization.cache_clear()
+    client = TestClient(create_app())
+    headers = {'Authorization': f'Bearer {token}'}
+    params = {'size': size, 'sort_by_avg_score': True, 'include_total': False}
+    # warm up
+    client.get('/movies/', params=params, headers=headers).raise_for_status()
+
+    start = time.perf_counter()
+    for i in range(requests):
+        page_params = {**params, 'page': i % 10 + 1}
+        client.get('/movies/', params=page_params, headers=headers)
+    return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--size', type=int, default=50)
+    args = parser.parse_args()
+
+    db_fd, db_file = tempfile.mkstemp()
+    try:
+        user = create_database(db_file, args.movies)
+        token = create_access_token(user)
+        print(f'GET /movies, {args.size} movies per page')
+        print(f'{"path":>10} {"requests/sec":>14}')
+        for fast in (False, True):
+            rate = requests_per_second(fast, args.requests, args.size, token)
+            print(f'{"fast" if fast else "default":>10} {rate:>14.1f}')
+    finally:
+        database.dispose_engine()
+        os.close(db_fd)
+        os.unlink(db_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Store the most similar movies of each movie for GET /users/me/recommendations."""
+import argparse
+
+from app.db.database import get_engine
+from app.db.recommendations import NeighbourOptions, build_neighbours
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-k', type=int, default=50, help='neighbours of a movie')
+    parser.add_argument(
+        '--cosine',
+        action='store_true',
+        help='plain cosine similarity instead of the adjusted one',
+    )
+    parser.add_argument(
+        '--workers', type=int, help='processes computing similarities, CPUs by default'
+    )
+    parser.add_argument('--block-size', type=int, default=256)
+    args = parser.parse_args()
+
+    result = build_neighbours(
+        get_engine(),
+        NeighbourOptions(
+            k=args.k,
+            adjusted=not args.cosine,
+            workers=args.workers,
+            block_size=args.block_size,
+        ),
+    )
+    print(f'movies: {result.movies}')
+    print(f'neighbours: {result.neighbours}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+from app.db.database import get_engine
+from app.db.fts import rebuild_movies_fts
+
+
+def main() -> None:
+    rebuild_movies_fts(get_engine())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+from app.db.database import get_engine
+from app.db.leaderboard import rebuild_leaderboard
+
+
+def main() -> None:
+    rebuild_leaderboard(get_engine())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Recompute statistics of movies from their reviews and report the drift."""
+import argparse
+
+from app.db.database import get_engine
+from app.db.reconcile import reconcile_statistics
+
+# drifted movies listed by id
+SHOWN_DRIFTED = 20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fix', action='store_true', help='update drifted movies')
+    parser.add_argument(
+        '--workers', type=int, help='processes counting reviews, CPUs by default'
+    )
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    result = reconcile_statistics(
+        get_engine(), fix=args.fix, workers=args.workers, chunk_size=args.chunk_size
+    )
+    print(f'checked movies: {result.checked}')
+    print(f'drifted movies: {len(result.drifted)}')
+    if result.drifted:
+        shown = ', '.join(map(str, result.drifted[:SHOWN_DRIFTED]))
+        more = '...' if len(result.drifted) > SHOWN_DRIFTED else ''
+        print(f'  ids: {shown}{more}')
+    if args.fix:
+        print(f'fixed movies: {result.fixed}')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,12 +2,13 @@
 import os
 import tempfile
 from contextlib import contextmanager
+from datetime import datetime
 
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.db import models
+from app.db import counters, leaderboard, models, trending, write_behind
 
 
 def get_engine(db_file):
@@ -34,6 +35,47 @@ def create_session(engine):
         session.close()
 
 
+@pytest.fixture(autouse=True)
+def _clear_movie_count_cache():
+    # cached counts belong to the database of another test
+    counters.get_movie_count_cache().clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_leaderboard_prior():
+    # LEADERBOARD_* settings may be changed by a test
+    leaderboard.get_prior.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_trending_decay():
+    # TRENDING_* settings may be changed by a test
+    trending.get_decay.cache_clear()
+
+
+@pytest.fixture()
+def review_time(monkeypatch):
+    # the time reviews are written at, see the defaults of TRENDING_*
+    times = {'now': datetime(2024, 1, 8)}
+    monkeypatch.setattr(trending, 'utc_now', lambda: times['now'])
+    return times
+
+
+@pytest.fixture(autouse=True)
+def _clear_statistic_buffer():
+    # enabled by tests of the write-behind mode
+    write_behind.get_statistic_buffer.cache_clear()
+    yield
+    write_behind.get_statistic_buffer.cache_clear()
+
+
+@pytest.fixture()
+def write_behind_buffer(monkeypatch):
+    monkeypatch.setenv('STATISTIC_WRITE_BEHIND', 'true')
+    write_behind.get_statistic_buffer.cache_clear()
+    return write_behind.get_statistic_buffer()
+
+
 @pytest.fixture()
 def _init_db():
     db_fd, db_file = tempfile.mkstemp()
@@ -77,6 +119,7 @@ def movies(db_session):
         title='Terminator Genisys',
         release_year=2015,
         avg_score=5.5,
+        score_sum=11,
         score_number=2,
         review_number=1,
     )
@@ -85,6 +128,7 @@ def movies(db_session):
         title='Tenet',
         release_year=2020,
         avg_score=6.0,
+        score_sum=42,
         score_number=7,
         review_number=7,
     )
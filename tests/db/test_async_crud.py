@@ -0,0 +1,167 @@
+# pylint: disable=W0621
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import async_crud, models, schemas, trending
+
+
+@pytest.fixture()
+def run(db_session):
+    # db_session creates the schema in a temp file, here we open it with aiosqlite
+    url = db_session.get_bind().url.set(drivername='sqlite+aiosqlite')
+
+    async def _run(func, *args, **kwargs):
+        engine = create_async_engine(url)
+        session_local = sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with session_local() as session:
+            result = await func(session, *args, **kwargs)
+            await session.commit()
+        await engine.dispose()
+        return result
+
+    return lambda *args, **kwargs: asyncio.run(_run(*args, **kwargs))
+
+
+@pytest.mark.usefixtures('user')
+def test_get_user(run):
+    assert run(async_crud.get_user, user_id=1).login == 'test_user'
+    assert run(async_crud.get_user, user_id=3) is None
+    assert run(async_crud.get_user_by_login, login='test_user').id == 1
+    assert run(async_crud.get_user_by_login, login='non_existing_user') is None
+
+
+def test_create_user(run, db_session):
+    user_schema = schemas.UserCreate(login='test_user', password='password')
+    run(async_crud.create_user, user_schema)
+
+    created_user = (
+        db_session.query(models.User).filter(models.User.login == 'test_user').first()
+    )
+    assert created_user.check_password('password')
+
+
+@pytest.mark.usefixtures('movie')
+def test_get_movie(run):
+    assert run(async_crud.get_movie, movie_id=1).title == 'test_movie'
+    assert run(async_crud.get_movie, movie_id=5) is None
+    assert run(async_crud.get_movie_by_title, title='test_movie').id == 1
+    assert run(async_crud.get_movie_by_title, title='non_existing_movie') is None
+
+
+def test_create_movie(run):
+    movie_schema = schemas.MovieCreate(title='test_movie', release_year=2008)
+    assert run(async_crud.create_movie, movie_schema).id == 1
+    assert run(async_crud.create_movie, movie_schema) is None
+
+
+@pytest.mark.usefixtures('movies')
+def test_update_movie_statistic(run, db_session):
+    review = schemas.ReviewCreate(movie_id=2, score=4, review_text='Do not like it!')
+    run(async_crud.update_movie_statistic, review, trending.utc_now())
+
+    movie = db_session.query(models.Movie).filter(models.Movie.id == 2).first()
+    db_session.refresh(movie)
+    assert (movie.score_number, movie.avg_score, movie.review_number) == (3, 5.0, 2)
+
+
+@pytest.mark.usefixtures('movies')
+def test_get_filtered_movies_query(run):
+    movie_filters = schemas.MovieFilters(filter_by_text='Te', sort_by_avg_score=True)
+    query = async_crud.get_filtered_movies_query(movie_filters)
+
+    async def _titles(session):
+        return (await session.execute(query)).scalars().all()
+
+    assert [movie.title for movie in run(_titles)] == ['Tenet', 'Terminator Genisys']
+
+
+@pytest.mark.usefixtures('user', 'movie')
+def test_add_review(run):
+    review_schema = schemas.ReviewCreate(movie_id=1, score=3, review_text='Review')
+    assert run(async_crud.add_review, review_schema, user_id=1).id == 1
+
+    with pytest.raises(IntegrityError):
+        run(async_crud.add_review, review_schema, user_id=1)
+    review_schema.movie_id = 2
+    assert run(async_crud.add_review, review_schema, user_id=1) is None
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_add_review_write_behind(run, write_behind_buffer):
+    review_schema = schemas.ReviewCreate(movie_id=1, score=3, review_text=None)
+    assert run(async_crud.add_review, review_schema, user_id=1).id == 1
+    review_schema.movie_id = 4
+    assert run(async_crud.add_review, review_schema, user_id=1) is None
+
+    assert write_behind_buffer.get(1)['new_sum'] == 3
+    movie_row = run(async_crud.get_movie_row, movie_id=1, fields=['title'])
+    assert tuple(movie_row) == ('Inception', 1, 0, 0)
+
+
+@pytest.mark.usefixtures('movies')
+def test_get_movies_after(run):
+    movie_filters = schemas.MovieFilters(sort_by_avg_score=True)
+    movies = run(async_crud.get_movies_after, movie_filters, [6.0, 3], limit=1)
+
+    assert [movie.id for movie in movies] == [2]
+
+
+@pytest.mark.usefixtures('movies')
+def test_get_movies(run):
+    movie_filters = schemas.MovieFilters(filter_by_text='te')
+    movies = run(async_crud.get_movies, movie_filters, limit=1, offset=1)
+
+    assert len(movies) == 1
+    assert run(async_crud.count_movies, movie_filters) == 2
+    assert run(async_crud.count_movies, schemas.MovieFilters()) == 3
+
+
+@pytest.mark.usefixtures('movies', 'user')
+def test_get_rows(run):
+    movie_filters = schemas.MovieFilters(sort_by_avg_score=True)
+    rows = run(async_crud.get_movie_rows, movie_filters, 1, 0, fields=['id'])
+    cursor_rows = run(
+        async_crud.get_movie_rows_after, movie_filters, [6.0, 3], 1, fields=['id']
+    )
+
+    assert [tuple(row) for row in rows] == [(3,)]
+    assert [tuple(row) for row in cursor_rows] == [(2, 5.5, 2)]
+    assert tuple(run(async_crud.get_movie_row, 2, fields=['title'])) == (
+        'Terminator Genisys',
+    )
+    assert tuple(run(async_crud.get_user_row, 1, fields=['login'])) == ('test_user',)
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_get_reviews(run):
+    for movie_id in (1, 3):
+        review_schema = schemas.ReviewCreate(movie_id=movie_id, score=3)
+        run(async_crud.add_review, review_schema, user_id=1)
+
+    movie_reviews = run(async_crud.get_movie_reviews, 3, None, limit=10)
+    user_reviews = run(async_crud.get_user_reviews, 1, [2], limit=10)
+
+    assert [review.id for review in movie_reviews] == [2]
+    assert [review.movie_id for review in user_reviews] == [1]
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_change_review(run):
+    review_schema = schemas.ReviewCreate(movie_id=3, score=3)
+    run(async_crud.add_review, review_schema, user_id=1)
+
+    db_review = run(
+        async_crud.update_review, 1, 1, schemas.ReviewUpdate(review_text='Text')
+    )
+    assert (db_review.score, db_review.review_text) == (3, 'Text')
+    assert run(async_crud.delete_review, 1, 1)
+    assert run(async_crud.update_review, 1, 1, schemas.ReviewUpdate()) is None
+
+    movie = run(async_crud.get_movie, movie_id=3)
+    assert (movie.score_sum, movie.score_number, movie.review_number) == (42, 7, 7)
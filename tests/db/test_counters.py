@@ -0,0 +1,104 @@
+import pytest
+
+from app.db import counters, crud, models, schemas, trending
+
+
+@pytest.mark.usefixtures('movies')
+def test_movies_counter_follows_changes(db_session):
+    assert crud.get_counter(db_session, counters.MOVIES) == 3
+
+    crud.create_movie(db_session, schemas.MovieCreate(title='Alien', release_year=1979))
+    db_session.delete(crud.get_movie(db_session, movie_id=1))
+    db_session.commit()
+
+    assert crud.get_counter(db_session, counters.MOVIES) == 3
+
+
+@pytest.mark.usefixtures('movies')
+def test_catalog_version_bumped_by_movie_changes(db_session):
+    version = crud.get_catalog_version(db_session)
+
+    crud.create_movie(db_session, schemas.MovieCreate(title='Alien', release_year=1979))
+    assert crud.get_catalog_version(db_session) == version + 1
+
+    crud.update_movie_statistic(
+        db_session,
+        schemas.ReviewCreate(movie_id=1, score=8, review_text='Nice!'),
+        trending.utc_now(),
+    )
+    db_session.commit()
+    assert crud.get_catalog_version(db_session) == version + 2
+
+
+@pytest.mark.usefixtures('movies')
+def test_movies_counter_seeded_from_existing_rows(db_session):
+    engine = db_session.get_bind()
+    with engine.begin() as connection:
+        connection.exec_driver_sql('DELETE FROM counters')
+
+    models.Base.metadata.create_all(bind=engine)
+
+    assert crud.get_counter(db_session, counters.MOVIES) == 3
+
+
+@pytest.mark.parametrize(
+    ('filter_by_text', 'filter_by_year', 'result'),
+    [
+        ('', None, 3),
+        ('Te', None, 2),
+        ('', 2015, 1),
+    ],
+)
+@pytest.mark.usefixtures('movies')
+def test_count_movies(db_session, filter_by_text, filter_by_year, result):
+    movie_filters = schemas.MovieFilters(
+        filter_by_text=filter_by_text,
+        filter_by_year=filter_by_year,
+        sort_by_avg_score=True,
+    )
+    assert crud.count_movies(db_session, movie_filters) == result
+
+
+@pytest.mark.usefixtures('movies')
+def test_count_movies_cached(db_session):
+    movie_filters = schemas.MovieFilters(filter_by_text='te')
+    assert crud.count_movies(db_session, movie_filters) == 2
+
+    # the same words give the same key, the count isn't queried again
+    db_session.add(models.Movie(title='Test', release_year=2000))
+    db_session.commit()
+    assert (
+        crud.count_movies(db_session, schemas.MovieFilters(filter_by_text='TE!')) == 2
+    )
+
+    crud.create_movie(db_session, schemas.MovieCreate(title='Ten', release_year=2000))
+    assert crud.count_movies(db_session, movie_filters) == 4
+
+
+@pytest.mark.parametrize(
+    ('filters', 'key'),
+    [
+        ({}, None),
+        ({'sort_by_avg_score': True}, None),
+        ({'filter_by_text': 'Te'}, ('"te"*', None)),
+        ({'filter_by_text': '!!', 'filter_by_year': 2000}, ('!!', 2000)),
+    ],
+)
+def test_get_movie_count_key(filters, key):
+    assert counters.get_movie_count_key(schemas.MovieFilters(**filters)) == key
+
+
+def test_count_cache(mocker):
+    count_cache = counters.CountCache(maxsize=1, ttl=60)
+    count_cache.set('a', 1)
+    count_cache.set('b', 2)
+
+    assert count_cache.get('a') is None
+    assert count_cache.get('b') == 2
+
+    mocker.patch('app.db.counters.time.monotonic').return_value = 10**9
+    assert count_cache.get('b') is None
+
+    disabled_cache = counters.CountCache(maxsize=0, ttl=60)
+    disabled_cache.set('a', 1)
+    assert disabled_cache.get('a') is None
@@ -1,6 +1,8 @@
 import pytest
+from sqlalchemy.exc import IntegrityError
 
-from app.db import crud, models, schemas
+from app.auth import get_credential_cache
+from app.db import crud, models, schemas, trending
 
 
 # User stuff
@@ -40,6 +42,18 @@ def test_create_user(db_session):
     assert created_user.check_password('password')
 
 
+@pytest.mark.usefixtures('user')
+def test_credential_cache_invalidated_on_user_change(db_session):
+    user = crud.get_user_by_login(db_session, login='test_user')
+    cache = get_credential_cache()
+    cache.add(user, 'password')  # type: ignore
+
+    user.set_hashed_password('new_password')  # type: ignore
+    db_session.commit()
+
+    assert cache.get('test_user', 'password') is None
+
+
 # Movie stuff
 @pytest.mark.usefixtures('movie')
 def test_get_movie(db_session):
@@ -59,6 +73,12 @@ def test_get_movie_by_title(db_session):
     assert movie.title == 'test_movie'  # type: ignore
 
 
+@pytest.mark.usefixtures('movie')
+def test_get_movie_by_normalized_title(db_session):
+    movie = crud.get_movie_by_title(db_session, title=' Test_Movie ')
+    assert movie.title == 'test_movie'  # type: ignore
+
+
 @pytest.mark.usefixtures('movie')
 def test_get_unknown_movie_by_title(db_session):
     movie = crud.get_movie_by_title(db_session, title='non_existing_movie')
@@ -67,8 +87,9 @@ def test_get_unknown_movie_by_title(db_session):
 
 def test_create_movie(db_session):
     movie_schema = schemas.MovieCreate(title='test_movie', release_year=2008)
-    crud.create_movie(db_session, movie_schema)
+    movie = crud.create_movie(db_session, movie_schema)
 
+    assert (movie.id, movie.title, movie.score_number) == (1, 'test_movie', 0)  # type: ignore
     created_movie = (
         db_session.query(models.Movie)
         .filter(models.Movie.title == 'test_movie')
@@ -78,6 +99,21 @@ def test_create_movie(db_session):
     assert created_movie is not None
 
 
+@pytest.mark.usefixtures('movie')
+def test_create_already_registered_movie(db_session):
+    movie_schema = schemas.MovieCreate(title='Test_Movie ', release_year=2008)
+
+    assert crud.create_movie(db_session, movie_schema) is None
+    assert db_session.query(models.Movie).count() == 1
+
+
+def test_create_movie_with_wrong_year(db_session):
+    movie_schema = schemas.MovieCreate.construct(title='test_movie', release_year=1800)
+
+    with pytest.raises(IntegrityError):
+        crud.create_movie(db_session, movie_schema)
+
+
 @pytest.mark.parametrize(
     ('movie_id', 'score', 'review_text', 'score_number', 'avg_score', 'review_number'),
     [
@@ -94,7 +130,7 @@ def test_update_movie_statistic(  # pylint: disable=too-many-arguments
     review = schemas.ReviewCreate(
         movie_id=movie_id, score=score, review_text=review_text
     )
-    crud.update_movie_statistic(db_session, review)
+    crud.update_movie_statistic(db_session, review, trending.utc_now())
 
     created_movie = (
         db_session.query(models.Movie).filter(models.Movie.id == movie_id).first()
@@ -102,57 +138,19 @@ def test_update_movie_statistic(  # pylint: disable=too-many-arguments
 
     assert created_movie.score_number == score_number
     assert created_movie.avg_score == avg_score
+    assert created_movie.score_sum == avg_score * score_number
     assert created_movie.review_number == review_number
 
 
-@pytest.mark.parametrize(
-    ('filter_by_text', 'filter_by_year', 'result'),
-    [
-        ('Te', None, 2),
-        ('Harry Potter', None, 0),
-        ('', 2015, 1),
-    ],
-    ids=[
-        'two_movies_fit',
-        'do_not_fit_any_movie',
-        'one_movies_fit',
-    ],
-)
-@pytest.mark.usefixtures('movies')
-def test_get_movies_by_filters(db_session, filter_by_text, filter_by_year, result):
-    movie_filters = schemas.MovieFilters(
-        filter_by_text=filter_by_text, filter_by_year=filter_by_year
-    )
-    query = crud.get_filtered_movies_query(db_session, movie_filters)
-
-    assert len(query.all()) == result
-
-
-@pytest.mark.parametrize(
-    ('sort_by_avg_score', 'first_movie_title'),
-    [
-        (True, 'Tenet'),
-        (False, 'Inception'),
-    ],
-)
 @pytest.mark.usefixtures('movies')
-def test_get_movies_by_filters_avg(db_session, sort_by_avg_score, first_movie_title):
-    movie_filters = schemas.MovieFilters(sort_by_avg_score=sort_by_avg_score)
-    query = crud.get_filtered_movies_query(db_session, movie_filters)
-
-    movie_list = query.all()
-    assert movie_list[0].title == first_movie_title
-
-
-# Review stuff
-@pytest.mark.usefixtures('user', 'movie')
-def test_add_review(db_session):
-    review_schema = schemas.ReviewCreate(
-        movie_id=1, score=3, review_text='Very big review'
-    )
-    crud.add_review(db_session, review_schema, user_id=1)
-
-    created_review = (
-        db_session.query(models.Review).filter(models.Review.id == 1).first()
-    )
-    assert created_review is not None
+def test_create_movies(db_session):
+    movies = [
+        schemas.MovieCreate(title='Alien', release_year=1979),
+        schemas.MovieCreate(title=' tenet', release_year=2020),
+        schemas.MovieCreate(title='ALIEN ', release_year=1979),
+        schemas.MovieCreate(title='Arrival', release_year=2016),
+    ]
+
+    assert crud.create_movies(db_session, movies) == [True, False, False, True]
+    assert crud.count_movies(db_session, schemas.MovieFilters()) == 5
+    assert crud.get_movie_by_title(db_session, 'arrival').id == 5  # type: ignore
@@ -0,0 +1,166 @@
+import pytest
+
+from app.db import crud, fts, models, schemas
+
+
+@pytest.mark.parametrize(
+    ('filter_by_text', 'filter_by_year', 'result'),
+    [
+        ('Te', None, 2),
+        ('Harry Potter', None, 0),
+        ('', 2015, 1),
+        ('genisys TERM', None, 1),
+        ('Te', 2020, 1),
+        ('"Te" OR NOT', None, 0),
+    ],
+    ids=[
+        'two_movies_fit',
+        'do_not_fit_any_movie',
+        'one_movies_fit',
+        'all_words_fit',
+        'text_and_year_fit',
+        'fts_syntax_is_escaped',
+    ],
+)
+@pytest.mark.usefixtures('movies')
+def test_get_movies_by_filters(db_session, filter_by_text, filter_by_year, result):
+    movie_filters = schemas.MovieFilters(
+        filter_by_text=filter_by_text, filter_by_year=filter_by_year
+    )
+    query = crud.get_filtered_movies_query(db_session, movie_filters)
+
+    assert len(query.all()) == result
+
+
+@pytest.mark.parametrize(
+    ('sort_by_avg_score', 'first_movie_title'),
+    [
+        (True, 'Tenet'),
+        (False, 'Inception'),
+    ],
+)
+@pytest.mark.usefixtures('movies')
+def test_get_movies_by_filters_avg(db_session, sort_by_avg_score, first_movie_title):
+    movie_filters = schemas.MovieFilters(sort_by_avg_score=sort_by_avg_score)
+    query = crud.get_filtered_movies_query(db_session, movie_filters)
+
+    movie_list = query.all()
+    assert movie_list[0].title == first_movie_title
+
+
+@pytest.mark.usefixtures('movies')
+def test_get_movies_by_relevance(db_session):
+    db_session.add(models.Movie(id=4, title='Tenet Tenet Tenet', release_year=2021))
+    db_session.commit()
+
+    movie_filters = schemas.MovieFilters(filter_by_text='tenet', sort_by_relevance=True)
+    query = crud.get_filtered_movies_query(db_session, movie_filters)
+
+    assert [movie.id for movie in query.all()] == [4, 3]
+
+
+@pytest.mark.usefixtures('movies')
+def test_movies_fts_follows_changes(db_session):
+    movie = crud.get_movie(db_session, movie_id=1)
+    movie.title = 'Interstellar'  # type: ignore
+    db_session.delete(crud.get_movie(db_session, movie_id=3))
+    db_session.commit()
+
+    def titles(text):
+        movie_filters = schemas.MovieFilters(filter_by_text=text)
+        return [
+            m.title for m in crud.get_filtered_movies_query(db_session, movie_filters)
+        ]
+
+    assert titles('Inception') == []
+    assert titles('Inter') == ['Interstellar']
+    assert titles('Tenet') == []
+
+
+@pytest.mark.usefixtures('movies')
+def test_rebuild_movies_fts(db_session):
+    engine = db_session.get_bind()
+    with engine.begin() as connection:
+        connection.exec_driver_sql('DROP TABLE movies_fts')
+
+    fts.rebuild_movies_fts(engine)
+
+    movie_filters = schemas.MovieFilters(filter_by_text='Inception')
+    assert crud.get_filtered_movies_query(db_session, movie_filters).count() == 1
+
+
+@pytest.mark.parametrize(
+    ('sort_by_avg_score', 'pages'),
+    [
+        (False, [[1, 2], [3, 4], [5]]),
+        (True, [[3, 5], [4, 2], [1]]),
+    ],
+    ids=['id_order', 'avg_score_order'],
+)
+@pytest.mark.usefixtures('movies')
+def test_get_movies_after(db_session, sort_by_avg_score, pages):
+    # movies 2, 4 and 5 have the same score, the id breaks the tie
+    db_session.add_all(
+        [
+            models.Movie(id=4, title='Avatar', release_year=2009, avg_score=5.5),
+            models.Movie(id=5, title='Alien', release_year=1979, avg_score=5.5),
+        ]
+    )
+    db_session.commit()
+    movie_filters = schemas.MovieFilters(sort_by_avg_score=sort_by_avg_score)
+
+    after_key = None
+    for page in pages:
+        movies = crud.get_movies_after(db_session, movie_filters, after_key, limit=2)
+        assert [movie.id for movie in movies] == page
+        after_key = crud.get_movie_sort_key(movies[-1], movie_filters)
+
+
+@pytest.mark.usefixtures('movies')
+def test_get_filtered_movies_after(db_session):
+    movie_filters = schemas.MovieFilters(filter_by_text='Te')
+    movies = crud.get_movies_after(db_session, movie_filters, [2], limit=10)
+
+    assert [movie.title for movie in movies] == ['Tenet']
+
+
+@pytest.mark.usefixtures('movies')
+def test_get_movie_rows(db_session):
+    movie_filters = schemas.MovieFilters(sort_by_avg_score=True)
+
+    rows = crud.get_movie_rows(
+        db_session, movie_filters, limit=10, offset=0, fields=['title']
+    )
+    cursor_rows = crud.get_movie_rows_after(
+        db_session, movie_filters, None, limit=10, fields=['title']
+    )
+
+    assert [tuple(row) for row in rows] == [
+        ('Tenet',),
+        ('Terminator Genisys',),
+        ('Inception',),
+    ]
+    # the sort key is selected for the cursor
+    assert tuple(cursor_rows[0]) == ('Tenet', 6.0, 3)
+    assert crud.get_movie_sort_key(cursor_rows[0], movie_filters) == [6.0, 3]
+
+
+@pytest.mark.usefixtures('movies', 'user')
+def test_get_rows_by_id(db_session):
+    movie_row = crud.get_movie_row(db_session, movie_id=2, fields=['release_year'])
+    user_row = crud.get_user_row(db_session, user_id=1, fields=['login'])
+
+    assert tuple(movie_row) == (2015,)  # type: ignore
+    assert tuple(user_row) == ('test_user',)  # type: ignore
+    assert crud.get_movie_row(db_session, movie_id=4, fields=['id']) is None
+
+
+@pytest.mark.usefixtures('movies')
+def test_iter_movie_rows(db_session):
+    movie_filters = schemas.MovieFilters(filter_by_text='te', sort_by_avg_score=True)
+
+    rows = crud.iter_movie_rows(
+        db_session, movie_filters, fields=['id', 'title'], batch_size=1
+    )
+
+    assert [tuple(row) for row in rows] == [(3, 'Tenet'), (2, 'Terminator Genisys')]
@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.admin.views import ReviewView
+from app.db import crud, models, schemas
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_update_review(db_session):
+    crud.add_review(db_session, schemas.ReviewCreate(movie_id=3, score=2), user_id=1)
+
+    db_review = crud.update_review(
+        db_session, 1, 1, schemas.ReviewUpdate(score=10, review_text='Better')
+    )
+    assert db_review is not None
+    # the text is kept without it, the score too if it's null
+    crud.update_review(db_session, 1, 1, schemas.ReviewUpdate(score=None))
+
+    assert (db_review.movie_id, db_review.score, db_review.review_text) == (
+        3,
+        10,
+        'Better',
+    )
+    movie = crud.get_movie(db_session, movie_id=3)
+    assert movie is not None
+    assert (movie.score_sum, movie.score_number, movie.review_number) == (52, 8, 8)
+    assert movie.avg_score == 6.5
+    assert (movie.score_2_number, movie.score_10_number) == (0, 1)
+    entry = db_session.get(models.LeaderboardEntry, 3)
+    assert entry.weighted_score == pytest.approx((52 + 10 * 5.0) / 18)
+    # reviews of other users aren't changed
+    assert crud.update_review(db_session, 1, 2, schemas.ReviewUpdate(score=1)) is None
+    assert crud.update_review(db_session, 2, 1, schemas.ReviewUpdate(score=1)) is None
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_delete_review(db_session):
+    crud.add_review(
+        db_session, schemas.ReviewCreate(movie_id=1, score=7, review_text='Ok'), 1
+    )
+    assert db_session.get(models.LeaderboardEntry, 1) is not None
+
+    assert crud.delete_review(db_session, 1, user_id=1)
+    assert not crud.delete_review(db_session, 1, user_id=1)
+
+    db_session.expire_all()
+    assert db_session.query(models.Review).count() == 0
+    movie = crud.get_movie(db_session, movie_id=1)
+    assert movie is not None
+    assert (movie.avg_score, movie.score_sum, movie.score_number) == (0.0, 0, 0)
+    assert (movie.review_number, movie.score_7_number) == (0, 0)
+    # the movie has no scores to rank it by
+    assert db_session.get(models.LeaderboardEntry, 1) is None
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_change_review_changed_meanwhile(db_session):
+    crud.add_review(db_session, schemas.ReviewCreate(movie_id=1, score=7), 1)
+    review = db_session.execute(crud.select_review_statement(1, None)).first()
+    crud.update_review(db_session, 1, None, schemas.ReviewUpdate(score=3))
+
+    # a change based on the stale score isn't applied
+    statement = crud.review_change_statement(review, {'score': 5})
+    assert db_session.execute(statement).rowcount == 0
+    db_session.rollback()
+
+    crud.change_review(db_session, 1, None, {'score': 5})
+    movie = crud.get_movie(db_session, movie_id=1)
+    assert movie is not None
+    assert (movie.score_sum, movie.score_number, movie.score_5_number) == (5, 1, 1)
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_change_review_write_behind(db_session, write_behind_buffer):
+    crud.add_review(db_session, schemas.ReviewCreate(movie_id=1, score=7), 1)
+
+    assert crud.delete_review(db_session, 1, user_id=1)
+
+    delta = write_behind_buffer.get(1)
+    assert (delta['new_sum'], delta['new_scores'], delta['new_score_7_number']) == (
+        0,
+        0,
+        0,
+    )
+    movie = write_behind_buffer.with_pending(crud.get_movie(db_session, movie_id=1))
+    assert movie.avg_score == 0.0
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_change_review_unbuffered(db_session, write_behind_buffer):
+    crud.add_review(db_session, schemas.ReviewCreate(movie_id=1, score=7), 1)
+    crud.add_review(db_session, schemas.ReviewCreate(movie_id=2, score=5), 1)
+    write_behind_buffer.flush(
+        lambda deltas: crud.update_movie_statistics(db_session, deltas)
+    )
+    db_session.commit()
+
+    # changes of the admin, which has no flushing thread
+    view = ReviewView(models.Review, db_session)
+    form = SimpleNamespace(
+        score=SimpleNamespace(data=9), review_text=SimpleNamespace(data='')
+    )
+    assert view.update_model(form, db_session.get(models.Review, 1))
+    assert view.delete_model(db_session.get(models.Review, 2))
+
+    assert write_behind_buffer.tag() == ''
+    db_session.expire_all()
+    movie = crud.get_movie(db_session, movie_id=1)
+    assert movie is not None
+    assert (movie.score_sum, movie.score_7_number, movie.score_9_number) == (9, 0, 1)
+    movie = crud.get_movie(db_session, movie_id=2)
+    assert movie is not None
+    assert (movie.score_sum, movie.score_number, movie.score_5_number) == (11, 2, 0)
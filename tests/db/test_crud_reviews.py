@@ -0,0 +1,203 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
+
+from app.db import crud, models, schemas
+
+
+@pytest.mark.usefixtures('user', 'movie')
+def test_add_review(db_session):
+    review_schema = schemas.ReviewCreate(
+        movie_id=1, score=3, review_text='Very big review'
+    )
+    db_review = crud.add_review(db_session, review_schema, user_id=1)
+    assert db_review is not None
+
+    created_review = (
+        db_session.query(models.Review).filter(models.Review.id == 1).first()
+    )
+    assert created_review is not None
+    assert (db_review.id, db_review.user_id, db_review.score) == (1, 1, 3)
+    movie = crud.get_movie(db_session, movie_id=1)
+    assert movie is not None
+    assert (movie.score_sum, movie.score_number, movie.review_number) == (3, 1, 1)
+    assert (movie.score_2_number, movie.score_3_number) == (0, 1)
+
+
+@pytest.mark.usefixtures('user', 'movie')
+def test_add_review_failed(db_session):
+    review_schema = schemas.ReviewCreate(movie_id=1, score=3)
+    crud.add_review(db_session, review_schema, user_id=1)
+
+    assert (
+        crud.add_review(db_session, review_schema.copy(update={'movie_id': 2}), 1)
+        is None
+    )
+    with pytest.raises(IntegrityError):
+        crud.add_review(db_session, review_schema, user_id=1)
+
+    # the statistic of the second review is rolled back with it
+    movie = crud.get_movie(db_session, movie_id=1)
+    assert movie is not None
+    assert (movie.avg_score, movie.score_sum, movie.score_number) == (3.0, 3, 1)
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_add_review_write_behind(db_session, write_behind_buffer):
+    review_schema = schemas.ReviewCreate(movie_id=3, score=8, review_text='Nice')
+
+    db_review = crud.add_review(db_session, review_schema, user_id=1)
+    assert db_review is not None
+    assert db_review.id == 1
+    assert (
+        crud.add_review(db_session, review_schema.copy(update={'movie_id': 4}), 1)
+        is None
+    )
+    with pytest.raises(IntegrityError):
+        crud.add_review(db_session, review_schema, user_id=1)
+
+    # the movie is updated by the buffer later
+    movie_row = crud.get_movie_row(db_session, movie_id=3, fields=['avg_score'])
+    assert movie_row is not None
+    assert tuple(movie_row) == (6.0, 3, 42, 7)
+    assert write_behind_buffer.with_pending(movie_row).avg_score == 50 / 8
+
+    write_behind_buffer.flush(
+        lambda deltas: crud.update_movie_statistics(db_session, deltas)
+    )
+    db_session.commit()
+    movie = crud.get_movie(db_session, movie_id=3)
+    assert movie is not None
+    assert (movie.score_sum, movie.score_number, movie.review_number) == (50, 8, 8)
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_add_reviews(db_session):
+    new_reviews = [
+        schemas.ReviewCreate(movie_id=1, score=10, review_text='Great'),
+        schemas.ReviewCreate(movie_id=3, score=9),
+        schemas.ReviewCreate(movie_id=4, score=5),
+        schemas.ReviewCreate(movie_id=1, score=2),
+        schemas.ReviewCreate(movie_id=3, score=7, review_text='Fine'),
+    ]
+
+    assert crud.add_reviews(db_session, new_reviews, user_id=1) == ({2}, {3, 4})
+    # already reviewed before
+    assert crud.add_reviews(
+        db_session, [schemas.ReviewCreate(movie_id=3, score=1)], user_id=1
+    ) == (set(), {0})
+    db_session.commit()
+
+    assert db_session.query(models.Review).count() == 2
+    first_movie = crud.get_movie(db_session, movie_id=1)
+    assert first_movie is not None
+    third_movie = crud.get_movie(db_session, movie_id=3)
+    assert third_movie is not None
+    assert (first_movie.avg_score, first_movie.score_number) == (10.0, 1)
+    assert first_movie.review_number == 1
+    assert third_movie.avg_score == 6.375
+    assert (third_movie.score_number, third_movie.review_number) == (8, 7)
+    assert (third_movie.score_7_number, third_movie.score_9_number) == (0, 1)
+    entry = db_session.get(models.LeaderboardEntry, 3)
+    assert entry.weighted_score == pytest.approx((51 + 10 * 5.0) / 18)
+
+
+@pytest.mark.usefixtures('user', 'movies')
+def test_add_review_batches(db_session, mocker):
+    add_reviews = crud.add_reviews
+
+    def add_reviews_concurrently(db, batch, user_id):
+        if not concurrent:
+            return add_reviews(db, batch, user_id)
+        # movie 3 is reviewed by another request after it was checked
+        concurrent.pop()
+        with db.get_bind().begin() as connection:
+            connection.execute(
+                models.Review.__table__.insert(),
+                {'user_id': user_id, 'movie_id': 3, 'score': 1},
+            )
+        raise IntegrityError('Mock', 'Mock', 'Mock')
+
+    concurrent = [True]
+    mocker.patch(
+        'app.db.crud.reviews.add_reviews', side_effect=add_reviews_concurrently
+    )
+    batches = [
+        [schemas.ReviewCreate(movie_id=1, score=10)],
+        [schemas.ReviewCreate(movie_id=3, score=9)],
+    ]
+
+    assert crud.add_review_batches(db_session, batches, user_id=1) == [
+        (set(), set()),
+        (set(), {0}),
+    ]
+    assert db_session.query(models.Review).count() == 2
+
+    add_reviews_mock = mocker.patch(
+        'app.db.crud.reviews.add_reviews',
+        side_effect=IntegrityError('Mock', 'Mock', 'Mock'),
+    )
+    with pytest.raises(IntegrityError):
+        crud.add_review_batches(db_session, batches, user_id=1, attempts=3)
+    assert add_reviews_mock.call_count == 3
+
+
+@pytest.fixture()
+def reviews(db_session):
+    for user_id in (1, 2):
+        db_session.add(models.User(id=user_id, login=f'user_{user_id}'))
+    db_session.add_all(
+        [
+            models.Review(id=1, user_id=1, movie_id=1, score=8),
+            models.Review(id=2, user_id=2, movie_id=1, score=5),
+            models.Review(id=3, user_id=1, movie_id=3, score=10),
+            models.Review(id=4, user_id=2, movie_id=3, score=7),
+            models.Review(id=5, user_id=1, movie_id=2, score=1),
+        ]
+    )
+    db_session.commit()
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_get_movie_reviews(db_session):
+    first_page = crud.get_movie_reviews(db_session, 1, None, limit=1)
+    second_page = crud.get_movie_reviews(db_session, 1, [2], limit=10)
+
+    assert [review.id for review in first_page] == [2]
+    assert [review.id for review in second_page] == [1]
+    assert crud.get_movie_reviews(db_session, 4, None, limit=10) == []
+    # relationships aren't loaded one by one for reviews of a page
+    with pytest.raises(InvalidRequestError):
+        first_page[0].user  # pylint: disable=pointless-statement
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_get_user_reviews(db_session):
+    user_reviews = crud.get_user_reviews(db_session, 1, None, limit=10)
+
+    assert [review.id for review in user_reviews] == [5, 3, 1]
+    assert crud.get_review_key(user_reviews[0]) == [5]
+    assert [
+        review.id for review in crud.get_user_reviews(db_session, 1, [3], limit=10)
+    ] == [1]
+
+
+@pytest.mark.parametrize(
+    'column, index',
+    [
+        (models.Review.movie_id, 'ix_reviews_movie_id_id'),
+        (models.Review.user_id, 'ix_reviews_user_id_id'),
+    ],
+)
+def test_reviews_query_uses_index(db_session, column, index):
+    review_query = crud.get_reviews_query(column, 1, [10]).limit(10)
+    sql = str(
+        review_query.compile(
+            db_session.get_bind(), compile_kwargs={'literal_binds': True}
+        )
+    )
+
+    (plan,) = db_session.execute(sa.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+
+    # a range of the index, no scan of the table and no sorting
+    assert plan.detail.startswith(f'SEARCH reviews USING INDEX {index}')
@@ -0,0 +1,121 @@
+# pylint: disable=W0621
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.db import database
+
+
+@pytest.fixture()
+def clear_engine_cache():
+    database.get_engine.cache_clear()
+    database.get_session.cache_clear()
+    yield
+    database.get_engine.cache_clear()
+    database.get_session.cache_clear()
+
+
+@pytest.mark.usefixtures('clear_engine_cache')
+def test_engine_is_created_once():
+    assert database.get_engine() is database.get_engine()
+    assert database.get_session() is database.get_session()
+    assert database.get_session().kw['bind'] is database.get_engine()
+
+
+@pytest.mark.usefixtures('clear_engine_cache')
+def test_engine_pool_settings(monkeypatch, tmp_path):
+    monkeypatch.setenv('SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setenv('DB_POOL_SIZE', '3')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '1')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'true')
+
+    pool = database.get_engine().pool
+
+    assert pool.size() == 3
+    assert pool._max_overflow == 1  # pylint: disable=protected-access
+    assert pool._pre_ping  # pylint: disable=protected-access
+
+
+@pytest.mark.usefixtures('clear_engine_cache')
+def test_dispose_engine(mocker):
+    database.dispose_engine()
+    assert database.get_engine.cache_info().currsize == 0
+
+    dispose_mock = mocker.patch.object(database.get_engine(), 'dispose')
+    database.dispose_engine()
+    dispose_mock.assert_called_once()
+
+
+@pytest.fixture()
+def db_file_env(monkeypatch, tmp_path):
+    monkeypatch.setenv('SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "test.db"}')
+
+
+@pytest.mark.usefixtures('clear_engine_cache', 'db_file_env')
+def test_performance_pragmas_applied(caplog):
+    caplog.set_level('INFO', logger='app.db.database')
+    pragmas = database.check_sqlite_pragmas()
+
+    assert pragmas['journal_mode'] == 'wal'
+    assert pragmas['synchronous'] == 1
+    assert pragmas['temp_store'] == 2
+    assert pragmas['busy_timeout'] == 5000
+    assert 'instead of' not in caplog.text
+
+
+@pytest.mark.usefixtures('clear_engine_cache')
+def test_pragmas_not_in_effect_are_reported(monkeypatch, caplog):
+    # WAL isn't available for in-memory databases
+    monkeypatch.setenv('SQLALCHEMY_DATABASE_URI', 'sqlite://')
+    database.check_sqlite_pragmas()
+
+    assert 'journal_mode is memory instead of WAL' in caplog.text
+
+
+@pytest.mark.usefixtures('clear_engine_cache', 'db_file_env')
+def test_unknown_pragma_profile(monkeypatch):
+    monkeypatch.setenv('SQLITE_PRAGMA_PROFILE', 'unknown')
+    with pytest.raises(ValueError, match='unknown'):
+        database.get_engine()
+
+
+@pytest.mark.parametrize(
+    ('database_uri', 'async_database_uri', 'result'),
+    [
+        ('sqlite:////tmp/data.db', None, 'sqlite+aiosqlite:////tmp/data.db'),
+        (
+            'sqlite:////tmp/data.db',
+            'sqlite+aiosqlite:///x.db',
+            'sqlite+aiosqlite:///x.db',
+        ),
+        ('postgresql+asyncpg://db/app', None, 'postgresql+asyncpg://db/app'),
+    ],
+)
+def test_get_async_database_uri(monkeypatch, database_uri, async_database_uri, result):
+    monkeypatch.setenv('SQLALCHEMY_DATABASE_URI', database_uri)
+    if async_database_uri:
+        monkeypatch.setenv('ASYNC_SQLALCHEMY_DATABASE_URI', async_database_uri)
+
+    assert database.get_async_database_uri() == result
+
+
+@pytest.fixture()
+def clear_async_engine_cache():
+    database.get_async_engine.cache_clear()
+    database.get_async_session.cache_clear()
+    yield
+    database.get_async_engine.cache_clear()
+    database.get_async_session.cache_clear()
+
+
+@pytest.mark.usefixtures('clear_async_engine_cache', 'db_file_env')
+def test_async_engine_pragmas():
+    async def _journal_mode():
+        async with database.get_async_session()() as session:
+            result = await session.execute(text('PRAGMA journal_mode'))
+            journal_mode = result.scalar()
+        await database.dispose_async_engine()
+        return journal_mode
+
+    assert asyncio.run(_journal_mode()) == 'wal'
@@ -0,0 +1,117 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.db import crud, models, schemas
+from app.db.init_db import add_columns, get_index_names, init_db, upgrade_db
+
+
+def test_upgrade_db_creates_missing_indexes(db_session):
+    engine = db_session.get_bind()
+    with engine.begin() as connection:
+        connection.exec_driver_sql('DROP INDEX ix_movies_avg_score')
+        connection.exec_driver_sql('DROP INDEX uq_movies_normalized_title')
+    db_session.add_all(
+        [
+            models.Movie(title='Inception', release_year=2010),
+            models.Movie(title='inception', release_year=2010),
+        ]
+    )
+    db_session.commit()
+
+    upgrade_db(engine)
+
+    # the unique index can't be built until duplicates are removed
+    index_names = get_index_names(engine)
+    assert 'ix_movies_avg_score' in index_names
+    assert 'uq_movies_normalized_title' not in index_names
+
+
+def test_add_columns(tmp_path):
+    engine = sa.create_engine(f'sqlite:///{tmp_path / "test.db"}')
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE movies (id INTEGER PRIMARY KEY, avg_score FLOAT,'
+            ' score_number INTEGER)'
+        )
+        connection.exec_driver_sql(
+            'INSERT INTO movies VALUES (1, 0.0, 0), (2, 6.333333, 3)'
+        )
+        connection.exec_driver_sql(
+            'CREATE TABLE reviews (id INTEGER PRIMARY KEY, movie_id INTEGER,'
+            ' score INTEGER)'
+        )
+        connection.exec_driver_sql(
+            'INSERT INTO reviews VALUES (1, 2, 9), (2, 2, 9), (3, 2, 1)'
+        )
+
+    add_columns(engine)
+    add_columns(engine)
+
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql(
+            'SELECT score_sum, score_1_number, score_9_number, score_10_number'
+            ' FROM movies ORDER BY id'
+        )
+        assert result.all() == [(0, 0, 0, 0), (19, 1, 2, 0)]
+        assert (
+            connection.exec_driver_sql(
+                'SELECT count(*) FROM movies WHERE trending_score = 0'
+            ).scalar()
+            == 2
+        )
+        assert (
+            connection.exec_driver_sql(
+                'SELECT count(*) FROM reviews WHERE created_at IS NULL'
+            ).scalar()
+            == 3
+        )
+
+
+def test_add_columns_to_new_database(tmp_path):
+    engine = sa.create_engine(f'sqlite:///{tmp_path / "test.db"}')
+
+    # create_all makes the tables
+    add_columns(engine)
+
+    assert not sa.inspect(engine).has_table('movies')
+
+
+def test_init_db(monkeypatch, tmp_path):
+    engine = sa.create_engine(f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr('app.db.init_db.get_engine', lambda: engine)
+
+    init_db()
+
+    assert 'ix_movies_release_year_avg_score' in get_index_names(engine)
+
+
+def test_init_db_indexes_existing_titles(monkeypatch, tmp_path):
+    engine = sa.create_engine(f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setattr('app.db.init_db.get_engine', lambda: engine)
+    # movies of a database created before the title index
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE movies (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL,'
+            ' release_year INTEGER NOT NULL, avg_score FLOAT NOT NULL,'
+            ' score_number INTEGER NOT NULL, review_number INTEGER NOT NULL)'
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO movies VALUES (1, 'Inception', 2010, 0.0, 0, 0),"
+            " (2, 'Tenet', 2020, 0.0, 0, 0)"
+        )
+        connection.exec_driver_sql(
+            'CREATE TABLE reviews (id INTEGER PRIMARY KEY, user_id INTEGER,'
+            ' movie_id INTEGER, score SMALLINT NOT NULL, review_text TEXT)'
+        )
+
+    init_db()
+    init_db()
+
+    with Session(engine) as session:
+        movies = crud.get_movies(
+            session,
+            schemas.MovieFilters(filter_by_text='ince', filter_by_year=None),
+            limit=10,
+            offset=0,
+        )
+    assert [movie.id for movie in movies] == [1]
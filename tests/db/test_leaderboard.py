@@ -0,0 +1,96 @@
+import pytest
+
+from app.db import crud, leaderboard, models, schemas, trending
+
+
+def get_leaderboard(db_session):
+    return {
+        entry.movie_id: (entry.release_year, round(entry.weighted_score, 4))
+        for entry in db_session.query(models.LeaderboardEntry)
+    }
+
+
+def test_weighted_score():
+    # (score_sum + 10 * 5.0) / (score_number + 10)
+    assert leaderboard.weighted_score(10, 1) == pytest.approx(60 / 11)
+    assert leaderboard.weighted_score(45000, 5000) == pytest.approx(45050 / 5010)
+    assert leaderboard.weighted_score(45000, 5000) > leaderboard.weighted_score(10, 1)
+
+
+@pytest.mark.usefixtures('movies')
+def test_rebuild_leaderboard(db_session, monkeypatch):
+    leaderboard.rebuild_leaderboard(db_session.get_bind())
+    # unreviewed movies aren't ranked
+    assert get_leaderboard(db_session) == {2: (2015, 5.0833), 3: (2020, 5.4118)}
+
+    monkeypatch.setenv('LEADERBOARD_MIN_VOTES', '0')
+    leaderboard.get_prior.cache_clear()
+    leaderboard.rebuild_leaderboard(db_session.get_bind())
+    assert get_leaderboard(db_session) == {2: (2015, 5.5), 3: (2020, 6.0)}
+
+
+@pytest.mark.usefixtures('movies')
+def test_leaderboard_follows_reviews(db_session):
+    crud.update_movie_statistic(
+        db_session,
+        schemas.ReviewCreate(movie_id=1, score=10, review_text=None),
+        trending.utc_now(),
+    )
+    crud.update_movie_statistic(
+        db_session,
+        schemas.ReviewCreate(movie_id=2, score=8, review_text=None),
+        trending.utc_now(),
+    )
+    db_session.commit()
+
+    assert get_leaderboard(db_session) == {1: (2010, 5.4545), 2: (2015, 5.3077)}
+
+
+@pytest.mark.usefixtures('movies')
+def test_leaderboard_follows_movie_changes(db_session):
+    leaderboard.rebuild_leaderboard(db_session.get_bind())
+
+    movie = crud.get_movie(db_session, movie_id=2)
+    assert movie is not None
+    movie.release_year = 2016
+    db_session.delete(crud.get_movie(db_session, movie_id=3))
+    db_session.commit()
+
+    assert get_leaderboard(db_session) == {2: (2016, 5.0833)}
+
+
+@pytest.mark.parametrize(
+    ('release_year', 'after_key', 'result'),
+    [
+        (None, None, [3, 2, 1]),
+        (None, [5.4, 3], [2, 1]),
+        (2015, None, [2]),
+        (2010, [5.5, 1], [1]),
+    ],
+)
+@pytest.mark.usefixtures('movies')
+def test_get_top_movies(db_session, release_year, after_key, result):
+    crud.update_movie_statistic(
+        db_session,
+        schemas.ReviewCreate(movie_id=1, score=5, review_text=None),
+        trending.utc_now(),
+    )
+    db_session.commit()
+    leaderboard.rebuild_leaderboard(db_session.get_bind())
+
+    entries = crud.get_top_movies(db_session, release_year, after_key, limit=10)
+
+    assert [entry.movie_id for entry in entries] == result
+    assert [entry.movie.id for entry in entries] == result
+
+
+@pytest.mark.usefixtures('movies')
+def test_get_top_movies_pages(db_session):
+    leaderboard.rebuild_leaderboard(db_session.get_bind())
+
+    (first,) = crud.get_top_movies(db_session, None, None, limit=1)
+    rest = crud.get_top_movies(
+        db_session, None, crud.get_top_movie_key(first), limit=10
+    )
+
+    assert [first.movie_id] + [entry.movie_id for entry in rest] == [3, 2]
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from app.db import crud, models, recommendations
+
+
+@pytest.fixture()
+def reviews(db_session):
+    # users 1 and 2 like movies 1 and 2 and don't like movie 3, user 3 likes
+    # movie 1 and hasn't seen the rest
+    for user_id in (1, 2, 3):
+        db_session.add(models.User(id=user_id, login=f'user_{user_id}'))
+    for user_id, movie_id, score in [
+        (1, 1, 9),
+        (1, 2, 10),
+        (1, 3, 2),
+        (2, 1, 8),
+        (2, 2, 9),
+        (2, 3, 1),
+        (3, 1, 10),
+    ]:
+        db_session.add(models.Review(user_id=user_id, movie_id=movie_id, score=score))
+    db_session.commit()
+
+
+def test_get_score_matrix():
+    rows = np.array([(1, 1, 4), (1, 2, 0), (2, 1, 3)])
+
+    plain = recommendations.get_score_matrix(rows, adjusted=False)
+    adjusted = recommendations.get_score_matrix(rows, adjusted=True)
+
+    assert plain.shape == (3, 3)
+    assert plain[1, 1] == pytest.approx(0.8)
+    assert plain[2, 1] == pytest.approx(0.6)
+    # user 1 scores 2 on average, user 2 has one score that is the mean
+    assert (adjusted[1, 1], adjusted[1, 2]) == (1.0, -1.0)
+    assert adjusted[2, 1] == 0.0
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_build_neighbours(db_session, workers):
+    engine = db_session.get_bind()
+
+    result = recommendations.build_neighbours(
+        engine,
+        recommendations.NeighbourOptions(
+            k=1, adjusted=False, workers=workers, block_size=2
+        ),
+    )
+
+    assert result == recommendations.NeighbourBuild(movies=3, neighbours=3)
+    neighbours = {
+        neighbour.movie_id: neighbour.neighbour_id
+        for neighbour in db_session.query(models.MovieNeighbour)
+    }
+    # plain cosine pairs movies scored by the same users, whatever the scores
+    assert neighbours == {1: 2, 2: 3, 3: 2}
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_build_neighbours_adjusted(db_session):
+    engine = db_session.get_bind()
+    # the old neighbours are replaced
+    db_session.add(models.MovieNeighbour(movie_id=1, neighbour_id=3, similarity=1))
+    db_session.commit()
+
+    recommendations.build_neighbours(
+        engine, recommendations.NeighbourOptions(workers=1)
+    )
+
+    similarities = {
+        (neighbour.movie_id, neighbour.neighbour_id): neighbour.similarity
+        for neighbour in db_session.query(models.MovieNeighbour)
+    }
+    # liked by the same users, movie 3 is scored below their means
+    assert set(similarities) == {(1, 2), (2, 1)}
+    assert similarities[1, 2] == pytest.approx(similarities[2, 1])
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_build_neighbours_lets_reviews_be_written(db_session, mocker):
+    engine = db_session.get_bind()
+    iter_neighbours = recommendations.iter_neighbours
+
+    def iter_neighbours_with_a_review(*args):
+        # another writer while similarities are computed, the database
+        # isn't locked by the build yet
+        with engine.begin() as connection:
+            connection.exec_driver_sql('PRAGMA busy_timeout = 0')
+            connection.exec_driver_sql(
+                'UPDATE reviews SET review_text = ? WHERE id = 1', ('Edited',)
+            )
+        yield from iter_neighbours(*args)
+
+    mocker.patch(
+        'app.db.recommendations.iter_neighbours',
+        side_effect=iter_neighbours_with_a_review,
+    )
+
+    result = recommendations.build_neighbours(
+        engine, recommendations.NeighbourOptions(workers=1, chunk_size=1)
+    )
+
+    assert result.neighbours == db_session.query(models.MovieNeighbour).count() == 2
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_get_recommendations(db_session):
+    recommendations.build_neighbours(
+        db_session.get_bind(),
+        recommendations.NeighbourOptions(adjusted=False, workers=1),
+    )
+
+    rows = crud.get_recommendations(db_session, user_id=3, limit=10)
+
+    assert [(movie.id, score) for movie, score in rows] == [(2, 10.0), (3, 10.0)]
+    assert crud.get_recommendations(db_session, user_id=3, limit=1)[0][0].id == 2
+    # everything is reviewed
+    assert crud.get_recommendations(db_session, user_id=1, limit=10) == []
+
+
+def test_build_neighbours_without_reviews(db_session):
+    result = recommendations.build_neighbours(
+        db_session.get_bind(), recommendations.NeighbourOptions(workers=1)
+    )
+    assert result == recommendations.NeighbourBuild(movies=0, neighbours=0)
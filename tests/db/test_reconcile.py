@@ -0,0 +1,64 @@
+import pytest
+
+from app.db import crud, models, reconcile, schemas
+
+
+@pytest.fixture()
+def reviews(db_session):
+    # movie 2 is drifted by a review added bypassing crud
+    for user_id in (1, 2, 3):
+        db_session.add(models.User(id=user_id, login=f'user_{user_id}'))
+    db_session.commit()
+    for user_id, movie_id, score, text in [
+        (1, 1, 8, 'Nice'),
+        (2, 1, 5, None),
+        (1, 3, 10, None),
+        (2, 3, 7, 'Long'),
+    ]:
+        crud.add_review(
+            db_session,
+            schemas.ReviewCreate(movie_id=movie_id, score=score, review_text=text),
+            user_id=user_id,
+        )
+    db_session.add(models.Review(user_id=3, movie_id=2, score=4))
+    db_session.commit()
+
+
+def test_split_ids():
+    assert reconcile.split_ids(1, 10, 3) == [(0, 3), (3, 7), (7, 10)]
+    assert reconcile.split_ids(5, 5, 4) == [(4, 5)]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_reconcile_statistics(db_session, workers):
+    engine = db_session.get_bind()
+
+    # the fixture movies have scores without reviews
+    result = reconcile.reconcile_statistics(engine, workers=workers, chunk_size=2)
+    assert result == reconcile.Reconciliation(checked=3, drifted=[2, 3], fixed=0)
+
+    result = reconcile.reconcile_statistics(engine, fix=True, workers=workers)
+    assert result.fixed == 2
+
+    db_session.expire_all()
+    statistics = {
+        movie.id: (movie.avg_score, movie.score_sum, movie.score_number)
+        for movie in db_session.query(models.Movie)
+    }
+    assert statistics == {1: (6.5, 13, 2), 2: (4.0, 4, 1), 3: (8.5, 17, 2)}
+    histogram = crud.get_movie_row(
+        db_session, movie_id=1, fields=models.HISTOGRAM_FIELDS
+    )
+    assert histogram is not None
+    assert list(histogram) == [0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0]
+    movie = crud.get_movie(db_session, movie_id=3)
+    assert movie is not None
+    assert movie.review_number == 1
+    assert db_session.get(models.LeaderboardEntry, 2) is not None
+    assert reconcile.reconcile_statistics(engine, workers=workers).drifted == []
+
+
+def test_reconcile_empty_database(db_session):
+    result = reconcile.reconcile_statistics(db_session.get_bind(), workers=1)
+    assert result == reconcile.Reconciliation(checked=0, drifted=[], fixed=0)
@@ -0,0 +1,200 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.db import crud, models, schemas, trending
+
+
+@pytest.fixture()
+def reviews(db_session, review_time):
+    # movie 1 is reviewed a week after the epoch, movie 3 three weeks after it
+    for user_id in (1, 2, 3):
+        db_session.add(models.User(id=user_id, login=f'user_{user_id}'))
+    db_session.commit()
+    for user_id, movie_id, when in [
+        (1, 1, datetime(2024, 1, 8)),
+        (2, 1, datetime(2024, 1, 8)),
+        (1, 3, datetime(2024, 1, 22)),
+    ]:
+        review_time['now'] = when
+        crud.add_review(
+            db_session, schemas.ReviewCreate(movie_id=movie_id, score=7), user_id
+        )
+
+
+def get_trending_scores(db_session):
+    db_session.expire_all()
+    return {movie.id: movie.trending_score for movie in db_session.query(models.Movie)}
+
+
+def test_get_weight():
+    assert trending.get_weight(datetime(2024, 1, 1)) == pytest.approx(1.0)
+    assert trending.get_weight(datetime(2024, 1, 8)) == pytest.approx(2.0)
+    assert trending.get_weight(datetime(2023, 12, 25)) == pytest.approx(0.5)
+    # reviews of unknown times count as old
+    assert trending.get_weight(None) == 0.0
+
+
+def test_decay(monkeypatch):
+    # a review counts 1 when it's written, half as much a half-life later
+    written_at = datetime(2024, 3, 4, 12)
+    assert trending.decay(trending.get_weight(written_at), written_at) == pytest.approx(
+        1.0
+    )
+    assert trending.decay(4.0, datetime(2024, 1, 15)) == pytest.approx(1.0)
+
+    monkeypatch.setenv('TRENDING_HALF_LIFE', str(24 * 3600))
+    trending.get_decay.cache_clear()
+    assert trending.decay(4.0, datetime(2024, 1, 3)) == pytest.approx(1.0)
+    # a rounding residue below 0
+    assert trending.decay(-1e-3, datetime(2024, 1, 3)) == 0.0
+
+
+def test_get_weight_overflow(monkeypatch, caplog):
+    # more than a thousand half-lives after the epoch
+    monkeypatch.setenv('TRENDING_HALF_LIFE', '1')
+    trending.get_decay.cache_clear()
+
+    assert trending.get_weight(datetime(2024, 1, 8)) == 0.0
+    assert trending.EPOCH_WARNING in caplog.text
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_reviews_add_trending_scores(db_session, review_time):
+    assert get_trending_scores(db_session) == pytest.approx({1: 4.0, 2: 0.0, 3: 8.0})
+    review = db_session.query(models.Review).filter_by(movie_id=3).one()
+    assert review.created_at == datetime(2024, 1, 22)
+
+    # an edit keeps the weight of the review, a delete takes it off
+    review_id = db_session.query(models.Review.id).filter_by(user_id=2).scalar()
+    crud.update_review(db_session, review_id, 2, schemas.ReviewUpdate(score=1))
+    assert get_trending_scores(db_session)[1] == pytest.approx(4.0)
+    assert crud.delete_review(db_session, review_id, 2)
+    assert get_trending_scores(db_session)[1] == pytest.approx(2.0)
+
+    review_time['now'] = datetime(2024, 1, 15)
+    crud.add_reviews(db_session, [schemas.ReviewCreate(movie_id=2, score=5)], 3)
+    db_session.commit()
+    assert get_trending_scores(db_session) == pytest.approx({1: 2.0, 2: 4.0, 3: 8.0})
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_last_review_removed(db_session):
+    # what's left of the weights after rounding
+    with db_session.get_bind().begin() as connection:
+        connection.exec_driver_sql(
+            'UPDATE movies SET trending_score = trending_score + 1e-9 WHERE id = 1'
+        )
+
+    for user_id in (1, 2):
+        review_id = (
+            db_session.query(models.Review.id)
+            .filter_by(user_id=user_id, movie_id=1)
+            .scalar()
+        )
+        assert crud.delete_review(db_session, review_id, user_id)
+
+    assert get_trending_scores(db_session)[1] == 0.0
+    movies = crud.get_trending_movies(db_session, None, limit=10)
+    assert [movie.id for movie in movies] == [3]
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_get_trending_movies(db_session):
+    movies = crud.get_trending_movies(db_session, None, limit=10)
+    # unreviewed movies aren't trending
+    assert [movie.id for movie in movies] == [3, 1]
+
+    after_key = crud.get_trending_movie_key(movies[0])
+    movies = crud.get_trending_movies(db_session, after_key, limit=10)
+    assert [movie.id for movie in movies] == [1]
+
+
+@pytest.mark.usefixtures('movies', 'review_time')
+def test_add_review_write_behind(db_session, write_behind_buffer):
+    crud.add_review(db_session, schemas.ReviewCreate(movie_id=1, score=7), 1)
+    assert write_behind_buffer.get(1)['new_trending'] == pytest.approx(2.0)
+
+    write_behind_buffer.flush(
+        lambda deltas: crud.update_movie_statistics(db_session, deltas)
+    )
+    db_session.commit()
+    assert get_trending_scores(db_session)[1] == pytest.approx(2.0)
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_review_of_unknown_time(db_session):
+    # written before times were kept
+    db_session.add(models.Review(id=10, user_id=3, movie_id=1, score=5))
+    db_session.commit()
+
+    assert crud.delete_review(db_session, 10, 3)
+    assert get_trending_scores(db_session)[1] == pytest.approx(4.0)
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_rebuild_trending(db_session, monkeypatch):
+    engine = db_session.get_bind()
+    # a review of an unknown time adds nothing
+    db_session.add(models.Review(user_id=3, movie_id=2, score=5))
+    db_session.commit()
+    with engine.begin() as connection:
+        connection.exec_driver_sql('UPDATE movies SET trending_score = 100')
+
+    assert trending.rebuild_trending(engine, chunk_size=2) == 3
+    assert get_trending_scores(db_session) == pytest.approx({1: 4.0, 2: 0.0, 3: 8.0})
+
+    # scores of other settings
+    monkeypatch.setenv('TRENDING_HALF_LIFE', str(14 * 24 * 3600))
+    monkeypatch.setenv('TRENDING_EPOCH', '2024-01-08T00:00:00')
+    trending.get_decay.cache_clear()
+    trending.rebuild_trending(engine)
+    assert get_trending_scores(db_session) == pytest.approx({1: 2.0, 2: 0.0, 3: 2.0})
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_rebuild_trending_reviews_changed_meanwhile(db_session, mocker, review_time):
+    engine = db_session.get_bind()
+    bincount = trending.np.bincount
+    written: list[bool] = []
+
+    def bincount_with_reviews(*args, **kwargs):
+        # other writers while the first chunk is counted, they aren't kept waiting
+        if not written:
+            written.append(True)
+            review_time['now'] = datetime(2024, 1, 15)
+            with engine.connect() as connection:
+                connection.exec_driver_sql('PRAGMA busy_timeout = 0')
+                session = Session(bind=connection)
+                # one review counted already, one not yet, one new
+                assert crud.delete_review(session, 1, 1)
+                assert crud.delete_review(session, 3, 1)
+                crud.add_review(session, schemas.ReviewCreate(movie_id=2, score=5), 3)
+                session.close()
+        return bincount(*args, **kwargs)
+
+    mocker.patch.object(trending.np, 'bincount', side_effect=bincount_with_reviews)
+
+    assert trending.rebuild_trending(engine, chunk_size=1) == 2
+    assert written
+    scores = {1: 2.0, 2: 4.0, 3: 0.0}
+    assert get_trending_scores(db_session) == pytest.approx(scores)
+    # as counted from scratch
+    mocker.stopall()
+    trending.rebuild_trending(engine)
+    assert get_trending_scores(db_session) == pytest.approx(scores)
+
+
+@pytest.mark.usefixtures('movies', 'reviews')
+def test_rebuild_trending_overflow(db_session, monkeypatch, caplog):
+    monkeypatch.setenv('TRENDING_HALF_LIFE', '1')
+    trending.get_decay.cache_clear()
+
+    assert trending.rebuild_trending(db_session.get_bind()) == 3
+    assert get_trending_scores(db_session) == {1: 0.0, 2: 0.0, 3: 0.0}
+    assert trending.EPOCH_WARNING in caplog.text
+
+
+def test_rebuild_trending_empty_database(db_session):
+    assert trending.rebuild_trending(db_session.get_bind()) == 0
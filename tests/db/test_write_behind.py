@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+
+from app.db import crud, models, write_behind
+from app.db.write_behind import Delta, PendingStatistic, StatisticBuffer
+
+
+def delta(movie_id, new_sum, new_scores=1, new_texts=0):
+    return {
+        'movie_id': movie_id,
+        'new_sum': new_sum,
+        'new_scores': new_scores,
+        'new_texts': new_texts,
+    }
+
+
+def test_pending_statistic():
+    movie = models.Movie(
+        id=1, title='Tenet', score_sum=42, score_number=7, review_number=7
+    )
+
+    pending = PendingStatistic(movie, delta(1, 9, new_scores=2, new_texts=1))
+
+    assert (pending.id, pending.title) == (1, 'Tenet')
+    assert (pending.score_sum, pending.score_number) == (51, 9)
+    assert pending.avg_score == pytest.approx(51 / 9)
+    assert pending.review_number == 8
+    # the movie itself is left as it is
+    assert movie.score_sum == 42
+
+
+def test_pending_statistic_histogram():
+    movie = models.Movie(
+        id=1, **{**dict.fromkeys(models.HISTOGRAM_FIELDS, 0), 'score_5_number': 2}
+    )
+
+    pending = PendingStatistic(
+        movie,
+        {
+            **delta(1, 11, new_scores=2),
+            **dict.fromkeys(crud.HISTOGRAM_DELTA_KEYS, 0),
+            'new_score_5_number': 1,
+            'new_score_6_number': 1,
+        },
+    )
+
+    assert (pending.score_5_number, pending.score_6_number) == (3, 1)
+    assert pending.score_7_number == 0
+
+
+def test_buffer_adds_pending_scores():
+    buffer = StatisticBuffer(flush_size=10, flush_interval=60)
+    movie = models.Movie(id=1, score_sum=0, score_number=0, review_number=0)
+    assert buffer.tag() == ''
+    assert buffer.with_pending(movie) is movie
+
+    buffer.add([delta(1, 10, new_texts=1), delta(2, 5)])
+    buffer.add([delta(1, 4)])
+    first_tag = buffer.tag()
+    buffer.add([delta(2, 1)])
+
+    assert buffer.get(1) == delta(1, 14, new_scores=2, new_texts=1)
+    assert buffer.get(3) is None
+    assert buffer.with_pending(movie).avg_score == 7.0
+    assert first_tag not in ('', buffer.tag())
+
+
+def test_buffer_flush():
+    buffer = StatisticBuffer(flush_size=10, flush_interval=60)
+    written: list[Delta] = []
+    buffer.add([delta(1, 10), delta(1, 2)])
+
+    buffer.flush(written.extend)
+    buffer.flush(written.extend)
+
+    assert written == [delta(1, 12, new_scores=2)]
+    assert buffer.get(1) is None
+    assert buffer.tag() == ''
+
+
+def test_buffer_flush_failed():
+    buffer = StatisticBuffer(flush_size=10, flush_interval=60)
+    buffer.add([delta(1, 10)])
+
+    def write(_):
+        # a score added while the others are being written
+        assert buffer.get(1) == delta(1, 10)
+        buffer.add([delta(1, 2)])
+        raise RuntimeError('database is locked')
+
+    buffer.flush(write)
+
+    # the scores are kept for the next flush
+    assert buffer.get(1) == delta(1, 12, new_scores=2)
+
+
+def test_buffer_flushed_by_thread():
+    buffer = StatisticBuffer(flush_size=2, flush_interval=60)
+    written = []
+    flushed = threading.Event()
+
+    def write(deltas):
+        written.extend(deltas)
+        flushed.set()
+
+    buffer.start(write)
+    buffer.start(write)
+    buffer.add([delta(1, 10)])
+    buffer.add([delta(2, 5)])
+    # the size is reached, it's flushed long before the interval
+    assert flushed.wait(5)
+    buffer.add([delta(3, 1)])
+    buffer.stop(write)
+
+    assert written == [delta(1, 10), delta(2, 5), delta(3, 1)]
+    assert buffer.tag() == ''
+
+
+def test_get_statistic_buffer(monkeypatch):
+    assert write_behind.get_statistic_buffer() is None
+    assert write_behind.get_pending_tag() == ''
+
+    monkeypatch.setenv('STATISTIC_WRITE_BEHIND', 'true')
+    monkeypatch.setenv('STATISTIC_FLUSH_SIZE', '5')
+    write_behind.get_statistic_buffer.cache_clear()
+
+    buffer = write_behind.get_statistic_buffer()
+    assert buffer is not None
+    assert buffer.flush_size == 5
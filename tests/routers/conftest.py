@@ -1,8 +1,14 @@
 # pylint: disable=W0621
+from datetime import datetime
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.auth import get_credential_cache
 from app.db import models
+from app.db.write_behind import get_statistic_buffer
+from app.fieldsets import fast_serialization
+from app.http_cache import get_cache_control
 from app.main import app
 
 
@@ -41,6 +47,7 @@ def movie():
         title='test_movie',
         release_year=2010,
         avg_score=0.0,
+        score_sum=0,
         score_number=0,
         review_number=0,
     )
@@ -51,11 +58,6 @@ def get_movie_mock(mocker):
     return mocker.patch('app.db.crud.get_movie')
 
 
-@pytest.fixture()
-def get_movie_by_title_mock(mocker):
-    return mocker.patch('app.db.crud.get_movie_by_title')
-
-
 @pytest.fixture()
 def create_movie_mock(mocker):
     return mocker.patch('app.db.crud.create_movie')
@@ -66,15 +68,15 @@ def add_review_mock(mocker):
     return mocker.patch('app.db.crud.add_review')
 
 
-@pytest.fixture()
-def update_movie_mock(mocker):
-    mocker.patch('app.db.crud.update_movie_statistic')
-
-
 @pytest.fixture()
 def review():
     return models.Review(
-        id=1, user_id=1, movie_id=1, score=10, review_text='Nice movie!'
+        id=1,
+        user_id=1,
+        movie_id=1,
+        score=10,
+        review_text='Nice movie!',
+        created_at=datetime(2024, 1, 8, 12, 30),
     )
 
 
@@ -83,3 +85,28 @@ def auth_mock(get_user_by_login_mock, user):
     # here we mock get_user_by_login function that is used in auth dependency
     # now we can authorize with user's credentials ('test_user', '12345678')
     get_user_by_login_mock.return_value = user
+
+
+@pytest.fixture(autouse=True)
+def _clear_credential_cache():
+    # verified credentials must not leak between tests with different user mocks
+    get_credential_cache().clear()
+
+
+@pytest.fixture(autouse=True)
+def catalog_version_mock(mocker):
+    # the version for ETags of movie endpoints, bumped by tests that change it
+    mocker.patch('app.db.async_crud.get_catalog_version', return_value=1)
+    return mocker.patch('app.db.crud.get_catalog_version', return_value=1)
+
+
+@pytest.fixture(autouse=True)
+def _clear_cached_settings():
+    # settings read once per process, tests change them with monkeypatch.setenv
+    get_cache_control.cache_clear()
+    fast_serialization.cache_clear()
+    get_statistic_buffer.cache_clear()
+    yield
+    get_cache_control.cache_clear()
+    fast_serialization.cache_clear()
+    get_statistic_buffer.cache_clear()
@@ -0,0 +1,289 @@
+# pylint: disable=W0621
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+
+from app.db import models
+from app.exceptions import (
+    InvalidCredentials,
+    MovieAlreadyRegistered,
+    MovieNotFound,
+    ReviewAlreadyExists,
+    ReviewNotFound,
+    UserNotFound,
+)
+from app.main import create_app
+from tests.routers.test_views import headers_for_auth, headers_for_token
+
+
+@pytest.fixture()
+def async_client(monkeypatch):
+    monkeypatch.setenv('ASYNC_DB', 'true')
+    return TestClient(create_app())
+
+
+@pytest.fixture()
+def async_crud_mock(mocker):
+    # functions of app.db.async_crud are coroutines so patch makes AsyncMocks
+    return lambda name: mocker.patch(f'app.db.async_crud.{name}')
+
+
+@pytest.fixture()
+def async_auth_mock(async_crud_mock, user):
+    async_crud_mock('get_user_by_login').return_value = user
+
+
+def test_async_routes_replace_sync_ones(async_client):
+    endpoints = {
+        route.path: route.endpoint.__module__ for route in async_client.app.routes
+    }
+    assert endpoints['/movies/{movie_id}'] == 'app.routers.aio.movies'
+    assert endpoints['/movies/{movie_id}/histogram'] == 'app.routers.aio.histogram'
+    assert endpoints['/reviews/'] == 'app.routers.aio.reviews'
+    assert endpoints['/users/me'] == 'app.routers.aio.users'
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_authorized_user(async_client):
+    response = async_client.get(
+        '/users/me', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {'login': 'test_user', 'id': 1}
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_authorized_user_failed(async_client):
+    response = async_client.get(
+        '/users/me', headers=headers_for_auth('test_user', 'password')
+    )
+    assert response.status_code == InvalidCredentials.status_code, response.text
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_user(async_client, async_crud_mock, user):
+    async_crud_mock('get_user').return_value = user
+
+    response = async_client.get(
+        '/users/1', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['login'] == 'test_user'
+
+    async_crud_mock('get_user').return_value = None
+    response = async_client.get(
+        '/users/1', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == UserNotFound.status_code, response.text
+
+
+def test_create_user(async_client, async_crud_mock, user):
+    async_crud_mock('get_user_by_login').return_value = None
+    async_crud_mock('create_user').return_value = user
+
+    response = async_client.post(
+        '/users/', json={'login': 'test_user', 'password': '12345678'}
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['id'] == 1
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_movie(async_client, async_crud_mock, movie):
+    async_crud_mock('get_movie').return_value = movie
+
+    response = async_client.get(
+        '/movies/1', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['title'] == 'test_movie'
+
+    async_crud_mock('get_movie').return_value = None
+    response = async_client.get(
+        '/movies/1', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == MovieNotFound.status_code, response.text
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_movie_histogram(async_client, async_crud_mock):
+    get_movie_row_mock = async_crud_mock('get_movie_row')
+    get_movie_row_mock.return_value = models.Movie(
+        id=1, **dict.fromkeys(models.HISTOGRAM_FIELDS, 1)
+    )
+
+    response = async_client.get(
+        '/movies/1/histogram', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['median'] == 5.0
+
+    get_movie_row_mock.return_value = None
+    response = async_client.get(
+        '/movies/1/histogram', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == MovieNotFound.status_code, response.text
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_recommendations(async_client, async_crud_mock, movie):
+    async_crud_mock('get_recommendations').return_value = [(movie, 7.0)]
+
+    response = async_client.get(
+        '/users/me/recommendations', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()[0]['predicted_score'] == 7.0
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_reviews(async_client, async_crud_mock, review):
+    async_crud_mock('get_movie_reviews').return_value = [review]
+    async_crud_mock('get_user_reviews').return_value = []
+    async_crud_mock('get_user_row').return_value = None
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = async_client.get('/movies/1/reviews', headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['items'][0]['id'] == 1
+
+    response = async_client.get('/users/2/reviews', headers=headers)
+    assert response.status_code == UserNotFound.status_code, response.text
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_movie_not_modified(async_client, async_crud_mock, movie):
+    get_movie_mock = async_crud_mock('get_movie')
+    get_movie_mock.return_value = movie
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = async_client.get('/movies/1', headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+
+    get_movie_mock.reset_mock()
+    response = async_client.get(
+        '/movies/1', headers={**headers, 'If-None-Match': response.headers['ETag']}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    get_movie_mock.assert_not_called()
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_create_movie(async_client, async_crud_mock, movie):
+    create_movie_mock = async_crud_mock('create_movie')
+    create_movie_mock.return_value = movie
+
+    response = async_client.post(
+        '/movies/',
+        headers=headers_for_auth('test_user', '12345678'),
+        json={'title': 'test_movie', 'release_year': '2010'},
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['id'] == 1
+
+    create_movie_mock.return_value = None
+    response = async_client.post(
+        '/movies/',
+        headers=headers_for_auth('test_user', '12345678'),
+        json={'title': 'test_movie', 'release_year': '2010'},
+    )
+    assert response.status_code == MovieAlreadyRegistered.status_code, response.text
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_change_review(async_client, async_crud_mock, review):
+    async_crud_mock('update_review').return_value = review
+    delete_review_mock = async_crud_mock('delete_review')
+    delete_review_mock.return_value = False
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = async_client.patch(
+        '/reviews/1', headers=headers, json={'review_text': None}
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['id'] == 1
+
+    response = async_client.delete('/reviews/1', headers=headers)
+    assert response.status_code == ReviewNotFound.status_code, response.text
+    delete_review_mock.assert_awaited_once()
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_add_review(async_client, async_crud_mock, review):
+    add_review_mock = async_crud_mock('add_review')
+    add_review_mock.return_value = review
+
+    response = async_client.post(
+        '/reviews/',
+        headers=headers_for_auth('test_user', '12345678'),
+        json={'movie_id': 1, 'score': 10, 'review_text': 'Nice movie!'},
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['score'] == 10
+    assert response.json()['id'] == 1
+    add_review_mock.assert_awaited_once()
+
+    add_review_mock.return_value = None
+    response = async_client.post(
+        '/reviews/',
+        headers=headers_for_auth('test_user', '12345678'),
+        json={'movie_id': 2, 'score': 10, 'review_text': None},
+    )
+    assert response.status_code == MovieNotFound.status_code, response.text
+
+    add_review_mock.side_effect = IntegrityError('Mock', 'Mock', 'Mock')
+    response = async_client.post(
+        '/reviews/',
+        headers=headers_for_auth('test_user', '12345678'),
+        json={'movie_id': 1, 'score': 10, 'review_text': 'Nice movie!'},
+    )
+    assert response.status_code == ReviewAlreadyExists.status_code, response.text
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_token_auth(async_client):
+    response = async_client.post(
+        '/users/token', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+
+    response = async_client.get(
+        '/users/me', headers=headers_for_token(response.json()['access_token'])
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {'login': 'test_user', 'id': 1}
+
+    response = async_client.get('/users/me')
+    assert response.status_code == InvalidCredentials.status_code, response.text
+
+
+@pytest.mark.usefixtures('async_auth_mock')
+def test_get_fields(async_client, async_crud_mock, movie, user):
+    async_crud_mock('get_movie_rows').return_value = [movie]
+    async_crud_mock('count_movies').return_value = 1
+    async_crud_mock('get_movie_rows_after').return_value = [movie]
+    async_crud_mock('get_movie_row').return_value = movie
+    async_crud_mock('get_user_row').return_value = user
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = async_client.get('/movies', params={'fields': 'id'}, headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['items'] == [{'id': 1}]
+
+    response = async_client.get(
+        '/movies',
+        params={'fields': 'id', 'pagination': 'cursor'},
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+
+    response = async_client.get('/movies/1', params={'fields': 'id'}, headers=headers)
+    assert response.json() == {'id': 1}
+
+    response = async_client.get('/users/me', params={'fields': 'id'}, headers=headers)
+    assert response.json() == {'id': 1}
+
+    response = async_client.get('/users/1', params={'fields': 'id'}, headers=headers)
+    assert response.json() == {'id': 1}
@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.exceptions import (
+    InvalidBulkBody,
+    MovieAlreadyRegistered,
+    MovieNotFound,
+    ReviewAlreadyExists,
+    UnsupportedBulkFormat,
+)
+from tests.routers.test_views import headers_for_auth
+
+
+@pytest.mark.parametrize(
+    ('content_type', 'content'),
+    [
+        (
+            'application/json',
+            '[{"title": "Alien", "release_year": 1979}, {"title": "Arrival"},'
+            ' {"title": "Tenet", "release_year": 2020}]',
+        ),
+        (
+            'application/x-ndjson',
+            '{"title": "Alien", "release_year": 1979}\n{"title": "Arrival"}\n'
+            '{"title": "Tenet", "release_year": 2020}\n',
+        ),
+        ('text/csv', 'title,release_year\nAlien,1979\nArrival\nTenet,2020\n'),
+    ],
+    ids=['json', 'ndjson', 'csv'],
+)
+@pytest.mark.usefixtures('auth_mock')
+def test_create_movies(client, mocker, content_type, content):
+    # the second valid movie is a duplicate
+    create_movies_mock = mocker.patch(
+        'app.db.crud.create_movies', return_value=[True, False]
+    )
+
+    response = client.post(
+        '/movies/bulk',
+        data=content,
+        headers={
+            **headers_for_auth('test_user', '12345678'),
+            'Content-Type': content_type,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['created'] == 1
+    assert [error['index'] for error in data['errors']] == [1, 2]
+    assert data['errors'][1]['detail'] == MovieAlreadyRegistered.detail
+    assert [movie.title for movie in create_movies_mock.call_args.args[1]] == [
+        'Alien',
+        'Tenet',
+    ]
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_add_reviews(client, mocker):
+    # the second valid review is of an unknown movie, the third is a duplicate
+    add_reviews_mock = mocker.patch(
+        'app.db.crud.reviews.add_reviews', return_value=({1}, {2})
+    )
+
+    response = client.post(
+        '/reviews/bulk',
+        data='movie_id,score,review_text\n1,10,Nice\n2,11,\n4,5,\n1,8,Again\n',
+        headers={
+            **headers_for_auth('test_user', '12345678'),
+            'Content-Type': 'text/csv',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['created'] == 1
+    assert [error['index'] for error in data['errors']] == [1, 2, 3]
+    assert data['errors'][1]['detail'] == MovieNotFound.detail
+    assert data['errors'][2]['detail'] == ReviewAlreadyExists.detail
+    reviews = add_reviews_mock.call_args.args[1]
+    assert [review.movie_id for review in reviews] == [1, 4, 1]
+    assert add_reviews_mock.call_args.args[2] == 1
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_add_reviews_concurrently(client, mocker):
+    mocker.patch(
+        'app.db.crud.reviews.add_reviews',
+        side_effect=IntegrityError('Mock', 'Mock', 'Mock'),
+    )
+
+    response = client.post(
+        '/reviews/bulk',
+        data='[{"movie_id": 1, "score": 10}]',
+        headers={
+            **headers_for_auth('test_user', '12345678'),
+            'Content-Type': 'application/json',
+        },
+    )
+
+    assert response.status_code == ReviewAlreadyExists.status_code, response.text
+
+
+@pytest.mark.parametrize(
+    ('content_type', 'exception'),
+    [('text/plain', UnsupportedBulkFormat), ('application/json', InvalidBulkBody)],
+)
+@pytest.mark.usefixtures('auth_mock')
+def test_create_movies_failed(client, content_type, exception):
+    response = client.post(
+        '/movies/bulk',
+        data='{}',
+        headers={
+            **headers_for_auth('test_user', '12345678'),
+            'Content-Type': content_type,
+        },
+    )
+    assert response.status_code == exception.status_code, response.text
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+
+from app.db import crud, schemas, trending
+from app.db.write_behind import get_statistic_buffer
+from tests.routers.test_views import headers_for_auth
+
+
+@pytest.mark.parametrize(
+    ('export_format', 'content_type', 'content'),
+    [
+        (
+            'ndjson',
+            'application/x-ndjson',
+            '{"id":1,"title":"test_movie"}\n{"id":2,"title":"Alien"}\n',
+        ),
+        ('csv', 'text/csv', 'id,title\r\n1,test_movie\r\n2,Alien\r\n'),
+    ],
+)
+@pytest.mark.usefixtures('auth_mock')
+def test_export_movies(client, mocker, export_format, content_type, content):
+    iter_movie_rows_mock = mocker.patch(
+        'app.db.crud.iter_movie_rows', return_value=[(1, 'test_movie'), (2, 'Alien')]
+    )
+
+    response = client.get(
+        '/movies/export',
+        params={'format': export_format, 'fields': 'id,title', 'filter_by_year': 2010},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.headers['content-type'].startswith(content_type)
+    assert response.text == content
+    movie_filters = iter_movie_rows_mock.call_args.args[1]
+    assert movie_filters.filter_by_year == 2010
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_export_movies_write_behind(client, mocker, monkeypatch, movie):
+    monkeypatch.setenv('STATISTIC_WRITE_BEHIND', 'true')
+    get_statistic_buffer.cache_clear()
+    buffer = get_statistic_buffer()
+    assert buffer is not None
+    buffer.add(
+        crud.get_movie_statistic_deltas(
+            [schemas.ReviewCreate(movie_id=1, score=8)], trending.utc_now()
+        )
+    )
+    iter_movie_rows_mock = mocker.patch(
+        'app.db.crud.iter_movie_rows', return_value=[movie]
+    )
+
+    response = client.get(
+        '/movies/export',
+        params={'format': 'csv', 'fields': 'id,avg_score,score_number'},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+
+    assert response.text == 'id,avg_score,score_number\r\n1,8.0,1\r\n'
+    # selected along with the fields the pending scores are added to
+    assert iter_movie_rows_mock.call_args.args[2][-3:] == [
+        'id',
+        'score_sum',
+        'score_number',
+    ]
@@ -0,0 +1,143 @@
+from http import HTTPStatus
+
+import pytest
+
+from app.exceptions import MovieNotFound, UnknownField, UserNotFound
+from app.fieldsets import MOVIE_FIELDS
+from tests.routers.test_views import headers_for_auth
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movies_fields(client, mocker, movie):
+    # rows of the selected columns are read the same way as movies
+    get_movies_mock = mocker.patch('app.db.crud.get_movie_rows', return_value=[movie])
+    mocker.patch('app.db.crud.count_movies', return_value=1)
+
+    response = client.get(
+        '/movies',
+        params={'fields': 'id,title'},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['items'] == [{'id': 1, 'title': 'test_movie'}]
+    assert get_movies_mock.call_args.kwargs['fields'] == ['id', 'title']
+    assert 'ETag' in response.headers
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movies_by_cursor_fields(client, mocker, movie):
+    mocker.patch('app.db.crud.get_movie_rows_after', return_value=[movie, movie])
+
+    response = client.get(
+        '/movies',
+        params={'pagination': 'cursor', 'size': 1, 'fields': 'title'},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['items'] == [{'title': 'test_movie'}]
+    assert data['next_cursor']
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movie_fields(client, mocker, movie):
+    get_movie_row_mock = mocker.patch('app.db.crud.get_movie_row', return_value=movie)
+
+    response = client.get(
+        '/movies/1',
+        params={'fields': 'release_year'},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {'release_year': 2010}
+    assert get_movie_row_mock.call_args.kwargs['fields'] == ['release_year']
+
+    get_movie_row_mock.return_value = None
+    response = client.get(
+        '/movies/1',
+        params={'fields': 'release_year'},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    assert response.status_code == MovieNotFound.status_code, response.text
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_users_fields(client, mocker, user):
+    get_user_row_mock = mocker.patch('app.db.crud.get_user_row', return_value=user)
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/users/me', params={'fields': 'login'}, headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {'login': 'test_user'}
+
+    response = client.get('/users/1', params={'fields': 'id'}, headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {'id': 1}
+
+    get_user_row_mock.return_value = None
+    response = client.get('/users/1', params={'fields': 'id'}, headers=headers)
+    assert response.status_code == UserNotFound.status_code, response.text
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_unknown_fields(client):
+    response = client.get(
+        '/users/me',
+        params={'fields': 'hashed_password'},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    assert response.status_code == UnknownField.status_code, response.text
+    assert response.json()['detail'] == UnknownField.detail
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_fast_serialization(  # pylint: disable=too-many-arguments
+    client, mocker, monkeypatch, movie, add_review_mock, review
+):
+    monkeypatch.setenv('FAST_SERIALIZATION', 'true')
+    get_movie_rows_mock = mocker.patch(
+        'app.db.crud.get_movie_rows', return_value=[movie]
+    )
+    mocker.patch('app.db.crud.count_movies', return_value=1)
+    mocker.patch('app.db.crud.get_movie_row', return_value=movie)
+    add_review_mock.return_value = review
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/movies', params={'size': 10}, headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {
+        'items': [
+            {
+                'id': 1,
+                'title': 'test_movie',
+                'release_year': 2010,
+                'avg_score': 0.0,
+                'score_number': 0,
+                'review_number': 0,
+            }
+        ],
+        'total': 1,
+        'page': 1,
+        'size': 10,
+    }
+    # all the fields are selected as columns
+    assert get_movie_rows_mock.call_args.kwargs['fields'] == MOVIE_FIELDS
+
+    response = client.get('/movies/1', headers=headers)
+    assert response.json()['title'] == 'test_movie'
+
+    response = client.post(
+        '/reviews/', headers=headers, json={'movie_id': 1, 'score': 10}
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {
+        'id': 1,
+        'user_id': 1,
+        'movie_id': 1,
+        'score': 10,
+        'review_text': 'Nice movie!',
+        'created_at': '2024-01-08T12:30:00',
+    }
@@ -0,0 +1,235 @@
+from http import HTTPStatus
+
+import pytest
+
+from app.db import crud, models, schemas, trending
+from app.db.write_behind import get_statistic_buffer
+from app.exceptions import InvalidCursor, MovieNotFound
+from app.main import on_shutdown, on_startup
+from tests.routers.test_views import headers_for_auth
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movie(client, movie, get_movie_mock):
+    get_movie_mock.return_value = movie
+
+    response = client.get(
+        '/movies/1', headers=headers_for_auth('test_user', '12345678')
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['id'] == 1
+    assert data['title'] == 'test_movie'
+    assert data['release_year'] == 2010
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movie_failed(client, get_movie_mock):
+    get_movie_mock.return_value = None
+
+    response = client.get(
+        '/movies/1', headers=headers_for_auth('test_user', '12345678')
+    )
+
+    assert response.status_code == MovieNotFound.status_code, response.text
+    data = response.json()
+    assert data['detail'] == MovieNotFound.detail
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movie_with_pending_scores(client, monkeypatch, mocker, movie):
+    monkeypatch.setenv('STATISTIC_WRITE_BEHIND', 'true')
+    buffer = get_statistic_buffer()
+    assert buffer is not None
+    mocker.patch('app.db.crud.get_movie', return_value=movie)
+    get_movie_row_mock = mocker.patch('app.db.crud.get_movie_row')
+    get_movie_row_mock.return_value = models.Movie(
+        id=1, score_sum=0, score_number=0, review_number=0
+    )
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/movies/1', headers=headers)
+    etag = response.headers['ETag']
+    buffer.add([{'movie_id': 1, 'new_sum': 15, 'new_scores': 2, 'new_texts': 1}])
+
+    # the cached copy is out of date as soon as scores are pending
+    response = client.get('/movies/1', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert (data['avg_score'], data['score_number'], data['review_number']) == (
+        7.5,
+        2,
+        1,
+    )
+
+    response = client.get('/movies/1', params={'fields': 'avg_score'}, headers=headers)
+    assert response.json() == {'avg_score': 7.5}
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movie_histogram(client, monkeypatch, mocker):
+    get_movie_row_mock = mocker.patch('app.db.crud.get_movie_row')
+    get_movie_row_mock.return_value = models.Movie(
+        id=1, **{**dict.fromkeys(models.HISTOGRAM_FIELDS, 0), 'score_8_number': 3}
+    )
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/movies/1/histogram', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert 'ETag' in response.headers
+    data = response.json()
+    assert data['buckets'] == [0] * 8 + [3, 0, 0]
+    assert (data['score_number'], data['median']) == (3, 8.0)
+    assert data['percentiles'] == {'10': 8, '25': 8, '75': 8, '90': 8}
+
+    # with a pending score of the write-behind mode
+    monkeypatch.setenv('STATISTIC_WRITE_BEHIND', 'true')
+    get_statistic_buffer.cache_clear()
+    buffer = get_statistic_buffer()
+    assert buffer is not None
+    buffer.add(
+        crud.get_movie_statistic_deltas(
+            [schemas.ReviewCreate(movie_id=1, score=2)], trending.utc_now()
+        )
+    )
+
+    response = client.get('/movies/1/histogram', headers=headers)
+    data = response.json()
+    assert data['buckets'] == [0, 0, 1] + [0] * 5 + [3, 0, 0]
+    assert data['median'] == 8.0
+    assert data['percentiles']['10'] == 2
+
+    get_movie_row_mock.return_value = None
+    response = client.get('/movies/2/histogram', headers=headers)
+    assert response.status_code == MovieNotFound.status_code, response.text
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movie_not_modified(client, movie, get_movie_mock, catalog_version_mock):
+    get_movie_mock.return_value = movie
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/movies/1', headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    etag = response.headers['ETag']
+
+    get_movie_mock.reset_mock()
+    response = client.get('/movies/1', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+    get_movie_mock.assert_not_called()
+
+    # another movie has another tag
+    response = client.get('/movies/2', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK, response.text
+
+    catalog_version_mock.return_value = 2
+    response = client.get('/movies/1', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.headers['ETag'] != etag
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movies_not_modified(client, mocker, monkeypatch):
+    monkeypatch.setenv('MOVIE_LIST_CACHE_CONTROL', 'private, max-age=10')
+    get_movies_mock = mocker.patch('app.db.crud.get_movies', return_value=[])
+    mocker.patch('app.db.crud.count_movies', return_value=0)
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/movies/?size=10', headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.headers['Cache-Control'] == 'private, max-age=10'
+
+    get_movies_mock.reset_mock()
+    response = client.get(
+        '/movies/?size=10',
+        headers={**headers, 'If-None-Match': f'W/"0-0", {response.headers["ETag"]}'},
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    get_movies_mock.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ('include_total', 'total'),
+    [('true', 7), ('false', None)],
+)
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movies(client, mocker, movie, include_total, total):
+    get_movies_mock = mocker.patch('app.db.crud.get_movies')
+    get_movies_mock.return_value = [movie]
+    count_movies_mock = mocker.patch('app.db.crud.count_movies')
+    count_movies_mock.return_value = 7
+
+    response = client.get(
+        '/movies',
+        params={'page': 3, 'size': 10, 'include_total': include_total},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['total'] == total
+    assert data['items'][0]['title'] == 'test_movie'
+    assert get_movies_mock.call_args.kwargs == {'limit': 10, 'offset': 20}
+    assert count_movies_mock.called == (total is not None)
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movies_by_cursor(client, mocker, movie):
+    get_movies_after_mock = mocker.patch('app.db.crud.get_movies_after')
+    get_movies_after_mock.return_value = [movie, movie]
+
+    response = client.get(
+        '/movies',
+        params={'pagination': 'cursor', 'size': 1},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert len(data['items']) == 1
+    assert 'total' not in data
+
+    get_movies_after_mock.return_value = [movie]
+    response = client.get(
+        '/movies',
+        params={'pagination': 'cursor', 'size': 1, 'cursor': data['next_cursor']},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['next_cursor'] is None
+    # the next page starts after the id of the last movie
+    assert get_movies_after_mock.call_args.args[2] == [1]
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movies_by_invalid_cursor(client):
+    response = client.get(
+        '/movies',
+        params={'pagination': 'cursor', 'cursor': 'invalid'},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    assert response.status_code == InvalidCursor.status_code, response.text
+    assert response.json()['detail'] == InvalidCursor.detail
+
+
+def test_pending_scores_written_on_shutdown(monkeypatch, mocker):
+    monkeypatch.setenv('STATISTIC_WRITE_BEHIND', 'true')
+    mocker.patch('app.main.dispose_engine')
+    mocker.patch('app.main.check_sqlite_pragmas')
+    get_session_mock = mocker.patch('app.main.get_session')
+    update_movie_statistics_mock = mocker.patch('app.db.crud.update_movie_statistics')
+    delta = {'movie_id': 1, 'new_sum': 8, 'new_scores': 1, 'new_texts': 0}
+
+    on_startup()
+    buffer = get_statistic_buffer()
+    assert buffer is not None
+    buffer.add([delta])
+    on_shutdown()
+
+    db = get_session_mock.return_value.return_value.__enter__.return_value
+    update_movie_statistics_mock.assert_called_once_with(db, [delta])
+    db.commit.assert_called_once()
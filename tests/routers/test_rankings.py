@@ -0,0 +1,148 @@
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+
+from app.db import crud, models, schemas, trending
+from app.db.write_behind import get_statistic_buffer
+from app.exceptions import InvalidCursor
+from app.pagination import TOP_MOVIES_ORDER, encode_cursor
+from tests.routers.test_views import headers_for_auth
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_recommendations(client, mocker, movie):
+    get_recommendations_mock = mocker.patch('app.db.crud.get_recommendations')
+    get_recommendations_mock.return_value = [(movie, 8.5)]
+
+    response = client.get(
+        '/users/me/recommendations',
+        params={'size': 5},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == [
+        {
+            'movie': {
+                'id': 1,
+                'title': 'test_movie',
+                'release_year': 2010,
+                'avg_score': 0.0,
+                'score_number': 0,
+                'review_number': 0,
+            },
+            'predicted_score': 8.5,
+        }
+    ]
+    get_recommendations_mock.assert_called_once_with(mocker.ANY, 1, limit=5)
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_top_movies(client, mocker, monkeypatch, movie):
+    entry = models.LeaderboardEntry(
+        movie_id=1, release_year=2010, weighted_score=5.5, movie=movie
+    )
+    get_top_movies_mock = mocker.patch('app.db.crud.get_top_movies')
+    get_top_movies_mock.return_value = [entry, entry]
+
+    response = client.get(
+        '/movies/top',
+        params={'filter_by_year': 2010, 'size': 1},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['items'] == [
+        {
+            'weighted_score': 5.5,
+            'movie': {
+                'id': 1,
+                'title': 'test_movie',
+                'release_year': 2010,
+                'avg_score': 0.0,
+                'score_number': 0,
+                'review_number': 0,
+            },
+        }
+    ]
+    get_top_movies_mock.assert_called_with(mocker.ANY, 2010, None, limit=2)
+
+    # with a pending score of the write-behind mode
+    monkeypatch.setenv('STATISTIC_WRITE_BEHIND', 'true')
+    get_statistic_buffer.cache_clear()
+    buffer = get_statistic_buffer()
+    assert buffer is not None
+    buffer.add(
+        crud.get_movie_statistic_deltas(
+            [schemas.ReviewCreate(movie_id=1, score=8)], trending.utc_now()
+        )
+    )
+    response = client.get(
+        '/movies/top',
+        params={'filter_by_year': 2010, 'size': 1},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    movie_data = response.json()['items'][0]['movie']
+    assert (movie_data['avg_score'], movie_data['score_number']) == (8.0, 1)
+
+    get_top_movies_mock.return_value = []
+    response = client.get(
+        '/movies/top',
+        params={'cursor': data['next_cursor']},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {'items': [], 'next_cursor': None}
+    assert get_top_movies_mock.call_args.args[2] == [5.5, 1]
+
+    # a key without the movie id
+    response = client.get(
+        '/movies/top',
+        params={'cursor': encode_cursor(TOP_MOVIES_ORDER, [5.5])},
+        headers=headers_for_auth('test_user', '12345678'),
+    )
+    assert response.status_code == InvalidCursor.status_code, response.text
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_trending_movies(client, mocker, movie):
+    movie.trending_score = 8.0
+    get_trending_movies_mock = mocker.patch('app.db.crud.get_trending_movies')
+    get_trending_movies_mock.return_value = [movie, movie]
+    # two half-lives after the epoch (see the defaults of TRENDING_*)
+    mocker.patch('app.db.trending.utc_now', return_value=datetime(2024, 1, 15))
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/movies/trending', params={'size': 1}, headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['items'] == [
+        {
+            'trending_score': pytest.approx(2.0),
+            'movie': {
+                'id': 1,
+                'title': 'test_movie',
+                'release_year': 2010,
+                'avg_score': 0.0,
+                'score_number': 0,
+                'review_number': 0,
+            },
+        }
+    ]
+    get_trending_movies_mock.assert_called_with(mocker.ANY, None, limit=2)
+
+    get_trending_movies_mock.return_value = []
+    response = client.get(
+        '/movies/trending', params={'cursor': data['next_cursor']}, headers=headers
+    )
+    assert response.json() == {'items': [], 'next_cursor': None}
+    # the cursor keeps the stored score, not the decayed one
+    assert get_trending_movies_mock.call_args.args[1] == [8.0, 1]
+
+    response = client.get(
+        '/movies/trending',
+        params={'cursor': 'abc'},
+        headers=headers,
+    )
+    assert response.status_code == InvalidCursor.status_code, response.text
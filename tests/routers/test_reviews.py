@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+import pytest
+
+from app.exceptions import InvalidCursor, MovieNotFound, ReviewNotFound, UserNotFound
+from tests.routers.test_views import headers_for_auth
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_movie_reviews(client, mocker, review):
+    get_movie_reviews_mock = mocker.patch('app.db.crud.get_movie_reviews')
+    get_movie_reviews_mock.return_value = [review, review]
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/movies/1/reviews', params={'size': 1}, headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['items'] == [
+        {
+            'id': 1,
+            'user_id': 1,
+            'movie_id': 1,
+            'score': 10,
+            'review_text': 'Nice movie!',
+            'created_at': '2024-01-08T12:30:00',
+        }
+    ]
+    get_movie_reviews_mock.assert_called_with(mocker.ANY, 1, None, limit=2)
+
+    # the movie is there, it has no more reviews
+    get_movie_reviews_mock.return_value = []
+    get_movie_row_mock = mocker.patch('app.db.crud.get_movie_row')
+    response = client.get(
+        '/movies/1/reviews', params={'cursor': data['next_cursor']}, headers=headers
+    )
+    assert response.json() == {'items': [], 'next_cursor': None}
+    assert get_movie_reviews_mock.call_args.args[2] == [1]
+
+    get_movie_row_mock.return_value = None
+    response = client.get('/movies/2/reviews', headers=headers)
+    assert response.status_code == MovieNotFound.status_code, response.text
+
+    response = client.get(
+        '/movies/1/reviews', params={'cursor': 'abc'}, headers=headers
+    )
+    assert response.status_code == InvalidCursor.status_code, response.text
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_get_user_reviews(client, mocker, review):
+    get_user_reviews_mock = mocker.patch('app.db.crud.get_user_reviews')
+    get_user_reviews_mock.return_value = [review]
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.get('/users/1/reviews', headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['items'][0]['user_id'] == 1
+    assert response.json()['next_cursor'] is None
+
+    get_user_reviews_mock.return_value = []
+    mocker.patch('app.db.crud.get_user_row', return_value=None)
+    response = client.get('/users/2/reviews', headers=headers)
+    assert response.status_code == UserNotFound.status_code, response.text
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_update_review(client, mocker, review):
+    update_review_mock = mocker.patch('app.db.crud.update_review')
+    update_review_mock.return_value = review
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.patch('/reviews/1', headers=headers, json={'score': 10})
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {
+        'id': 1,
+        'user_id': 1,
+        'movie_id': 1,
+        'score': 10,
+        'review_text': 'Nice movie!',
+        'created_at': '2024-01-08T12:30:00',
+    }
+    _, review_id, user_id, changes = update_review_mock.call_args.args
+    assert (review_id, user_id) == (1, 1)
+    assert changes.dict(exclude_unset=True) == {'score': 10}
+
+    response = client.patch('/reviews/1', headers=headers, json={'score': 11})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY, response.text
+
+    update_review_mock.return_value = None
+    response = client.patch('/reviews/2', headers=headers, json={'score': 1})
+    assert response.status_code == ReviewNotFound.status_code, response.text
+    assert response.json()['detail'] == ReviewNotFound.detail
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_delete_review(client, mocker):
+    delete_review_mock = mocker.patch('app.db.crud.delete_review')
+    delete_review_mock.return_value = True
+    headers = headers_for_auth('test_user', '12345678')
+
+    response = client.delete('/reviews/1', headers=headers)
+    assert response.status_code == HTTPStatus.NO_CONTENT, response.text
+    assert response.content == b''
+    delete_review_mock.assert_called_once_with(mocker.ANY, 1, 1)
+
+    delete_review_mock.return_value = False
+    response = client.delete('/reviews/1', headers=headers)
+    assert response.status_code == ReviewNotFound.status_code, response.text
@@ -6,6 +6,7 @@ from sqlalchemy.exc import IntegrityError
 
 from app.exceptions import (
     InvalidCredentials,
+    InvalidToken,
     LoginAlreadyRegistered,
     MovieAlreadyRegistered,
     MovieNotFound,
@@ -117,36 +118,7 @@ def test_create_user_failed(client, get_user_by_login_mock, user):
 
 
 @pytest.mark.usefixtures('auth_mock')
-def test_get_movie(client, movie, get_movie_mock):
-    get_movie_mock.return_value = movie
-
-    response = client.get(
-        '/movies/1', headers=headers_for_auth('test_user', '12345678')
-    )
-
-    assert response.status_code == HTTPStatus.OK, response.text
-    data = response.json()
-    assert data['id'] == 1
-    assert data['title'] == 'test_movie'
-    assert data['release_year'] == 2010
-
-
-@pytest.mark.usefixtures('auth_mock')
-def test_get_movie_failed(client, get_movie_mock):
-    get_movie_mock.return_value = None
-
-    response = client.get(
-        '/movies/1', headers=headers_for_auth('test_user', '12345678')
-    )
-
-    assert response.status_code == MovieNotFound.status_code, response.text
-    data = response.json()
-    assert data['detail'] == MovieNotFound.detail
-
-
-@pytest.mark.usefixtures('auth_mock')
-def test_create_movie(client, create_movie_mock, get_movie_by_title_mock, movie):
-    get_movie_by_title_mock.return_value = None
+def test_create_movie(client, create_movie_mock, movie):
     create_movie_mock.return_value = movie
 
     response = client.post(
@@ -166,8 +138,8 @@ def test_create_movie(client, create_movie_mock, get_movie_by_title_mock, movie)
 
 
 @pytest.mark.usefixtures('auth_mock')
-def test_create_already_registered_movie(client, get_movie_by_title_mock, movie):
-    get_movie_by_title_mock.return_value = movie
+def test_create_already_registered_movie(client, create_movie_mock):
+    create_movie_mock.return_value = None
 
     response = client.post(
         '/movies/',
@@ -184,10 +156,7 @@ def test_create_already_registered_movie(client, get_movie_by_title_mock, movie)
 
 
 @pytest.mark.usefixtures('auth_mock')
-def test_create_movie_with_wrong_year(
-    client, create_movie_mock, get_movie_by_title_mock
-):
-    get_movie_by_title_mock.return_value = None
+def test_create_movie_with_wrong_year(client, create_movie_mock):
     create_movie_mock.side_effect = IntegrityError('Mock', 'Mock', 'Mock')
 
     response = client.post(
@@ -204,9 +173,8 @@ def test_create_movie_with_wrong_year(
     assert data['detail'] == WrongYear.detail
 
 
-@pytest.mark.usefixtures('auth_mock', 'update_movie_mock')
-def test_add_review(client, get_movie_mock, movie, add_review_mock, review):
-    get_movie_mock.return_value = movie
+@pytest.mark.usefixtures('auth_mock')
+def test_add_review(client, add_review_mock, review):
     add_review_mock.return_value = review
 
     response = client.post(
@@ -224,11 +192,14 @@ def test_add_review(client, get_movie_mock, movie, add_review_mock, review):
     assert data['movie_id'] == 1
     assert data['score'] == 10
     assert data['review_text'] == 'Nice movie!'
+    # enough to change or delete the review right away
+    assert (data['id'], data['user_id']) == (1, 1)
+    assert data['created_at'] == '2024-01-08T12:30:00'
 
 
 @pytest.mark.usefixtures('auth_mock')
-def test_add_review_of_unknown_movie(client, get_movie_mock):
-    get_movie_mock.return_value = None
+def test_add_review_of_unknown_movie(client, add_review_mock):
+    add_review_mock.return_value = None
 
     response = client.post(
         '/reviews/',
@@ -246,8 +217,7 @@ def test_add_review_of_unknown_movie(client, get_movie_mock):
 
 
 @pytest.mark.usefixtures('auth_mock')
-def test_add_already_existed_review(client, get_movie_mock, add_review_mock, movie):
-    get_movie_mock.return_value = movie
+def test_add_already_existed_review(client, add_review_mock):
     add_review_mock.side_effect = IntegrityError('Mock', 'Mock', 'Mock')
 
     response = client.post(
@@ -263,3 +233,43 @@ def test_add_already_existed_review(client, get_movie_mock, add_review_mock, mov
     assert response.status_code == ReviewAlreadyExists.status_code, response.text
     data = response.json()
     assert data['detail'] == ReviewAlreadyExists.detail
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_verified_credentials_are_cached(client, get_user_by_login_mock):
+    for _ in range(3):
+        response = client.get(
+            '/users/me', headers=headers_for_auth('test_user', '12345678')
+        )
+        assert response.status_code == HTTPStatus.OK, response.text
+
+    get_user_by_login_mock.assert_called_once()
+
+
+def headers_for_token(token: str) -> dict[str, str]:
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.mark.usefixtures('auth_mock')
+def test_token_auth(client, get_user_by_login_mock):
+    response = client.post(
+        '/users/token', headers=headers_for_auth('test_user', '12345678')
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data['token_type'] == 'bearer'
+
+    response = client.get('/users/me', headers=headers_for_token(data['access_token']))
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == {'login': 'test_user', 'id': 1}
+    # the token is issued once, then no user lookups are needed
+    get_user_by_login_mock.assert_called_once()
+
+
+def test_token_auth_failed(client):
+    response = client.get('/users/me', headers=headers_for_token('bad.token'))
+    assert response.status_code == InvalidToken.status_code, response.text
+    assert response.json()['detail'] == InvalidToken.detail
+
+    response = client.get('/users/me')
+    assert response.status_code == InvalidCredentials.status_code, response.text
@@ -0,0 +1,91 @@
+# pylint: disable=W0621
+import pytest
+
+from app.auth import CredentialCache, create_access_token, verify_access_token
+from app.db import models
+
+
+@pytest.fixture()
+def user():
+    return models.User(id=1, login='test_user')
+
+
+def test_cache_hit_and_miss(user):
+    cache = CredentialCache(maxsize=10, ttl=60)
+
+    assert cache.get('test_user', 'password') is None
+    cache.add(user, 'password')
+    cached_user = cache.get('test_user', 'password')
+
+    assert cached_user is not None
+    assert (cached_user.id, cached_user.login) == (1, 'test_user')
+    assert cache.get('test_user', 'wrong_password') is None
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'size': 1}
+
+
+def test_cache_keys_do_not_contain_credentials(user):
+    cache = CredentialCache(maxsize=10, ttl=60)
+    cache.add(user, 'password')
+
+    (key,) = cache._entries  # pylint: disable=protected-access
+    assert b'password' not in key
+    assert b'test_user' not in key
+
+
+def test_cache_entry_expires(user, mocker):
+    cache = CredentialCache(maxsize=10, ttl=60)
+    cache.add(user, 'password')
+
+    monotonic_mock = mocker.patch('app.auth.time.monotonic')
+    monotonic_mock.return_value = 10**9
+
+    assert cache.get('test_user', 'password') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_cache_is_bounded():
+    cache = CredentialCache(maxsize=2, ttl=60)
+    for user_id in range(3):
+        cache.add(models.User(id=user_id, login=f'user_{user_id}'), 'password')
+
+    assert cache.get('user_0', 'password') is None
+    assert cache.get('user_2', 'password') is not None
+
+
+def test_disabled_cache(user):
+    cache = CredentialCache(maxsize=0, ttl=60)
+    cache.add(user, 'password')
+
+    assert cache.get('test_user', 'password') is None
+
+
+def test_access_token(user):
+    token = create_access_token(user)
+    token_user = verify_access_token(token)
+
+    assert token_user is not None
+    assert (token_user.id, token_user.login) == (1, 'test_user')
+
+
+@pytest.mark.parametrize(
+    'token',
+    [
+        'not_a_token',
+        '{payload}.bad_signature',
+        '{payload}x.{signature}',
+    ],
+    ids=['malformed', 'bad_signature', 'modified_payload'],
+)
+def test_invalid_access_token(user, token):
+    payload, signature = create_access_token(user).split('.')
+
+    assert (
+        verify_access_token(token.format(payload=payload, signature=signature)) is None
+    )
+
+
+def test_expired_access_token(user, mocker):
+    token = create_access_token(user)
+    mocker.patch('app.auth.time.time').return_value = 10**12
+
+    assert verify_access_token(token) is None
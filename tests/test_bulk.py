@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.bulk import batched, iter_lines, iter_rows, validate_rows
+from app.db import schemas
+from app.exceptions import InvalidBulkBody, InvalidCsvHeader, UnsupportedBulkFormat
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(items):
+    return [item async for item in items]
+
+
+def collect(items):
+    return asyncio.run(_collect(items))
+
+
+def test_iter_lines():
+    chunks = _chunks(b'first\nsec', b'ond\n\xd0', b'\x90\nlast')
+    assert collect(iter_lines(chunks)) == ['first', 'second', 'А', 'last']
+
+
+@pytest.mark.parametrize(
+    ('content_type', 'chunks', 'rows'),
+    [
+        (
+            'application/json',
+            [b'[{"title": "Alien", ', b'"release_year": 1979}, 1]'],
+            [{'title': 'Alien', 'release_year': 1979}, 1],
+        ),
+        (
+            'application/x-ndjson; charset=utf-8',
+            [b'{"title": "Alien"}\n\n{"tit', b'le": "Tenet"}\nnot json\n'],
+            [{'title': 'Alien'}, {'title': 'Tenet'}, None],
+        ),
+        (
+            'text/csv',
+            [
+                b'title, release_year\nAlien,1979\n"Tenet, part 1",2020\n',
+                b'Tenet\nAl\rien,1979\n',
+            ],
+            [
+                {'title': 'Alien', 'release_year': '1979'},
+                {'title': 'Tenet, part 1', 'release_year': '2020'},
+                None,
+                None,
+            ],
+        ),
+    ],
+    ids=['json', 'ndjson', 'csv'],
+)
+def test_iter_rows(content_type, chunks, rows):
+    assert collect(iter_rows(content_type, _chunks(*chunks))) == rows
+
+
+@pytest.mark.parametrize(
+    ('content_type', 'body', 'exception'),
+    [
+        ('text/plain', b'', UnsupportedBulkFormat),
+        ('application/json', b'{"title": "Alien"}', InvalidBulkBody),
+        ('application/json', b'[', InvalidBulkBody),
+        ('text/csv', b'ti\rtle\nAlien', InvalidCsvHeader),
+    ],
+)
+def test_iter_rows_failed(content_type, body, exception):
+    with pytest.raises(type(exception)) as exc_info:
+        collect(iter_rows(content_type, _chunks(body)))
+    assert exc_info.value is exception
+
+
+def test_batched():
+    assert collect(batched(_chunks(*range(5)), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_validate_rows():
+    rows = [
+        (0, {'title': 'Alien', 'release_year': '1979'}),
+        (1, {'title': 'Arrival', 'release_year': 1800}),
+        (2, None),
+    ]
+
+    movies, errors = validate_rows(rows, schemas.MovieCreate)
+
+    assert movies == [(0, schemas.MovieCreate(title='Alien', release_year=1979))]
+    assert [error.index for error in errors] == [1, 2]
+    assert errors[0].detail == (
+        'release_year: ensure this value is greater than or equal to 1895'
+    )
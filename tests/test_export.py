@@ -0,0 +1,47 @@
+import orjson
+import pytest
+
+from app.db.schemas import ExportFormat
+from app.export import batched, csv_chunks, export_chunks, ndjson_chunks
+
+ROWS = [(1, 'Inception'), (2, 'Tenet, part 1'), (3, 'Alien')]
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_ndjson_chunks():
+    chunks = list(ndjson_chunks(ROWS, ['id', 'title'], 2))
+
+    assert len(chunks) == 2
+    lines = b''.join(chunks).splitlines()
+    assert [orjson.loads(line) for line in lines] == [
+        {'id': 1, 'title': 'Inception'},
+        {'id': 2, 'title': 'Tenet, part 1'},
+        {'id': 3, 'title': 'Alien'},
+    ]
+
+
+@pytest.mark.parametrize(
+    ('rows', 'result'),
+    [
+        (ROWS, 'id,title\r\n1,Inception\r\n2,"Tenet, part 1"\r\n3,Alien\r\n'),
+        ([], 'id,title\r\n'),
+    ],
+    ids=['rows', 'no_rows'],
+)
+def test_csv_chunks(rows, result):
+    chunks = list(csv_chunks(rows, ['id', 'title'], 2))
+
+    assert ''.join(chunks) == result
+
+
+def test_export_chunks():
+    fields = ['id', 'title']
+    assert list(export_chunks(ROWS, fields, ExportFormat.ndjson, 2)) == list(
+        ndjson_chunks(ROWS, fields, 2)
+    )
+    assert list(export_chunks(ROWS, fields, ExportFormat.csv, 2)) == list(
+        csv_chunks(ROWS, fields, 2)
+    )
@@ -0,0 +1,23 @@
+import pytest
+
+from app.exceptions import UnknownField
+from app.fieldsets import MOVIE_FIELDS, parse_fields
+
+
+@pytest.mark.parametrize(
+    ('fields', 'result'),
+    [
+        (None, None),
+        ('id', ['id']),
+        ('title, id,,title', ['title', 'id']),
+    ],
+)
+def test_parse_fields(fields, result):
+    assert parse_fields(fields, MOVIE_FIELDS) == result
+
+
+@pytest.mark.parametrize('fields', ['', ' , ', 'id,hashed_password'])
+def test_parse_unknown_fields(fields):
+    with pytest.raises(type(UnknownField)) as exc_info:
+        parse_fields(fields, MOVIE_FIELDS)
+    assert exc_info.value is UnknownField
@@ -0,0 +1,43 @@
+# pylint: disable=W0621
+import asyncio
+
+import pytest
+
+from app import hashing
+
+
+@pytest.fixture(params=['0', '1'], ids=['inline', 'process_pool'])
+def hash_workers(request, monkeypatch):
+    monkeypatch.setenv('PASSWORD_HASH_WORKERS', request.param)
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    hashing.shutdown_hashing_executor()
+    yield
+    hashing.shutdown_hashing_executor()
+
+
+@pytest.mark.usefixtures('hash_workers')
+def test_hash_password():
+    hashed_password = hashing.hash_password('password')
+
+    assert hashed_password.startswith('pbkdf2:sha256:1000$')
+    assert hashing.verify_password(hashed_password, 'password')
+    assert not hashing.verify_password(hashed_password, 'wrong_password')
+
+
+@pytest.mark.usefixtures('hash_workers')
+def test_async_hash_password():
+    async def _hash_and_verify():
+        hashed_password = await hashing.async_hash_password('password')
+        return (
+            await hashing.async_verify_password(hashed_password, 'password'),
+            await hashing.async_verify_password(hashed_password, 'wrong_password'),
+        )
+
+    assert asyncio.run(_hash_and_verify()) == (True, False)
+
+
+@pytest.mark.usefixtures('hash_workers')
+def test_executor_depends_on_settings():
+    executor = hashing.get_hashing_executor()
+
+    assert (executor is None) == (hashing.get_settings().PASSWORD_HASH_WORKERS == 0)
@@ -0,0 +1,53 @@
+import pytest
+
+from app.db import models
+from app.histogram import get_histogram, get_median, get_percentile, get_score_at_rank
+
+# scores 2, 5, 5, 9
+BUCKETS = [0, 0, 1, 0, 0, 2, 0, 0, 0, 1, 0]
+
+
+def test_get_score_at_rank():
+    assert [get_score_at_rank(BUCKETS, rank) for rank in range(1, 5)] == [2, 5, 5, 9]
+    with pytest.raises(ValueError):
+        get_score_at_rank(BUCKETS, 5)
+
+
+@pytest.mark.parametrize(
+    'buckets, median',
+    [
+        (BUCKETS, 5.0),
+        ([0] * 10 + [3], 10.0),
+        ([1] + [0] * 9 + [1], 5.0),
+        ([0, 1, 1] + [0] * 8, 1.5),
+        ([0] * 11, None),
+    ],
+)
+def test_get_median(buckets, median):
+    assert get_median(buckets) == median
+
+
+def test_get_percentile():
+    assert get_percentile(BUCKETS, 10) == 2
+    assert get_percentile(BUCKETS, 25) == 2
+    assert get_percentile(BUCKETS, 26) == 5
+    assert get_percentile(BUCKETS, 90) == 9
+    assert get_percentile(BUCKETS, 0) == 2
+    assert get_percentile([0] * 11, 50) is None
+
+
+def test_get_histogram():
+    movie = models.Movie(
+        id=1,
+        **dict(zip(models.HISTOGRAM_FIELDS, BUCKETS)),
+    )
+
+    histogram = get_histogram(movie)
+
+    assert histogram.dict() == {
+        'movie_id': 1,
+        'score_number': 4,
+        'buckets': BUCKETS,
+        'median': 5.0,
+        'percentiles': {10: 2, 25: 2, 75: 5, 90: 9},
+    }
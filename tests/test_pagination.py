@@ -0,0 +1,92 @@
+import base64
+import json
+
+import pytest
+
+from app.db import schemas
+from app.exceptions import CursorSortNotSupported, InvalidCursor
+from app.pagination import (
+    create_cursor_page,
+    decode_cursor,
+    encode_cursor,
+    get_movie_cursor_order,
+)
+
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor('avg_score', [5.5, 2])
+    assert decode_cursor(cursor, 'avg_score') == [5.5, 2]
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    ['not a cursor', encode_cursor('id', [2]), 'W10='],
+    ids=['malformed', 'other_order', 'not_an_object'],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(type(InvalidCursor)) as exc_info:
+        decode_cursor(cursor, 'avg_score')
+    assert exc_info.value is InvalidCursor
+
+
+def raw_cursor(data):
+    # a cursor made up by a client
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+@pytest.mark.parametrize(
+    'data',
+    [
+        {'order': 'id', 'key': 5},
+        {'order': 'id', 'key': {'id': 5}},
+        {'order': 'id'},
+        {'order': 'id', 'key': ['5']},
+        {'order': 'id', 'key': [True]},
+        {'order': 'id', 'key': [1.5]},
+        {'order': 'id', 'key': [2**64]},
+        {'order': 'avg_score', 'key': [float('nan'), 2]},
+        {'order': '-id', 'key': [1, 2]},
+        {'order': 'avg_score', 'key': [5.5]},
+        {'order': 'avg_score', 'key': [5.5, 2, 3]},
+        {'order': 'avg_score', 'key': ['5.5', 2]},
+        {'order': 'weighted_score', 'key': [None, 2]},
+        {'order': 'trending_score', 'key': [5.5, 2.5]},
+    ],
+)
+def test_invalid_cursor_key(data):
+    with pytest.raises(type(InvalidCursor)) as exc_info:
+        decode_cursor(raw_cursor(data), data['order'])
+    assert exc_info.value is InvalidCursor
+
+
+def test_cursor_key_of_integer_score():
+    assert decode_cursor(encode_cursor('weighted_score', [5, 2]), 'weighted_score') == [
+        5,
+        2,
+    ]
+
+
+@pytest.mark.parametrize(
+    ('items', 'next_key'),
+    [([1, 2, 3], [2]), ([1, 2], None)],
+    ids=['has_next_page', 'last_page'],
+)
+def test_create_cursor_page(items, next_key):
+    page = create_cursor_page(items, 2, 'id', lambda item: [item])
+
+    assert page.items == [1, 2]
+    if next_key is None:
+        assert page.next_cursor is None
+    else:
+        assert page.next_cursor is not None
+        assert decode_cursor(page.next_cursor, 'id') == next_key
+
+
+def test_get_movie_cursor_order():
+    assert get_movie_cursor_order(schemas.MovieFilters()) == 'id'
+    assert (
+        get_movie_cursor_order(schemas.MovieFilters(sort_by_avg_score=True))
+        == 'avg_score'
+    )
+    with pytest.raises(type(CursorSortNotSupported)):
+        get_movie_cursor_order(schemas.MovieFilters(sort_by_relevance=True))